@@ -6,6 +6,11 @@ from flask_mail import Mail
 from flask_wtf.csrf import CSRFProtect
 import os
 from app.utils import get_version_info
+from app.cache import TieredCache
+from app.mail_queue import MailDispatcher
+from app.prerender import Prerenderer
+from app.render_pool import RenderPool, RenderError
+from app.jobs import JobQueue
 import logging
 import sys
 from config import config
@@ -16,6 +21,14 @@ migrate = Migrate()
 login_manager = LoginManager()
 mail = Mail()
 csrf = CSRFProtect()
+chart_cache = TieredCache('CHART_CACHE')
+qr_cache = TieredCache('QR_CACHE', max_entries=128)
+fragment_cache = TieredCache('FRAGMENT_CACHE', max_entries=256)
+report_cache = TieredCache('REPORT_CACHE', max_entries=32)
+mailer = MailDispatcher()
+prerenderer = Prerenderer()
+render_pool = RenderPool()
+job_queue = JobQueue()
 
 # Set up logging
 handler = logging.StreamHandler(sys.stdout)
@@ -38,7 +51,15 @@ def create_app(config_name):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     mail.init_app(app)
+    mailer.init_app(app)
     csrf.init_app(app)
+    chart_cache.init_app(app)
+    qr_cache.init_app(app)
+    fragment_cache.init_app(app)
+    report_cache.init_app(app)
+    prerenderer.init_app(app)
+    render_pool.init_app(app)
+    job_queue.init_app(app)
 
     # Bind Socket.IO to the app so socketio.run() / live events work.
     # Without this, wsgi.py's socketio.run(app) crashes (eio is None).
@@ -61,6 +82,9 @@ def create_app(config_name):
     from app.admin import admin as admin_blueprint
     app.register_blueprint(admin_blueprint, url_prefix='/admin')
 
+    from app.commands import register_commands
+    register_commands(app)
+
     # Expose the shared score->position helpers to all templates so every grid
     # renderer derives from one source of truth (app/assessment/geometry.py).
     from app.assessment import geometry
@@ -72,6 +96,10 @@ def create_app(config_name):
         style_color=geometry.style_color,
     )
 
+    # {% cache %} tag for user-independent template blocks (app/fragments.py)
+    from app.fragments import init_fragment_cache
+    init_fragment_cache(app, fragment_cache)
+
     # Configure error handlers
     @app.errorhandler(404)
     def page_not_found(e):
@@ -80,5 +108,11 @@ def create_app(config_name):
     @app.errorhandler(500)
     def internal_server_error(e):
         return render_template('500.html'), 500
+    
+    @app.errorhandler(RenderError)
+    def render_unavailable(e):
+        # Render pool busy, timed out or crashed (app/render_pool.py)
+        logger.warning(f"Render unavailable: {e}")
+        return render_template('500.html'), 503, {'Retry-After': '5'}
         
     return app
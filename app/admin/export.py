@@ -0,0 +1,224 @@
+"""Bulk export of assessment results for analytics.
+
+Results are read through a server-side cursor (``yield_per``) and written a
+chunk at a time, so an export of every result holds one chunk of rows in
+memory however large the table is. Each chunk costs one extra query, for the
+team names of the users in it.
+
+CSV needs nothing beyond the standard library. Parquet is written with
+pyarrow, one row group per chunk, and is only offered when pyarrow is
+installed.
+
+Exports too large for a request run as ``results_export`` background jobs
+(app/jobs.py), written to the job's download file.
+"""
+
+import csv
+import io
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.jobs import job_handler
+from app.models.user import User
+from app.models.assessment import Assessment, AssessmentResult
+from app.models.team import Team, TeamMember
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# (column name, pyarrow type name) in output order
+COLUMNS = [
+    ('result_id', 'int64'),
+    ('created_at', 'timestamp'),
+    ('assessment_id', 'int64'),
+    ('assessment', 'string'),
+    ('user_id', 'int64'),
+    ('user_email', 'string'),
+    ('user_name', 'string'),
+    ('teams', 'string'),
+    ('assertiveness_score', 'float64'),
+    ('responsiveness_score', 'float64'),
+    ('social_style', 'string'),
+]
+# Separates team names in the teams column
+TEAM_SEPARATOR = '; '
+# Leading characters that make spreadsheets read a CSV cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportUnavailable(Exception):
+    """Raised when the requested format's library is not installed."""
+
+
+def export_filename(fmt):
+    """``assessment-results-20240601.csv``, the download name of an export."""
+    return f'assessment-results-{datetime.utcnow():%Y%m%d}.{FORMATS[fmt][1]}'
+
+
+def results_query(assessment_id=None, team_id=None, since=None, until=None):
+    """SELECT of the export columns (except teams), oldest result first.
+
+    ``since`` and ``until`` are dates and both inclusive; ``team_id`` keeps
+    results of users who are members of that team.
+    """
+    query = db.select(
+        AssessmentResult.id, AssessmentResult.created_at, AssessmentResult.assessment_id,
+        Assessment.name, AssessmentResult.user_id, User.email, User.name,
+        AssessmentResult.assertiveness_score, AssessmentResult.responsiveness_score,
+        AssessmentResult.social_style,
+    ).join(User, User.id == AssessmentResult.user_id).join(
+        Assessment, Assessment.id == AssessmentResult.assessment_id)
+    if assessment_id is not None:
+        query = query.where(AssessmentResult.assessment_id == assessment_id)
+    if team_id is not None:
+        members = db.select(TeamMember.user_id).where(TeamMember.team_id == team_id)
+        query = query.where(AssessmentResult.user_id.in_(members))
+    if since is not None:
+        query = query.where(AssessmentResult.created_at >= since)
+    if until is not None:
+        query = query.where(AssessmentResult.created_at < until + timedelta(days=1))
+    return query.order_by(AssessmentResult.id)
+
+
+def _team_names(user_ids):
+    """``{user id: 'Team A; Team B'}`` for the given users."""
+    rows = db.session.execute(
+        db.select(TeamMember.user_id, Team.name)
+        .join(Team, Team.id == TeamMember.team_id)
+        .where(TeamMember.user_id.in_(user_ids))
+        .order_by(TeamMember.user_id, Team.name)
+    )
+    names = {}
+    for user_id, name in rows:
+        names.setdefault(user_id, []).append(name)
+    return {user_id: TEAM_SEPARATOR.join(teams) for user_id, teams in names.items()}
+
+
+def iter_result_chunks(query, chunk_size=1000):
+    """Yield lists of export rows (tuples in COLUMNS order) from ``query``."""
+    result = db.session.execute(query, execution_options={'yield_per': chunk_size})
+    for rows in result.partitions():
+        teams = _team_names({row.user_id for row in rows})
+        yield [row[:7] + (teams.get(row.user_id, ''),) + row[7:] for row in rows]
+
+
+def csv_cell(value):
+    """``value`` for a CSV cell, with user text that looks like a formula quoted."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(chunks):
+    """Encode row chunks as UTF-8 CSV, header first, one bytes value per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in COLUMNS])
+    for rows in chunks:
+        writer.writerows(
+            [row[0], row[1].isoformat() if row[1] else ''] + [csv_cell(value) for value in row[2:]]
+            for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file that hands back what pyarrow wrote since the last drain."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ExportUnavailable('Parquet export needs the pyarrow package') from exc
+    return pyarrow
+
+
+def parquet_chunks(chunks):
+    """Encode row chunks as a Parquet file, one row group per chunk."""
+    pa = _arrow()
+    types = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(),
+             'timestamp': pa.timestamp('us')}
+    schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+    sink = _ChunkSink()
+    writer = pa.parquet.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def require_format(fmt):
+    """Raise ExportUnavailable if ``fmt``'s library is not installed."""
+    if fmt == 'parquet':
+        _arrow()
+
+
+def export_chunks(fmt, chunks):
+    """Encode row chunks in ``fmt`` ('csv' or 'parquet') as a stream of bytes."""
+    # Fail before the response starts rather than part-way through it
+    require_format(fmt)
+    if fmt == 'parquet':
+        return parquet_chunks(chunks)
+    return csv_chunks(chunks)
+
+
+@job_handler('results_export')
+def export_job(ctx, fmt='csv', assessment_id=None, team_id=None, since=None, until=None,
+               chunk_size=1000):
+    """Write an export to the job's download file; dates are ISO strings."""
+    query = results_query(assessment_id=assessment_id, team_id=team_id,
+                          since=date.fromisoformat(since) if since else None,
+                          until=date.fromisoformat(until) if until else None)
+    total = db.session.scalar(db.select(db.func.count()).select_from(query.order_by(None).subquery()))
+    written = 0
+
+    def counted(chunks):
+        nonlocal written
+        for rows in chunks:
+            written += len(rows)
+            ctx.progress(written, total)
+            yield rows
+
+    with ctx.artifact(export_filename(fmt), FORMATS[fmt][0]) as f:
+        for data in export_chunks(fmt, counted(iter_result_chunks(query, chunk_size))):
+            f.write(data)
+    return f'{written} results'
@@ -0,0 +1,163 @@
+"""Aggregate queries for the admin pages.
+
+Counts come from the daily rollup tables (app/models/rollup.py), so each
+chart is one small GROUP BY over at most one row per day (per assessment and
+style for results) rather than a scan of users or assessment_results. The
+only live query is the active-user count, an index range scan on
+users.last_login. Month and weekday buckets compile to the native date
+functions of the current dialect (SQLite or PostgreSQL).
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Integer, String, case, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app import db
+from app.models.user import User
+from app.models.assessment import Assessment
+from app.models.rollup import DailySignups, DailyResults, DailyActiveUsers
+
+STYLE_NAMES = ['DRIVER', 'EXPRESSIVE', 'AMIABLE', 'ANALYTICAL']
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class month_key(FunctionElement):
+    """``'YYYY-MM'`` of a timestamp column."""
+    type = String()
+    inherit_cache = True
+    name = 'month_key'
+
+
+@compiles(month_key)
+def _month_key_postgresql(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_key, 'sqlite')
+def _month_key_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m', " + compiler.process(element.clauses, **kw) + ')'
+
+
+class weekday(FunctionElement):
+    """Day of week of a timestamp column, 0 = Sunday ... 6 = Saturday."""
+    type = Integer()
+    inherit_cache = True
+    name = 'weekday'
+
+
+@compiles(weekday)
+def _weekday_postgresql(element, compiler, **kw):
+    return 'CAST(EXTRACT(dow FROM %s) AS INTEGER)' % compiler.process(element.clauses, **kw)
+
+
+@compiles(weekday, 'sqlite')
+def _weekday_sqlite(element, compiler, **kw):
+    return "CAST(strftime('%w', " + compiler.process(element.clauses, **kw) + ') AS INTEGER)'
+
+
+def month_starts(now, count=6):
+    """First instant of each of the last ``count`` calendar months, oldest first."""
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(count):
+        starts.append(datetime(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return starts[::-1]
+
+
+def next_month(start):
+    return datetime(start.year + 1, 1, 1) if start.month == 12 else datetime(start.year, start.month + 1, 1)
+
+
+def monthly_counts(model, starts):
+    """Rollup totals per calendar month for the windows ``starts``."""
+    bucket = month_key(model.day)
+    counts = dict(
+        db.session.query(bucket, func.sum(model.total)).filter(
+            model.day >= starts[0].date(), model.day < next_month(starts[-1]).date()
+        ).group_by(bucket).all()
+    )
+    return [counts.get(start.strftime('%Y-%m'), 0) for start in starts]
+
+
+def user_totals(now):
+    """``(total, active in 30 days, active in 7 days)`` in one query.
+
+    Activity needs distinct users, which daily rollups can't give, so it is
+    counted from the last_login index over the 30-day window only.
+    """
+    total = db.session.query(func.coalesce(func.sum(DailySignups.total), 0)).scalar_subquery()
+    return db.session.query(
+        total,
+        func.count(User.id),
+        func.count(case((User.last_login > now - timedelta(days=7), 1))),
+    ).select_from(User).filter(User.last_login > now - timedelta(days=30)).one()
+
+
+def style_totals(assessment_id=None):
+    """``(total results, {style: count})``, optionally for one assessment.
+
+    Results without a style are included in the total and keyed as None.
+    """
+    query = db.session.query(DailyResults.social_style, func.sum(DailyResults.total))
+    if assessment_id is not None:
+        query = query.filter(DailyResults.assessment_id == assessment_id)
+    counts = {(style or None): total for style, total in query.group_by(DailyResults.social_style)
+              if total}
+    return sum(counts.values()), counts
+
+
+def results_by_assessment():
+    """``{assessment id: result count}`` for every assessment with results."""
+    return dict(
+        db.session.query(DailyResults.assessment_id, func.sum(DailyResults.total))
+        .group_by(DailyResults.assessment_id).all()
+    )
+
+
+def login_weekdays():
+    """Daily active users summed by weekday, Monday first."""
+    day = weekday(DailyActiveUsers.day)
+    counts = dict(
+        db.session.query(day, func.sum(DailyActiveUsers.total)).group_by(day).all()
+    )
+    # weekday() is 0 = Sunday; DAY_NAMES starts on Monday
+    return [counts.get((i + 1) % 7, 0) for i in range(7)]
+
+
+def overview(now=None):
+    """User, assessment and result totals shared by the dashboard and statistics.
+
+    Also returns the per-style counts as ``style_counts_by_name``.
+    """
+    now = now or datetime.utcnow()
+    total_users, active_users_30d, active_users_7d = user_totals(now)
+    total_results, style_counts = style_totals()
+    return {
+        'total_users': total_users,
+        'active_users_30d': active_users_30d,
+        'active_users_7d': active_users_7d,
+        'total_assessments': db.session.query(func.count(Assessment.id)).scalar(),
+        'total_results': total_results,
+        'style_counts_by_name': style_counts,
+    }
+
+
+def statistics_context(now=None):
+    """Template context for admin/statistics.html."""
+    now = now or datetime.utcnow()
+    starts = month_starts(now)
+    context = overview(now)
+    style_counts = context.pop('style_counts_by_name')
+    context.update({
+        'month_labels': [start.strftime('%b %Y') for start in starts],
+        'user_counts': monthly_counts(DailySignups, starts),
+        'result_counts': monthly_counts(DailyResults, starts),
+        'style_names': STYLE_NAMES,
+        'style_counts': [style_counts.get(style, 0) for style in STYLE_NAMES],
+        'day_names': DAY_NAMES,
+        'day_counts': login_weekdays(),
+    })
+    return context
@@ -1,12 +1,20 @@
-from datetime import datetime, timedelta
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from datetime import date
+import json
+from flask import (render_template, redirect, url_for, flash, request, jsonify, abort,
+                   current_app, stream_with_context)
 from flask_login import login_required, current_user
-from sqlalchemy import func, desc
-from app import db
+from sqlalchemy import func, desc, or_
+from app import db, job_queue
 from app.admin import admin
+from app.admin.export import (FORMATS, ExportUnavailable, export_chunks, export_filename, iter_result_chunks,
+                              require_format, results_query)
+from app.admin.stats import STYLE_NAMES, overview, results_by_assessment, statistics_context, style_totals
 from app.decorators import admin_required
+from app.pagination import keyset_page, iter_keyset_pages, starts_with
 from app.models.user import User
 from app.models.assessment import Assessment, AssessmentResult
+from app.models.rollup import discount_results
+from app.assessment.utils import discard_reports
 from app.email import send_email
 
 @admin.route('/dashboard')
@@ -14,13 +22,8 @@ from app.email import send_email
 @admin_required
 def dashboard():
     """Admin dashboard with overview statistics."""
-    # Get user statistics
-    total_users = User.query.count()
-    active_users = User.query.filter(User.last_login > (datetime.utcnow() - timedelta(days=30))).count()
-    
-    # Get assessment statistics
-    total_assessments = Assessment.query.count()
-    total_results = AssessmentResult.query.count()
+    # Totals come from the daily rollups (app/admin/stats.py)
+    totals = overview()
     
     # Get recent users
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
@@ -29,29 +32,92 @@ def dashboard():
     recent_results = AssessmentResult.query.order_by(AssessmentResult.created_at.desc()).limit(5).all()
     
     return render_template('admin/dashboard.html',
-                          total_users=total_users,
-                          active_users=active_users,
-                          total_assessments=total_assessments,
-                          total_results=total_results,
+                          total_users=totals['total_users'],
+                          active_users=totals['active_users_30d'],
+                          total_assessments=totals['total_assessments'],
+                          total_results=totals['total_results'],
                           recent_users=recent_users,
                           recent_results=recent_results)
 
+# Rows per page in the admin listings (keyset pages, see app/pagination.py)
+USERS_PER_PAGE = 50
+RESULTS_PER_PAGE = 25
+# Rows fetched per query while streaming /users.json
+STREAM_CHUNK_SIZE = 500
+# Rows fetched per server-side cursor batch in /results/export
+EXPORT_CHUNK_SIZE = 1000
+
+def user_search(query, search):
+    """Restrict a User query to emails or names starting with ``search``."""
+    prefix = search.strip().lower()
+    if not prefix:
+        return query
+    # Not every signup path lower-cases emails, so both sides use lower()
+    # and its expression indexes
+    return query.filter(or_(starts_with(func.lower(User.email), prefix),
+                            starts_with(func.lower(User.name), prefix)))
+
 @admin.route('/users')
 @login_required
 @admin_required
 def users():
-    """List all users with management options."""
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template('admin/users.html', users=users)
+    """List users newest first, a page at a time, with prefix search."""
+    search = request.args.get('q', '')
+    try:
+        page = keyset_page(user_search(User.query, search), User.created_at, User.id,
+                           request.args.get('after'), USERS_PER_PAGE)
+    except ValueError:
+        abort(400)
+    return render_template('admin/users.html', users=page.items,
+                           next_cursor=page.next_cursor, search=search.strip())
+
+@admin.route('/users.json')
+@login_required
+@admin_required
+def users_json():
+    """Stream the (optionally searched) user listing as JSON.
+
+    Rows are fetched in keyset chunks and written as they are read, so memory
+    stays flat however many users match.
+    """
+    query = user_search(db.session.query(User.id, User.name, User.email, User.created_at,
+                                         User.last_login, User.is_admin),
+                        request.args.get('q', ''))
+
+    def generate():
+        yield '{"users": ['
+        separator = ''
+        for rows in iter_keyset_pages(query, User.created_at, User.id, STREAM_CHUNK_SIZE):
+            chunk = ','.join(json.dumps({
+                'id': row.id,
+                'name': row.name,
+                'email': row.email,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'last_login': row.last_login.isoformat() if row.last_login else None,
+                'is_admin': bool(row.is_admin),
+            }) for row in rows)
+            yield separator + chunk
+            separator = ','
+        yield ']}'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
 
 @admin.route('/users/<int:user_id>')
 @login_required
 @admin_required
 def user_detail(user_id):
-    """Show detailed information about a user."""
+    """Show detailed information about a user, with paged assessment history."""
     user = User.query.get_or_404(user_id)
-    results = AssessmentResult.query.filter_by(user_id=user.id).order_by(AssessmentResult.created_at.desc()).all()
-    return render_template('admin/user_detail.html', user=user, results=results)
+    try:
+        page = keyset_page(AssessmentResult.query.filter_by(user_id=user.id),
+                           AssessmentResult.created_at, AssessmentResult.id,
+                           request.args.get('after'), RESULTS_PER_PAGE)
+    except ValueError:
+        abort(400)
+    total_results = db.session.query(func.count(AssessmentResult.id)).filter(
+        AssessmentResult.user_id == user.id).scalar()
+    return render_template('admin/user_detail.html', user=user, results=page.items,
+                           next_cursor=page.next_cursor, total_results=total_results)
 
 @admin.route('/users/<int:user_id>/toggle_admin', methods=['POST'])
 @login_required
@@ -102,8 +168,17 @@ def delete_user(user_id):
         flash('You cannot delete your own account.', 'danger')
         return redirect(url_for('admin.users'))
     
-    # Delete all assessment results for this user
-    AssessmentResult.query.filter_by(user_id=user.id).delete()
+    # Drop the latest-result pointer first; the bulk delete below bypasses
+    # the ORM hooks that would otherwise repair it
+    user.latest_result_id = None
+    db.session.flush()
+    
+    # Delete all assessment results for this user (bulk, so take them out
+    # of the daily rollups first)
+    results = AssessmentResult.query.filter_by(user_id=user.id)
+    discount_results(results)
+    discard_reports(result_id for result_id, in results.with_entities(AssessmentResult.id))
+    results.delete()
     
     # Delete the user
     db.session.delete(user)
@@ -119,23 +194,9 @@ def assessments():
     """List all assessments with management options."""
     assessments = Assessment.query.order_by(Assessment.created_at.desc()).all()
     
-    # Get social style distribution for all assessments
-    style_distribution = db.session.query(
-        AssessmentResult.social_style,
-        func.count(AssessmentResult.id)
-    ).group_by(AssessmentResult.social_style).all()
-    
-    # Convert to a dictionary for easier access in the template
-    style_counts = {
-        'DRIVER': 0,
-        'EXPRESSIVE': 0,
-        'AMIABLE': 0,
-        'ANALYTICAL': 0
-    }
-    
-    for style, count in style_distribution:
-        if style in style_counts:
-            style_counts[style] = count
+    # Social style distribution for all assessments, from the daily rollups
+    _, counts = style_totals()
+    style_counts = {style: counts.get(style, 0) for style in STYLE_NAMES}
     
     # Format for the template
     assessment_stats = {
@@ -144,7 +205,8 @@ def assessments():
     
     return render_template('admin/assessments.html', 
                           assessments=assessments,
-                          assessment_stats=assessment_stats)
+                          assessment_stats=assessment_stats,
+                          result_counts=results_by_assessment())
 
 @admin.route('/assessments/<int:assessment_id>')
 @login_required
@@ -153,14 +215,9 @@ def assessment_detail(assessment_id):
     """Show detailed information about an assessment."""
     assessment = Assessment.query.get_or_404(assessment_id)
     
-    # Get statistics for this assessment
-    total_results = AssessmentResult.query.filter_by(assessment_id=assessment.id).count()
-    
-    # Get distribution of social styles
-    style_distribution = db.session.query(
-        AssessmentResult.social_style, 
-        func.count(AssessmentResult.id)
-    ).filter_by(assessment_id=assessment.id).group_by(AssessmentResult.social_style).all()
+    # Totals and style distribution for this assessment, from the daily rollups
+    total_results, counts = style_totals(assessment.id)
+    style_distribution = sorted(counts.items(), key=lambda item: item[0] or '')
     
     # Get recent results
     recent_results = AssessmentResult.query.filter_by(assessment_id=assessment.id).order_by(AssessmentResult.created_at.desc()).limit(10).all()
@@ -233,79 +290,77 @@ def edit_assessment(assessment_id):
 @login_required
 @admin_required
 def statistics():
-    """Show detailed statistics about users and assessments."""
-    # User statistics
-    total_users = User.query.count()
-    active_users_30d = User.query.filter(User.last_login > (datetime.utcnow() - timedelta(days=30))).count()
-    active_users_7d = User.query.filter(User.last_login > (datetime.utcnow() - timedelta(days=7))).count()
-    
-    # Assessment statistics
-    total_assessments = Assessment.query.count()
-    total_results = AssessmentResult.query.count()
-    
-    # Generate a list of the last 6 months in YYYY-MM format
-    months = []
-    month_labels = []
-    now = datetime.utcnow()
-    for i in range(5, -1, -1):  # Last 6 months, from oldest to newest
-        date = now - timedelta(days=i*30)  # Approximate month
-        month_str = date.strftime('%Y-%m')
-        months.append(month_str)
-        month_labels.append(date.strftime('%b %Y'))  # Formatted as "Jan 2023"
-    
-    # User growth by month
-    user_counts = []
-    for month in months:
-        year, month_num = month.split('-')
-        year, month_num = int(year), int(month_num)
-        count = User.query.filter(
-            func.extract('year', User.created_at) == year,
-            func.extract('month', User.created_at) == month_num
-        ).count()
-        user_counts.append(count)
+    """Show detailed statistics about users and assessments.
 
-    # Assessment results by month
-    result_counts = []
-    for month in months:
-        year, month_num = month.split('-')
-        year, month_num = int(year), int(month_num)
-        count = AssessmentResult.query.filter(
-            func.extract('year', AssessmentResult.created_at) == year,
-            func.extract('month', AssessmentResult.created_at) == month_num
-        ).count()
-        result_counts.append(count)
-    
-    # Social style distribution
-    style_names = ['DRIVER', 'EXPRESSIVE', 'AMIABLE', 'ANALYTICAL']
-    style_counts = []
-    
-    for style in style_names:
-        count = AssessmentResult.query.filter_by(social_style=style).count()
-        style_counts.append(count)
-    
-    # User activity by day of week (0=Sunday in PostgreSQL dow, 1=Monday...6=Saturday)
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_counts = [0] * 7
+    A handful of aggregates over the daily rollups; see app/admin/stats.py.
+    """
+    return render_template('admin/statistics.html', **statistics_context())
+
+def export_filters(values):
+    """``(format, filters)`` from export request values; aborts 400 on bad input.
+
+    Filters: ``assessment``, ``team`` (ids) and ``since``/``until`` (inclusive
+    YYYY-MM-DD dates), keyed like results_query's arguments.
+    """
+    fmt = values.get('format', 'csv')
+    if fmt not in FORMATS:
+        abort(400)
+    try:
+        since, until = (date.fromisoformat(values[name]) if values.get(name) else None
+                        for name in ('since', 'until'))
+    except ValueError:
+        abort(400)
+    return fmt, {'assessment_id': values.get('assessment', type=int),
+                 'team_id': values.get('team', type=int),
+                 'since': since, 'until': until}
+
+@admin.route('/results/export')
+@login_required
+@admin_required
+def export_results():
+    """Stream assessment results as CSV or Parquet for analytics.
+
+    Takes the filters of export_filters. See app/admin/export.py.
+    """
+    fmt, filters = export_filters(request.args)
+    query = results_query(**filters)
+    try:
+        body = export_chunks(fmt, iter_result_chunks(query, EXPORT_CHUNK_SIZE))
+    except ExportUnavailable as exc:
+        return str(exc), 501
+    mimetype, _ = FORMATS[fmt]
+    filename = export_filename(fmt)
+    return current_app.response_class(
+        stream_with_context(body), mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@admin.route('/results/export', methods=['POST'])
+@login_required
+@admin_required
+def queue_results_export():
+    """Build an export as a background job, for exports too large to stream.
+
+    Takes the same filters as export_results, as form fields.
+    """
+    fmt, filters = export_filters(request.form)
+    try:
+        require_format(fmt)
+    except ExportUnavailable as exc:
+        flash(str(exc), 'danger')
+        return redirect(request.referrer or url_for('admin.assessments'))
+    for name in ('since', 'until'):
+        if filters[name] is not None:
+            filters[name] = filters[name].isoformat()
+    job = job_queue.enqueue('results_export', current_user, fmt=fmt,
+                            chunk_size=EXPORT_CHUNK_SIZE, **filters)
+    return redirect(url_for('main.job_detail', job_id=job.id))
+
+@admin.route('/results/rescore', methods=['POST'])
+@login_required
+@admin_required
+def queue_rescore():
+    """Re-score every stored result as a background job (see flask rescore-results)."""
+    job = job_queue.enqueue('rescore_results', current_user,
+                            dry_run=request.form.get('dry_run') == '1')
+    return redirect(url_for('main.job_detail', job_id=job.id))
 
-    # PostgreSQL extract(dow) returns 0=Sunday, 1=Monday...6=Saturday
-    for i in range(7):
-        pg_dow = (i + 1) % 7  # Monday=1, Tuesday=2,...Sunday=0
-        count = db.session.query(func.count(User.id)).filter(
-            User.last_login.isnot(None),
-            func.extract('dow', User.last_login) == pg_dow
-        ).scalar() or 0
-        day_counts[i] = count
-    
-    return render_template('admin/statistics.html',
-                          total_users=total_users,
-                          active_users_30d=active_users_30d,
-                          active_users_7d=active_users_7d,
-                          total_assessments=total_assessments,
-                          total_results=total_results,
-                          month_labels=month_labels,
-                          user_counts=user_counts,
-                          result_counts=result_counts,
-                          style_names=style_names,
-                          style_counts=style_counts,
-                          day_names=day_names,
-                          day_counts=day_counts) 
\ No newline at end of file
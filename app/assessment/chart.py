@@ -0,0 +1,233 @@
+"""Matplotlib-free renderer for the Social Styles result chart.
+
+The static part of the chart (quadrants, grid, axis and quadrant labels) is
+described once as a list of primitives in the 400x400 SVG grid space from
+app/assessment/geometry.py, and rendered once per size into a background
+template: an SVG string, or a Pillow image for PNG. Each request only
+composites the marker and its score label onto a copy of that template.
+
+Layout matches the matplotlib chart and the web SVG grids:
+  - X axis = Assertiveness (left = ASKS, right = TELLS)
+  - Y axis = Responsiveness (top = CONTROLS, bottom = EMOTES)
+  - Analytical top-left, Driver top-right, Amiable bottom-left,
+    Expressive bottom-right
+"""
+
+import io
+from functools import lru_cache
+
+from app.assessment import geometry
+
+VIEWBOX = 400
+# Pixels per inch of ``size``; matches the 100 dpi matplotlib output.
+DPI = 100
+
+TITLE = 'Social Styles Assessment Results'
+QUADRANT_LABELS = (
+    (1.75, 1.75, 'ANALYTICAL'),
+    (3.25, 1.75, 'DRIVER'),
+    (1.75, 3.25, 'AMIABLE'),
+    (3.25, 3.25, 'EXPRESSIVE'),
+)
+GRID_STEPS = (1.5, 2.0, 3.0, 3.5)
+TICKS = (1, 2, 3, 4)
+MARKER_RADIUS = 8
+PALETTE_COLORS = 200
+
+TEXT_COLOR = '#212121'
+GRID_COLOR = '#bdbdbd'
+AXIS_COLOR = '#616161'
+
+
+def _tint(hex_color, amount=0.1):
+    """Blend ``hex_color`` with white; ``amount`` is the share of the color."""
+    channels = (int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+    return '#' + ''.join('{:02x}'.format(round(255 - (255 - c) * amount)) for c in channels)
+
+
+@lru_cache(maxsize=1)
+def background_shapes():
+    """Static chart primitives in grid space.
+
+    Each entry is one of:
+      ('rect', x, y, width, height, fill)
+      ('line', x1, y1, x2, y2, color, width, dashed)
+      ('text', x, y, text, font_size, color, bold)
+    """
+    lo_x, lo_y = geometry.svg_position(geometry.LO, geometry.LO)
+    hi_x, hi_y = geometry.svg_position(geometry.HI, geometry.HI)
+    mid_x, mid_y = geometry.svg_position(geometry.MIDPOINT, geometry.MIDPOINT)
+    shapes = []
+
+    for a, r, name in QUADRANT_LABELS:
+        x = lo_x if a < geometry.MIDPOINT else mid_x
+        y = lo_y if r < geometry.MIDPOINT else mid_y
+        shapes.append(('rect', x, y, mid_x - lo_x, mid_y - lo_y,
+                       _tint(geometry.QUADRANT_COLORS[name])))
+
+    for step in GRID_STEPS:
+        x, y = geometry.svg_position(step, step)
+        shapes.append(('line', x, lo_y, x, hi_y, GRID_COLOR, 1, True))
+        shapes.append(('line', lo_x, y, hi_x, y, GRID_COLOR, 1, True))
+
+    shapes.append(('line', lo_x, lo_y, hi_x, lo_y, AXIS_COLOR, 1, False))
+    shapes.append(('line', lo_x, hi_y, hi_x, hi_y, AXIS_COLOR, 1, False))
+    shapes.append(('line', lo_x, lo_y, lo_x, hi_y, AXIS_COLOR, 1, False))
+    shapes.append(('line', hi_x, lo_y, hi_x, hi_y, AXIS_COLOR, 1, False))
+    shapes.append(('line', mid_x, lo_y, mid_x, hi_y, AXIS_COLOR, 2, False))
+    shapes.append(('line', lo_x, mid_y, hi_x, mid_y, AXIS_COLOR, 2, False))
+
+    for a, r, name in QUADRANT_LABELS:
+        x, y = geometry.svg_position(a, r)
+        shapes.append(('text', x, y, name, 14, geometry.QUADRANT_COLORS[name], True))
+
+    for tick in TICKS:
+        x, y = geometry.svg_position(tick, tick)
+        shapes.append(('text', x, hi_y + 12, str(tick), 9, AXIS_COLOR, False))
+        shapes.append(('text', lo_x - 10, y, str(tick), 9, AXIS_COLOR, False))
+
+    shapes.append(('text', VIEWBOX / 2, 22, TITLE, 16, TEXT_COLOR, True))
+    shapes.append(('text', mid_x, hi_y + 30, 'Assertiveness', 11, TEXT_COLOR, False))
+    shapes.append(('text', lo_x + 20, hi_y + 30, 'ASKS', 10, AXIS_COLOR, True))
+    shapes.append(('text', hi_x - 20, hi_y + 30, 'TELLS', 10, AXIS_COLOR, True))
+    shapes.append(('text', mid_x, lo_y - 10, 'CONTROLS', 10, AXIS_COLOR, True))
+    shapes.append(('text', mid_x, hi_y + 12, 'EMOTES', 10, AXIS_COLOR, True))
+    return tuple(shapes)
+
+
+def marker_shapes(assertiveness_score, responsiveness_score):
+    """Per-request primitives: the marker and its score label."""
+    x, y = geometry.svg_position(assertiveness_score, responsiveness_score)
+    color = geometry.quadrant_color(assertiveness_score, responsiveness_score)
+    label = f'({assertiveness_score:.2f}, {responsiveness_score:.2f})'
+    return (
+        ('circle', x, y, MARKER_RADIUS, color),
+        ('text', x, y - MARKER_RADIUS - 8, label, 10, TEXT_COLOR, False),
+    )
+
+
+# ------------------------------------------------------------------
+# SVG
+# ------------------------------------------------------------------
+
+def _svg_element(shape):
+    kind = shape[0]
+    if kind == 'rect':
+        _, x, y, w, h, fill = shape
+        return f'<rect x="{x:g}" y="{y:g}" width="{w:g}" height="{h:g}" fill="{fill}"/>'
+    if kind == 'line':
+        _, x1, y1, x2, y2, color, width, dashed = shape
+        dash = ' stroke-dasharray="4 3"' if dashed else ''
+        return (f'<line x1="{x1:g}" y1="{y1:g}" x2="{x2:g}" y2="{y2:g}" '
+                f'stroke="{color}" stroke-width="{width}"{dash}/>')
+    if kind == 'circle':
+        _, x, y, radius, color = shape
+        return (f'<circle cx="{x:g}" cy="{y:g}" r="{radius}" fill="{color}" '
+                f'stroke="white" stroke-width="2"/>')
+    _, x, y, text, font_size, color, bold = shape
+    weight = ' font-weight="bold"' if bold else ''
+    return (f'<text x="{x:g}" y="{y:g}" font-size="{font_size}" fill="{color}"{weight} '
+            f'text-anchor="middle" dominant-baseline="middle">{text}</text>')
+
+
+@lru_cache(maxsize=8)
+def _svg_template(size):
+    pixels = size * DPI
+    head = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+            f'viewBox="0 0 {VIEWBOX} {VIEWBOX}" font-family="DejaVu Sans, Arial, sans-serif">'
+            f'<rect width="{VIEWBOX}" height="{VIEWBOX}" fill="white"/>')
+    body = ''.join(_svg_element(shape) for shape in background_shapes())
+    return head + body, '</svg>'
+
+
+def render_svg(assertiveness_score, responsiveness_score, size=8):
+    """Return the chart as SVG bytes."""
+    head, tail = _svg_template(size)
+    marker = ''.join(_svg_element(shape) for shape in marker_shapes(assertiveness_score, responsiveness_score))
+    return (head + marker + tail).encode('utf-8')
+
+
+# ------------------------------------------------------------------
+# PNG (Pillow)
+# ------------------------------------------------------------------
+
+@lru_cache(maxsize=32)
+def _font(pixel_size):
+    from PIL import ImageFont
+    try:
+        return ImageFont.load_default(size=pixel_size)
+    except (TypeError, ImportError, OSError):
+        # Pillow without FreeType only has the fixed-size bitmap font.
+        return ImageFont.load_default()
+
+
+def _draw_shape(draw, shape, scale):
+    kind = shape[0]
+    if kind == 'rect':
+        _, x, y, w, h, fill = shape
+        draw.rectangle([x * scale, y * scale, (x + w) * scale, (y + h) * scale], fill=fill)
+    elif kind == 'line':
+        _, x1, y1, x2, y2, color, width, dashed = shape
+        width = max(1, round(width * scale))
+        if not dashed:
+            draw.line([x1 * scale, y1 * scale, x2 * scale, y2 * scale], fill=color, width=width)
+            return
+        dash, gap = 4.0, 3.0
+        length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        dx, dy = (x2 - x1) / length, (y2 - y1) / length
+        pos = 0.0
+        while pos < length:
+            end = min(pos + dash, length)
+            draw.line([(x1 + dx * pos) * scale, (y1 + dy * pos) * scale,
+                       (x1 + dx * end) * scale, (y1 + dy * end) * scale], fill=color, width=width)
+            pos = end + gap
+    elif kind == 'circle':
+        _, x, y, radius, color = shape
+        outline = radius + 2
+        draw.ellipse([(x - outline) * scale, (y - outline) * scale,
+                      (x + outline) * scale, (y + outline) * scale], fill='white')
+        draw.ellipse([(x - radius) * scale, (y - radius) * scale,
+                      (x + radius) * scale, (y + radius) * scale], fill=color)
+    else:
+        _, x, y, text, font_size, color, bold = shape
+        font = _font(max(8, round(font_size * scale)))
+        draw.text((x * scale, y * scale), text, fill=color, font=font, anchor='mm',
+                  stroke_width=1 if bold else 0, stroke_fill=color)
+
+
+@lru_cache(maxsize=8)
+def _png_template(size):
+    from PIL import Image, ImageDraw
+    pixels = size * DPI
+    image = Image.new('RGB', (pixels, pixels), 'white')
+    draw = ImageDraw.Draw(image)
+    scale = pixels / VIEWBOX
+    for shape in background_shapes():
+        _draw_shape(draw, shape, scale)
+    # A palette image encodes several times faster than RGB. Leave free palette
+    # slots so the per-request marker and label colors can be added exactly.
+    return image.quantize(colors=PALETTE_COLORS)
+
+
+def render_png(assertiveness_score, responsiveness_score, size=8):
+    """Return the chart as PNG bytes."""
+    from PIL import ImageDraw
+    image = _png_template(size).copy()
+    draw = ImageDraw.Draw(image)
+    scale = image.width / VIEWBOX
+    for shape in marker_shapes(assertiveness_score, responsiveness_score):
+        _draw_shape(draw, shape, scale)
+    buf = io.BytesIO()
+    image.save(buf, format='PNG', compress_level=1)
+    return buf.getvalue()
+
+
+RENDERERS = {
+    'png': render_png,
+    'svg': render_svg,
+}
+
+
+def render_chart(assertiveness_score, responsiveness_score, size=8, fmt='png'):
+    """Render the chart in ``fmt`` ('png' or 'svg') and return the bytes."""
+    return RENDERERS[fmt](assertiveness_score, responsiveness_score, size)
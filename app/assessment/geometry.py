@@ -5,7 +5,9 @@ never drift apart again:
   - individual results page SVG (results.html + social_styles_grid.js)
   - team dashboard SVG (team/dashboard.html)
   - presentation CSS grid (team/presentation.html, server + live-poll JS)
-  - matplotlib PDF chart (app/assessment/utils.py)
+  - results/PDF chart (app/assessment/chart.py; the matplotlib fallback in
+    app/assessment/utils.py plots raw scores on the same axes)
+  - team report pack summary grid (app/team/report_pack.py)
 
 Conventions (see CLAUDE.md "Social Styles Framework Reference"):
   - X axis = Assertiveness: left = low (ASKS), right = high (TELLS)
@@ -0,0 +1,93 @@
+"""Compiled, per-worker question banks for take_assessment.
+
+``Assessment.questions`` is a JSON Text column. Parsing it, splitting it by
+category and renaming the label keys used to happen on every GET and POST of
+the assessment page. ``get_question_bank`` does that once per assessment and
+keeps the result in a per-process MemoryCache:
+
+  - each question is a read-only mapping (``types.MappingProxyType``), so
+    templates keep using ``question.id`` / ``question.get('format')`` but
+    nothing can mutate the cached copy;
+  - ``fields`` lists the ``(form field name, response key)`` pairs used to
+    parse a submission, in scoring order;
+  - ``version`` is a short hash of the source JSON, used to key the cached
+    question-block HTML in take.html (see app/fragments.py).
+
+Entries remember the JSON they were compiled from and are recompiled if the
+row's text differs, so an edit made through another worker is picked up on
+the next request. Updates and deletes of an Assessment in this process also
+drop its entry directly (the admin edit/toggle views go through that path).
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+import hashlib
+import json
+
+from sqlalchemy import event
+
+from app.cache import MemoryCache
+from app.models.assessment import Assessment
+
+CATEGORIES = ('assertiveness', 'responsiveness')
+
+QuestionBank = namedtuple('QuestionBank', 'assessment_id version assertiveness responsiveness fields')
+
+_cache = MemoryCache(max_entries=64)
+
+
+def compile_questions(assessment_id, source):
+    """Build a QuestionBank from an assessment's questions JSON."""
+    by_category = {category: [] for category in CATEGORIES}
+    for question in json.loads(source or '[]'):
+        category = question.get('category')
+        if category not in by_category:
+            continue
+        question = dict(question)
+        # Key names the take.html template expects
+        question['left_characteristic'] = question.get('left_label', '')
+        question['right_characteristic'] = question.get('right_label', '')
+        by_category[category].append(MappingProxyType(question))
+
+    fields = tuple(
+        (f'{category}_{question["id"]}', str(question['id']))
+        for category in CATEGORIES
+        for question in by_category[category]
+    )
+    version = hashlib.sha1((source or '').encode('utf-8')).hexdigest()[:12]
+    return QuestionBank(assessment_id, version,
+                        tuple(by_category['assertiveness']),
+                        tuple(by_category['responsiveness']),
+                        fields)
+
+
+def get_question_bank(assessment):
+    """Return the compiled QuestionBank for ``assessment``, compiling on a miss."""
+    cached = _cache.get(assessment.id)
+    if cached is not None and cached[0] == assessment.questions:
+        return cached[1]
+    bank = compile_questions(assessment.id, assessment.questions)
+    _cache.set(assessment.id, (assessment.questions, bank))
+    return bank
+
+
+def parse_responses(bank, form):
+    """Read a submitted assessment form into a ``{question id: answer}`` dict.
+
+    Missing answers are recorded as 0, as the scoring expects.
+    """
+    return {key: int(form.get(field, 0)) for field, key in bank.fields}
+
+
+def invalidate(assessment_id=None):
+    """Drop one compiled bank, or all of them."""
+    if assessment_id is None:
+        _cache.clear()
+    else:
+        _cache.delete(assessment_id)
+
+
+@event.listens_for(Assessment, 'after_update')
+@event.listens_for(Assessment, 'after_delete')
+def _invalidate_on_change(mapper, connection, target):
+    invalidate(target.id)
@@ -0,0 +1,74 @@
+"""Re-scoring of stored results after a change to the scoring rules.
+
+``iter_rescore`` walks every result that has responses in id order (keyset
+pagination keeps memory flat however many exist), scores each chunk with
+``score_batch`` and writes back only the rows whose scores or style
+changed. It is driven by ``flask rescore-results`` and by the
+``rescore_results`` background job (app/jobs.py) the admin pages queue.
+"""
+
+from app import db
+from app.jobs import job_handler
+from app.models.assessment import AssessmentResult
+from app.models.rollup import rebuild_rollups
+
+
+def iter_rescore(chunk_size=1000, dry_run=False):
+    """Re-score results a chunk at a time.
+
+    Yields running ``(scanned, changed, style_changes)`` counts after each
+    chunk. Unless ``dry_run``, each chunk is committed as it goes and the
+    rollups are rebuilt at the end if any style changed.
+    """
+    from app.assessment.scoring import score_batch
+
+    scanned = changed = style_changes = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            AssessmentResult.id, AssessmentResult.responses,
+            AssessmentResult.assertiveness_score, AssessmentResult.responsiveness_score,
+            AssessmentResult.social_style
+        ).filter(
+            AssessmentResult.id > last_id, AssessmentResult.responses.isnot(None)
+        ).order_by(AssessmentResult.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        updates = []
+        for row, (assertiveness, responsiveness, style) in zip(
+                rows, score_batch([row.responses for row in rows])):
+            if (row.assertiveness_score, row.responsiveness_score, row.social_style) != (
+                    assertiveness, responsiveness, style):
+                updates.append({'id': row.id, 'assertiveness_score': assertiveness,
+                                'responsiveness_score': responsiveness, 'social_style': style})
+                style_changes += row.social_style != style
+        changed += len(updates)
+
+        if updates and not dry_run:
+            db.session.execute(db.update(AssessmentResult), updates)
+            db.session.commit()
+        yield scanned, changed, style_changes
+
+    if style_changes and not dry_run:
+        # The bulk UPDATEs bypass the rollup listener
+        rebuild_rollups()
+        db.session.commit()
+
+
+def rescorable_count():
+    """How many results ``iter_rescore`` will visit."""
+    return AssessmentResult.query.filter(AssessmentResult.responses.isnot(None)).count()
+
+
+@job_handler('rescore_results')
+def rescore_job(ctx, dry_run=False, chunk_size=1000):
+    """Re-score every result, reporting progress per chunk."""
+    total = rescorable_count()
+    scanned = changed = style_changes = 0
+    for scanned, changed, style_changes in iter_rescore(chunk_size, dry_run):
+        ctx.progress(scanned, total)
+    action = 'Would update' if dry_run else 'Updated'
+    return f'{action} {changed} of {scanned} results ({style_changes} changed style).'
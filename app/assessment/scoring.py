@@ -0,0 +1,98 @@
+"""Vectorized Social Styles scoring.
+
+Response sets are packed into an (N, 30) float matrix (column ``i`` holds
+question ``i + 1``; unanswered questions are 0, as in the original per-row
+scoring) and scored in one NumPy pass:
+
+  - assertiveness  = sum of questions 1-15 / 15
+  - responsiveness = sum of questions 16-30 / 15
+  - style          = app.assessment.geometry.quadrant, vectorized
+
+Stored responses are already packed in that column order (one byte per
+question, see app.models.assessment.pack_responses), so a chunk of rows
+becomes a matrix with a single ``np.frombuffer``.
+
+AssessmentResult.calculate_scores is a one-row call into ``score_batch``;
+app/assessment/rescore.py uses it to re-score history in chunks. This module
+imports NumPy, so it is only imported where scoring actually happens.
+"""
+
+import json
+
+import numpy as np
+
+from app.assessment import geometry
+
+QUESTION_COUNT = 30
+ASSERTIVENESS = slice(0, 15)
+RESPONSIVENESS = slice(15, 30)
+QUESTIONS_PER_DIMENSION = 15
+QUESTION_KEYS = tuple(str(i) for i in range(1, QUESTION_COUNT + 1))
+
+# Indexed by high_assertiveness + 2 * high_responsiveness
+STYLE_BY_INDEX = np.array([
+    geometry.quadrant(geometry.LO, geometry.LO),   # ANALYTICAL
+    geometry.quadrant(geometry.HI, geometry.LO),   # DRIVER
+    geometry.quadrant(geometry.LO, geometry.HI),   # AMIABLE
+    geometry.quadrant(geometry.HI, geometry.HI),   # EXPRESSIVE
+])
+
+
+def packed_matrix(packed_sets):
+    """(N, 30) uint8 matrix over packed ``AssessmentResult.responses`` values.
+
+    The stored bytes are already in column order, so this is one join and a
+    reshape; no per-answer Python work.
+    """
+    return np.frombuffer(b''.join(packed_sets), dtype=np.uint8).reshape(-1, QUESTION_COUNT)
+
+
+def response_matrix(response_sets):
+    """Pack response sets into an (N, 30) matrix.
+
+    Accepts packed response columns (bytes), response dicts, or legacy JSON
+    strings. Dict keys are question ids ("1".."30"); missing answers leave 0
+    in their column and keys that are not question ids are ignored.
+    """
+    response_sets = list(response_sets)
+    if response_sets and all(isinstance(r, (bytes, memoryview)) and len(r) == QUESTION_COUNT
+                             for r in response_sets):
+        return packed_matrix(response_sets).astype(np.float64)
+    rows = []
+    for responses in response_sets:
+        if isinstance(responses, (bytes, memoryview)):
+            row = list(bytes(responses)[:QUESTION_COUNT])
+            rows.append(row + [0] * (QUESTION_COUNT - len(row)))
+            continue
+        if isinstance(responses, str):
+            responses = json.loads(responses)
+        responses = responses or {}
+        if responses and not isinstance(next(iter(responses)), str):
+            responses = {str(key): value for key, value in responses.items()}
+        rows.append([responses.get(key, 0) for key in QUESTION_KEYS])
+    if not rows:
+        return np.zeros((0, QUESTION_COUNT), dtype=np.float64)
+    return np.array(rows, dtype=np.float64)
+
+
+def score_matrix(matrix, midpoint=geometry.MIDPOINT):
+    """Score an (N, 30) response matrix.
+
+    Returns ``(assertiveness, responsiveness, styles)`` as NumPy arrays.
+    Styles use the same strict ``> midpoint`` rule as geometry.quadrant.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    assertiveness = matrix[:, ASSERTIVENESS].sum(axis=1) / QUESTIONS_PER_DIMENSION
+    responsiveness = matrix[:, RESPONSIVENESS].sum(axis=1) / QUESTIONS_PER_DIMENSION
+    index = (assertiveness > midpoint).astype(np.intp) + 2 * (responsiveness > midpoint)
+    return assertiveness, responsiveness, STYLE_BY_INDEX[index]
+
+
+def score_batch(response_sets):
+    """Score many response sets at once.
+
+    Returns a list of ``(assertiveness, responsiveness, social_style)``
+    tuples of plain Python values, one per input, in order.
+    """
+    assertiveness, responsiveness, styles = score_matrix(response_matrix(response_sets))
+    return list(zip(assertiveness.tolist(), responsiveness.tolist(), styles.tolist()))
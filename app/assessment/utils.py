@@ -1,15 +1,27 @@
 import io
 import base64
-import matplotlib.pyplot as plt
-import numpy as np
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+import logging
 from datetime import datetime
+from types import SimpleNamespace
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db, chart_cache, report_cache, prerenderer, render_pool
+from app.assessment.chart import render_chart
+from app.models.assessment import AssessmentResult
 
-def generate_social_style_chart(assertiveness_score, responsiveness_score):
+logger = logging.getLogger(__name__)
+
+CHART_MIME_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+def chart_cache_key(assertiveness_score, responsiveness_score, size=8, fmt='png', renderer='native'):
+    """Cache key for a chart: scores rounded to the 2 decimals the label shows."""
+    return f'chart:v2:{renderer}:{assertiveness_score:.2f}:{responsiveness_score:.2f}:{size}:{fmt}'
+
+def generate_social_style_chart(assertiveness_score, responsiveness_score, size=8, fmt='png'):
     """Generate a chart showing the user's position in the Social Styles grid.
 
     The chart orientation matches the web SVG grids:
@@ -18,15 +30,65 @@ def generate_social_style_chart(assertiveness_score, responsiveness_score):
       - Top-left: ANALYTICAL, Top-right: DRIVER
       - Bottom-left: AMIABLE, Bottom-right: EXPRESSIVE
 
+    Rendering uses the matplotlib-free renderer in app/assessment/chart.py
+    unless ``CHART_RENDERER`` is set to 'matplotlib'; matplotlib is also the
+    fallback if the native renderer is unavailable (e.g. Pillow missing).
+
+    Charts are cached in ``chart_cache`` keyed by the scores rounded to two
+    decimals (the precision of the label), the size, the format and the
+    renderer, so the same scores are only rendered once per worker (or once
+    per host when the disk tier is enabled).
+
     Args:
         assertiveness_score (float): The user's assertiveness score (1-4)
         responsiveness_score (float): The user's responsiveness score (1-4)
+        size (int): Chart width and height in inches (100 px per inch)
+        fmt (str): Image format, 'png' or 'svg'
 
     Returns:
-        str: Base64-encoded image of the chart
+        str: Base64-encoded image of the chart, as a data URI
+    """
+    if fmt not in CHART_MIME_TYPES:
+        raise ValueError(f'Unsupported chart format: {fmt}')
+
+    renderer = current_app.config.get('CHART_RENDERER', 'native') if has_app_context() else 'native'
+    assertiveness_score = round(assertiveness_score, 2)
+    responsiveness_score = round(responsiveness_score, 2)
+    cache_key = chart_cache_key(assertiveness_score, responsiveness_score, size, fmt, renderer)
+    cached = chart_cache.get(cache_key)
+    if cached is not None:
+        return cached.decode('ascii')
+
+    image_bytes = None
+    if renderer == 'native':
+        try:
+            image_bytes = render_chart(assertiveness_score, responsiveness_score, size, fmt)
+        except ImportError as e:
+            logger.warning(f"Native chart renderer unavailable, falling back to matplotlib: {e}")
+    if image_bytes is None:
+        # matplotlib is slow and keeps global state: render in the pool
+        image_bytes = render_pool.run(render_chart_matplotlib,
+                                      assertiveness_score, responsiveness_score, size, fmt)
+
+    # Convert to base64 for embedding in HTML
+    img_str = base64.b64encode(image_bytes).decode('utf-8')
+    data_uri = f'data:{CHART_MIME_TYPES[fmt]};base64,{img_str}'
+
+    chart_cache.set(cache_key, data_uri.encode('ascii'))
+    return data_uri
+
+def render_chart_matplotlib(assertiveness_score, responsiveness_score, size=8, fmt='png'):
+    """Render the chart with matplotlib and return the image bytes.
+
+    Fallback for generate_social_style_chart. pyplot is imported here rather
+    than at module level so web workers only load it if they actually use it.
     """
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    import matplotlib.pyplot as plt
+
     # Create figure and axis
-    fig, ax = plt.figure(figsize=(8, 8)), plt.subplot(111)
+    fig, ax = plt.figure(figsize=(size, size)), plt.subplot(111)
 
     # Set up the plot (1-4 scale to match scoring system)
     ax.set_xlim(1, 4)
@@ -74,14 +136,10 @@ def generate_social_style_chart(assertiveness_score, responsiveness_score):
 
     # Save the plot to a bytes buffer
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
+    plt.savefig(buf, format=fmt, dpi=100, bbox_inches='tight')
     plt.close(fig)
-    buf.seek(0)
 
-    # Convert to base64 for embedding in HTML
-    img_str = base64.b64encode(buf.getvalue()).decode('utf-8')
-
-    return f'data:image/png;base64,{img_str}'
+    return buf.getvalue()
 
 def get_social_style_description(social_style):
     """Get a description of the social style.
@@ -209,6 +267,13 @@ def generate_pdf_report(result, chart_img, user):
     Returns:
         io.BytesIO: A buffer containing the PDF
     """
+    # reportlab is only imported when a report is actually built, keeping it
+    # out of worker and CLI startup.
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     styles = getSampleStyleSheet()
@@ -398,4 +463,92 @@ def generate_pdf_report(result, chart_img, user):
     # Build the PDF
     doc.build(content)
     
-    return buffer 
\ No newline at end of file
+    return buffer 
+
+# Bump when generate_pdf_report's layout or copy changes: cached PDFs of the
+# previous version stop being served and age out of report_cache.
+REPORT_TEMPLATE_VERSION = 1
+
+def report_cache_key(result_id):
+    """Cache key for a result's PDF at the current template version and chart renderer."""
+    renderer = current_app.config.get('CHART_RENDERER', 'native') if has_app_context() else 'native'
+    return f'report:v{REPORT_TEMPLATE_VERSION}:{renderer}:{result_id}'
+
+def report_etag(result_id):
+    """ETag for a result's PDF; it changes only with the cache key."""
+    return report_cache_key(result_id).replace(':', '-')
+
+def get_pdf_report(result, user):
+    """Return the PDF report for ``result`` as bytes, building it at most once.
+
+    A result never changes once saved, so the finished PDF is kept in
+    ``report_cache`` (memory, plus the disk and S3 tiers when configured)
+    until the result is deleted or REPORT_TEMPLATE_VERSION is bumped.
+    """
+    key = report_cache_key(result.id)
+    pdf = report_cache.get(key)
+    if pdf is None:
+        pdf = render_pool.run(build_pdf_report, *pdf_report_args(result, user))
+        report_cache.set(key, pdf)
+    return pdf
+
+def pdf_report_args(result, user):
+    """Arguments for build_pdf_report, safe to send to the render pool.
+
+    Only plain copies of the fields generate_pdf_report reads cross the
+    process boundary, plus the (cached) chart.
+    """
+    chart_img = generate_social_style_chart(result.assertiveness_score, result.responsiveness_score)
+    result_fields = SimpleNamespace(
+        id=result.id, social_style=result.social_style, created_at=result.created_at,
+        assertiveness_score=result.assertiveness_score,
+        responsiveness_score=result.responsiveness_score)
+    user_fields = SimpleNamespace(name=user.name, email=user.email)
+    return result_fields, chart_img, user_fields
+
+def build_pdf_report(result, chart_img, user):
+    """generate_pdf_report as bytes; the render pool's entry point."""
+    return generate_pdf_report(result, chart_img, user).getvalue()
+
+def discard_reports(result_ids):
+    """Drop the cached PDFs of deleted results (needed after bulk deletes)."""
+    for result_id in result_ids:
+        report_cache.delete(report_cache_key(result_id))
+
+@event.listens_for(AssessmentResult, 'after_delete')
+def _discard_deleted_report(mapper, connection, target):
+    discard_reports([target.id])
+
+# Pre-rendering (app/prerender.py): when a new result is committed its chart
+# is rendered in the background, then its PDF, so both are usually cached by
+# the time the results page or the download is requested.
+
+def _prerender_chart(result_id, assertiveness_score, responsiveness_score):
+    generate_social_style_chart(assertiveness_score, responsiveness_score)
+    prerenderer.submit(('report', result_id), _prerender_report, result_id)
+
+def _prerender_report(result_id):
+    result = db.session.get(AssessmentResult, result_id)
+    if result is not None:
+        get_pdf_report(result, result.user)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_new_results(session, flush_context):
+    if not prerenderer.enabled:
+        return
+    new = [(obj.id, obj.assertiveness_score, obj.responsiveness_score) for obj in session.new
+           if isinstance(obj, AssessmentResult) and obj.assertiveness_score is not None
+           and obj.responsiveness_score is not None]
+    if new:
+        session.info.setdefault('prerender_results', []).extend(new)
+
+@event.listens_for(Session, 'after_commit')
+def _prerender_new_results(session):
+    # Only once committed: the worker reads the result back in its own session
+    for result_id, assertiveness_score, responsiveness_score in session.info.pop('prerender_results', ()):
+        prerenderer.submit(('chart', result_id), _prerender_chart,
+                           result_id, assertiveness_score, responsiveness_score)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_new_results(session, previous_transaction):
+    session.info.pop('prerender_results', None)
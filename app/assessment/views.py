@@ -1,21 +1,21 @@
 from flask import render_template, redirect, url_for, flash, request, jsonify, send_file, session, current_app
 from flask_login import login_required, current_user, login_user
 from . import assessment
-from .. import db
+from .. import db, prerenderer
 from ..models.assessment import Assessment, AssessmentResult
 from ..models.user import User
 from .forms import AssessmentForm
+from .question_bank import get_question_bank, parse_responses
 from ..auth.forms import RegistrationForm
-from .utils import generate_pdf_report, generate_social_style_chart
+from .utils import generate_social_style_chart, get_pdf_report, report_etag
+from ..websockets.events import notify_teams_of_result
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
 import json
 import io
-import matplotlib
 import uuid
 import os
 from datetime import datetime, timedelta
-matplotlib.use('Agg')  # Use non-interactive backend
 
 @assessment.route('/dashboard')
 @login_required
@@ -30,42 +30,16 @@ def dashboard():
 def take_assessment(assessment_id):
     """Take the Social Styles assessment. Available for both logged-in and guest users."""
     assessment_obj = Assessment.query.get_or_404(assessment_id)
-    questions = assessment_obj.get_questions()
+    bank = get_question_bank(assessment_obj)
     
     # Check if this is a guest user
     is_guest = request.args.get('guest') == 'True' or request.args.get('guest') == 'true'
     
-    # Separate questions by category
-    assertiveness_questions = []
-    responsiveness_questions = []
-    
-    for question in questions:
-        # Rename keys to match template expectations
-        question['left_characteristic'] = question.get('left_label', '')
-        question['right_characteristic'] = question.get('right_label', '')
-        
-        if question.get('category') == 'assertiveness':
-            assertiveness_questions.append(question)
-        elif question.get('category') == 'responsiveness':
-            responsiveness_questions.append(question)
-    
     form = AssessmentForm()
     
     if form.validate_on_submit():
         # Process form data
-        responses = {}
-        
-        # Process assertiveness questions
-        for question in assertiveness_questions:
-            question_id = str(question['id'])
-            response_value = int(request.form.get(f'assertiveness_{question_id}', 0))
-            responses[question_id] = response_value
-        
-        # Process responsiveness questions
-        for question in responsiveness_questions:
-            question_id = str(question['id'])
-            response_value = int(request.form.get(f'responsiveness_{question_id}', 0))
-            responses[question_id] = response_value
+        responses = parse_responses(bank, request.form)
         
         # If user is logged in, save normally
         if current_user.is_authenticated:
@@ -78,6 +52,7 @@ def take_assessment(assessment_id):
             
             db.session.add(result)
             db.session.commit()
+            notify_teams_of_result(current_user, result)
             
             flash('Assessment completed successfully!', 'success')
             return redirect(url_for('assessment.results', result_id=result.id))
@@ -100,8 +75,9 @@ def take_assessment(assessment_id):
     
     return render_template('assessment/take.html', 
                           assessment=assessment_obj, 
-                          assertiveness_questions=assertiveness_questions,
-                          responsiveness_questions=responsiveness_questions,
+                          assertiveness_questions=bank.assertiveness,
+                          responsiveness_questions=bank.responsiveness,
+                          question_version=bank.version,
                           form=form,
                           is_guest=is_guest)
 
@@ -149,6 +125,7 @@ def post_assessment():
                     team.add_member(existing_user)
             
             db.session.commit()
+            notify_teams_of_result(existing_user, result)
             
             # Log in the user
             login_user(existing_user)
@@ -192,6 +169,7 @@ def post_assessment():
                     team.add_member(new_user)
             
             db.session.commit()
+            notify_teams_of_result(new_user, result)
             
             # Log in the new user
             login_user(new_user)
@@ -259,6 +237,7 @@ def continue_without_saving():
                 team.add_member(user)
             
             db.session.commit()
+            notify_teams_of_result(user, result)
             
             # Success message
             flash('Thank you for completing the assessment!', 'success')
@@ -285,7 +264,9 @@ def results(result_id):
         flash('You do not have permission to view these results.', 'danger')
         return redirect(url_for('assessment.dashboard'))
     
-    # Generate chart
+    # Normally pre-rendered on commit; if that render is still running, wait
+    # for it rather than rendering the same chart twice
+    prerenderer.wait(('chart', result.id))
     chart_img = generate_social_style_chart(result.assertiveness_score, result.responsiveness_score)
     
     # Check if user needs to set password (from QR code quick registration)
@@ -297,6 +278,9 @@ def results(result_id):
                           result=result,
                           chart_img=chart_img)
 
+# Browser cache lifetime of a downloaded report, in seconds
+REPORT_MAX_AGE = 7 * 24 * 3600
+
 @assessment.route('/download_report/<int:result_id>')
 @login_required
 def download_report(result_id):
@@ -308,20 +292,22 @@ def download_report(result_id):
         flash('You do not have permission to download this report.', 'danger')
         return redirect(url_for('assessment.dashboard'))
     
-    # Generate chart
-    chart_img = generate_social_style_chart(result.assertiveness_score, result.responsiveness_score)
-    
-    # Generate PDF report
-    pdf_buffer = generate_pdf_report(result, chart_img, current_user)
-    
-    # Send the PDF as a downloadable file
-    pdf_buffer.seek(0)
-    return send_file(
-        pdf_buffer,
-        as_attachment=True,
-        download_name=f"social_styles_report_{result.id}.pdf",
-        mimetype='application/pdf'
-    )
+    # Results never change, so the browser may keep the PDF; a revalidation
+    # (e.g. a forced reload) is answered before the PDF is even loaded
+    etag = report_etag(result.id)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        prerenderer.wait(('report', result.id))
+        response = send_file(
+            io.BytesIO(get_pdf_report(result, current_user)),
+            as_attachment=True,
+            download_name=f"social_styles_report_{result.id}.pdf",
+            mimetype='application/pdf'
+        )
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={REPORT_MAX_AGE}, immutable'
+    return response
 
 @assessment.route('/list')
 @login_required
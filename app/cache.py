@@ -0,0 +1,374 @@
+"""Small bounded caches for rendered artifacts (charts, reports).
+
+Three tiers, usable on their own or stacked with TieredCache:
+  - MemoryCache: per-process LRU bounded by entry count.
+  - DiskCache: a directory of content-addressed files bounded by total bytes,
+    shared by every gunicorn worker on the host. Writes go through a temp file
+    and ``os.replace`` so concurrent workers never see a partial entry.
+  - S3Cache: objects under a bucket prefix, shared by every host. Any object
+    with the same get/set/delete/clear methods can take its place.
+
+Values are bytes. Keys are strings; the disk and S3 tiers store each entry
+under the SHA-1 of its key.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from app.lazy import lazy_import
+
+boto3 = lazy_import('boto3')
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache bounded by entry count."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """Directory-backed cache bounded by total size in bytes.
+
+    Eviction removes the least recently used files (by mtime, which is
+    refreshed on every hit) until the directory fits in ``max_bytes``. Writes
+    only add to a running size estimate; the directory is listed when the
+    estimate goes over budget, and every ``sweep_every`` writes to pick up
+    entries written by other workers.
+    """
+
+    SUFFIX = '.bin'
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, sweep_every=50):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sweep_every = sweep_every
+        self._bytes = None
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + self.SUFFIX)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._writes += 1
+            if self._bytes is None or self._writes % self.sweep_every == 0:
+                sweep = True
+            else:
+                # Overwrites are counted twice, which only makes the next
+                # sweep come sooner
+                self._bytes += len(value)
+                sweep = self._bytes > self.max_bytes
+        if sweep:
+            self._evict()
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIX):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._bytes = None
+
+    def size(self):
+        """Total bytes currently stored."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._bytes = total
+
+
+class S3Cache:
+    """Object-store cache under ``prefix`` in an S3 bucket, bounded by bytes.
+
+    Every ``sweep_every`` writes the prefix is listed and the oldest-written
+    objects are deleted until the total fits in ``max_bytes`` (S3 has no
+    access time, so this tier evicts first-in first-out). Errors from S3 are
+    treated as misses; the cache is never the source of truth.
+    """
+
+    def __init__(self, bucket, prefix='', max_bytes=1024 * 1024 * 1024, sweep_every=50,
+                 client=None, region=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.sweep_every = sweep_every
+        self.region = region
+        self._client = client
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = boto3.client('s3', region_name=self.region)
+        return self._client
+
+    def _key(self, key):
+        return self.prefix + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+            return response['Body'].read()
+        except Exception:
+            return None
+
+    def set(self, key, value):
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=value)
+        except Exception:
+            return
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % self.sweep_every == 0
+        if sweep:
+            self._evict()
+
+    def delete(self, key):
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception:
+            pass
+
+    def clear(self):
+        self._delete([key for key, _, _ in self._entries()])
+
+    def size(self):
+        """Total bytes currently stored."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        entries = []
+        try:
+            pages = self.client.get_paginator('list_objects_v2').paginate(
+                Bucket=self.bucket, Prefix=self.prefix)
+            for page in pages:
+                entries.extend((item['Key'], item['Size'], item['LastModified'])
+                               for item in page.get('Contents', []))
+        except Exception:
+            return []
+        return entries
+
+    def _delete(self, keys):
+        # DeleteObjects takes at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            try:
+                self.client.delete_objects(Bucket=self.bucket, Delete={
+                    'Objects': [{'Key': key} for key in keys[start:start + 1000]],
+                    'Quiet': True,
+                })
+            except Exception:
+                pass
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        doomed = []
+        for key, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            doomed.append(key)
+            total -= size
+        self._delete(doomed)
+
+
+class TieredCache:
+    """Memory LRU in front of optional shared disk and object-store tiers.
+
+    Configured from the app config with ``init_app``, using ``<PREFIX>_SIZE``
+    (memory entries), ``<PREFIX>_DIR`` (disk directory, disabled when unset),
+    ``<PREFIX>_DISK_BYTES`` (disk budget), ``<PREFIX>_S3_BUCKET`` (object
+    store, disabled when unset), ``<PREFIX>_S3_PREFIX`` and
+    ``<PREFIX>_S3_BYTES``. Hits in a lower tier are copied into the tiers
+    above it.
+    """
+
+    def __init__(self, config_prefix, max_entries=256, directory=None, max_bytes=50 * 1024 * 1024,
+                 store=None):
+        self.config_prefix = config_prefix
+        self._stats_lock = threading.Lock()
+        self.configure(max_entries, directory, max_bytes, store)
+
+    def init_app(self, app):
+        prefix = self.config_prefix
+        bucket = app.config.get(f'{prefix}_S3_BUCKET')
+        store = S3Cache(
+            bucket,
+            prefix=app.config.get(f'{prefix}_S3_PREFIX', ''),
+            max_bytes=app.config.get(f'{prefix}_S3_BYTES', 1024 * 1024 * 1024),
+            region=app.config.get('AWS_REGION')
+        ) if bucket else None
+        self.configure(
+            max_entries=app.config.get(f'{prefix}_SIZE', 256),
+            directory=app.config.get(f'{prefix}_DIR'),
+            max_bytes=app.config.get(f'{prefix}_DISK_BYTES', 50 * 1024 * 1024),
+            store=store
+        )
+
+    def configure(self, max_entries=256, directory=None, max_bytes=50 * 1024 * 1024, store=None):
+        self.memory = MemoryCache(max_entries)
+        self.disk = DiskCache(directory, max_bytes) if directory else None
+        self.store = store
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.store_hits = 0
+            self.misses = 0
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._count('disk_hits')
+                self.memory.set(key, value)
+                return value
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self._count('store_hits')
+                self.memory.set(key, value)
+                if self.disk is not None:
+                    self.disk.set(key, value)
+                return value
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        """Hit/miss counters and current sizes, e.g. for a health endpoint."""
+        with self._stats_lock:
+            stats = {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+            }
+        stats['memory_entries'] = len(self.memory)
+        stats['disk_bytes'] = self.disk.size() if self.disk is not None else 0
+        return stats
@@ -1,9 +1,11 @@
 import click
 from flask.cli import with_appcontext
 from app.models.user import User
-from app.models.assessment import Assessment, AssessmentResult
+from app.models.assessment import Assessment, AssessmentResult, refresh_latest_results
+from app.models.rollup import discount_results, rebuild_rollups, seed_active_users
+from app.assessment.utils import discard_reports
+from app.assessment.rescore import iter_rescore
 from app import db
-from initialize_assessment import initialize_assessment
 import random
 from datetime import datetime, timedelta
 import uuid
@@ -13,6 +15,9 @@ import re
 @with_appcontext
 def init_assessment():
     """Initialize the assessment with the correct questions."""
+    # Imported here: initialize_assessment lives at the repo root, and the
+    # commands module is now loaded by create_app in every process
+    from initialize_assessment import initialize_assessment
     initialize_assessment()
 
 
@@ -106,8 +111,16 @@ def delete_test_data(confirm):
     # Get IDs of all test users
     test_user_ids = [user.id for user in test_users]
     
-    # Delete all assessment results for these users
-    result_count = AssessmentResult.query.filter(AssessmentResult.user_id.in_(test_user_ids)).delete(synchronize_session=False)
+    # Clear the latest-result pointers before bulk-deleting the results
+    User.query.filter(User.id.in_(test_user_ids)).update(
+        {User.latest_result_id: None}, synchronize_session=False)
+    
+    # Delete all assessment results for these users (bulk, so take them out
+    # of the daily rollups first)
+    results = AssessmentResult.query.filter(AssessmentResult.user_id.in_(test_user_ids))
+    discount_results(results)
+    discard_reports(result_id for result_id, in results.with_entities(AssessmentResult.id))
+    result_count = results.delete(synchronize_session=False)
     
     # Delete the test users
     for user in test_users:
@@ -116,9 +129,100 @@ def delete_test_data(confirm):
     db.session.commit()
     click.echo(f'Successfully deleted {user_count} test users and {result_count} assessment results.')
 
+@click.command('backfill-latest-results')
+@with_appcontext
+def backfill_latest_results():
+    """Recompute every user's latest_result_id from their results."""
+    updated = refresh_latest_results(db.session.connection())
+    db.session.commit()
+    with_result = User.query.filter(User.latest_result_id.isnot(None)).count()
+    click.echo(f'Refreshed {updated} users; {with_result} have a latest result.')
+
+@click.command('rescore-results')
+@click.option('--chunk-size', default=1000, help='Rows scored and updated per batch')
+@click.option('--dry-run', is_flag=True, help='Report changes without writing them')
+@with_appcontext
+def rescore_results(chunk_size, dry_run):
+    """Re-score every stored result from its responses."""
+    scanned = changed = style_changes = 0
+    for scanned, changed, style_changes in iter_rescore(chunk_size, dry_run):
+        click.echo(f'Scored {scanned} results, {changed} changed so far...')
+    
+    action = 'Would update' if dry_run else 'Updated'
+    click.echo(f'{action} {changed} of {scanned} results ({style_changes} changed style).')
+
+@click.command('rollup')
+@click.option('--days', type=int, default=None, help='Only rebuild the last N days (default: all history)')
+@with_appcontext
+def rollup(days):
+    """Rebuild the daily rollup tables behind the admin analytics pages."""
+    since = datetime.utcnow().date() - timedelta(days=days) if days is not None else None
+    signup_rows, result_rows = rebuild_rollups(since)
+    seeded = seed_active_users()
+    db.session.commit()
+    
+    scope = f'since {since.isoformat()}' if since else 'for all history'
+    click.echo(f'Rebuilt {signup_rows} signup days and {result_rows} result rows {scope}.')
+    if seeded:
+        click.echo(f'Seeded {seeded} days of active users from last logins.')
+
+@click.command('export-results')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'parquet']), default='csv', help='Output format')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='File to write (default: stdout)')
+@click.option('--assessment', type=int, default=None, help='Only results of this assessment id')
+@click.option('--team', type=int, default=None, help='Only results of members of this team id')
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']), default=None, help='First day to include (YYYY-MM-DD)')
+@click.option('--until', type=click.DateTime(['%Y-%m-%d']), default=None, help='Last day to include (YYYY-MM-DD)')
+@click.option('--chunk-size', default=1000, help='Rows fetched per server-side cursor batch')
+@with_appcontext
+def export_results(fmt, output, assessment, team, since, until, chunk_size):
+    """Export assessment results with user and team details."""
+    from app.admin.export import ExportUnavailable, export_chunks, iter_result_chunks, results_query
+    
+    query = results_query(assessment_id=assessment, team_id=team,
+                          since=since.date() if since else None,
+                          until=until.date() if until else None)
+    try:
+        body = export_chunks(fmt, iter_result_chunks(query, chunk_size))
+    except ExportUnavailable as exc:
+        raise click.ClickException(str(exc))
+    
+    if output is None:
+        stream = click.get_binary_stream('stdout')
+        for data in body:
+            stream.write(data)
+        stream.flush()
+        return
+    with open(output, 'wb') as f:
+        for data in body:
+            f.write(data)
+    click.echo(f'Wrote {output}', err=True)
+
+@click.command('worker')
+@click.option('--once', is_flag=True, help='Run the jobs already queued, then exit')
+@with_appcontext
+def worker(once):
+    """Run queued background jobs (report packs, exports, re-scoring)."""
+    from app import job_queue
+    
+    if once:
+        job_queue.run_pending()
+        return
+    click.echo(f'Worker {job_queue.worker_name} waiting for jobs; Ctrl+C to stop')
+    try:
+        job_queue.serve()
+    except KeyboardInterrupt:
+        click.echo('Stopped')
+
 def register_commands(app):
     """Register custom commands with the Flask application."""
     app.cli.add_command(make_admin) 
     app.cli.add_command(init_assessment)
     app.cli.add_command(create_test_data)
-    app.cli.add_command(delete_test_data)
\ No newline at end of file
+    app.cli.add_command(delete_test_data)
+    app.cli.add_command(backfill_latest_results)
+    app.cli.add_command(rescore_results)
+    app.cli.add_command(rollup)
+    app.cli.add_command(export_results)
+    app.cli.add_command(worker)
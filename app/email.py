@@ -1,18 +1,12 @@
 from flask import render_template, current_app
-from threading import Thread
-from . import mail
-import boto3
-from botocore.exceptions import ClientError
+from . import mailer
+from .mail_queue import MailMessage
 import logging
-import os
 import sys
 import dotenv
 
 dotenv.load_dotenv()
 
-
-
-
 logger = logging.getLogger(__name__)
 # Configure logging to print to console
 handler = logging.StreamHandler(sys.stdout)
@@ -24,66 +18,49 @@ logger.setLevel(logging.INFO)
 
 
 def send_email(to, subject, template, **kwargs):
-    """Send an email."""
-     # Get configuration from environment variables
-    aws_region = os.environ.get('AWS_REGION')
-    aws_access_key_id = os.environ.get('AWS_ACCESS_KEY_ID')
-    aws_secret_access_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
-    sender_email = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@teamsocialstyles.com')    
-    
-    # Ensure we have a sender email
-    if not sender_email:
-        sender_email = 'noreply@teamsocialstyles.com'
-        logger.warning("MAIL_DEFAULT_SENDER not set, using default: noreply@teamsocialstyles.com")
+    """Render an email and queue it for background delivery.
+
+    Only the template rendering happens in the request; the message is
+    handed to the mail queue (app/mail_queue.py), which sends it through the
+    configured transport. Returns False if the queue was full.
+    """
+    sender_email = current_app.config.get('MAIL_DEFAULT_SENDER') or mailer.default_sender
     
     # Render the email templates
     text_body = render_template(f'{template}.txt', **kwargs)
     html_body = render_template(f'{template}.html', **kwargs)
-   
-
-    logger.info("Attempting to send email using AWS SES")
-    # Send email using AWS SES
-    try:
-        
-        client = boto3.client(
-            'ses',
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        
-        # Try to send the email
-        logger.info(f"Sending email via SES to {to}")
-        response = client.send_email(
-            Destination={
-                'ToAddresses': [to],
-            },
-            Message={
-                'Body': {
-                    'Html': {
-                        'Charset': 'UTF-8',
-                        'Data': html_body,
-                    },
-                    'Text': {
-                        'Charset': 'UTF-8',
-                        'Data': text_body,
-                    },
-                },
-                'Subject': {
-                    'Charset': 'UTF-8',
-                    'Data': subject,
-                },
-            },
-            Source=sender_email,
-        )
-        logger.info(f"Email sent via SES! Message ID: {response['MessageId']}")
-        return True
-    except ClientError as e:
-        logger.error(f"Error sending email via SES: {e.response['Error']['Message']}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error sending email via SES: {str(e)}")
-        return False
+    
+    logger.info(f"Queueing email to {to}")
+    return mailer.enqueue(MailMessage(
+        to=to,
+        subject=subject,
+        text=text_body,
+        html=html_body,
+        sender=sender_email
+    ))
 
 
+def send_bulk_email(recipients, subject, template, **kwargs):
+    """Queue the same email for many recipients.
 
+    The templates are rendered once and the messages handed to the mail
+    queue in one go, so a large invite list costs one render, not one per
+    address. When the queue is full each message waits up to
+    MAIL_ENQUEUE_TIMEOUT seconds for room, so call it from a background job
+    (see app/team/invites.py), not a request. Messages that still do not fit
+    are dropped and logged. Returns the number of messages queued.
+    """
+    sender_email = current_app.config.get('MAIL_DEFAULT_SENDER') or mailer.default_sender
+    text_body = render_template(f'{template}.txt', **kwargs)
+    html_body = render_template(f'{template}.html', **kwargs)
+    
+    logger.info(f"Queueing {len(recipients)} emails for {template}")
+    queued = 0
+    for to in recipients:
+        message = MailMessage(to=to, subject=subject, text=text_body, html=html_body, sender=sender_email)
+        if mailer.enqueue(message, timeout=mailer.enqueue_timeout):
+            queued += 1
+    if queued < len(recipients):
+        logger.error(f"Mail queue full: dropped {len(recipients) - queued} of {len(recipients)} "
+                     f"emails for {template}")
+    return queued
@@ -0,0 +1,82 @@
+"""Jinja fragment caching.
+
+Adds a ``{% cache %}`` tag for template blocks that render identically for
+every visitor (the 30-question assessment form, style descriptions, grid
+backgrounds)::
+
+    {% cache 'assessment-questions', assessment.id, question_version %}
+        ... expensive, user-independent markup ...
+    {% endcache %}
+
+The key is built from all of the tag's arguments, so include whatever the
+block depends on (an id plus a content version is usually enough). The
+template's name and a hash of its source are added for you, so a deploy that
+changes the template does not serve markup cached by the old one. Keep
+per-user parts -- CSRF tokens, names, flags -- outside the block. Rendered
+HTML is stored UTF-8 encoded in the app's ``fragment_cache`` (a TieredCache
+configured with ``FRAGMENT_CACHE_*``); a ``FRAGMENT_CACHE_SIZE`` of 0 with
+no directory turns caching off.
+"""
+
+import hashlib
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+def fragment_key(template, parts):
+    """Cache key for a ``{% cache %}`` block's arguments.
+
+    ``template`` identifies the template version, ``<name>@<source hash>``.
+    """
+    return 'fragment:' + template + ':' + ':'.join(str(part) for part in parts)
+
+
+class FragmentCacheExtension(Extension):
+    """Provides ``{% cache key, ... %}...{% endcache %}``.
+
+    The backing cache is ``environment.fragment_cache``; when it is None the
+    block is simply rendered.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+        self._source_hashes = {}
+
+    def preprocess(self, source, name, filename=None):
+        # Runs just before the template is parsed, so parse() can bake the
+        # hash of the source being compiled into the block's key
+        self._source_hashes[name] = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+        return source
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        template = '{}@{}'.format(parser.name or '', self._source_hashes.get(parser.name, ''))
+        call = self.call_method('_render_cached', [nodes.Const(template), nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, template, parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = fragment_key(template, parts)
+        cached = cache.get(key)
+        if cached is not None:
+            return Markup(cached.decode('utf-8'))
+        rendered = caller()
+        cache.set(key, str(rendered).encode('utf-8'))
+        return Markup(rendered)
+
+
+def init_fragment_cache(app, cache):
+    """Register the ``{% cache %}`` tag on ``app`` backed by ``cache``."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = cache
@@ -0,0 +1,356 @@
+"""Persistent background jobs for work too slow for a request.
+
+Team report packs, full result exports and re-scoring can take longer than
+gunicorn's 30 second worker timeout. Views queue them instead:
+``job_queue.enqueue(kind, user, **params)`` inserts a ``jobs`` row
+(app/models/job.py) and returns at once; the browser then polls
+``/jobs/<id>.json`` and downloads the artifact once it is ready.
+
+Workers claim queued rows with a conditional UPDATE, so any number of them
+can share the table:
+  - in-process: with JOBS_IN_PROCESS on, each web process runs JOBS_WORKERS
+    threads (green threads under the eventlet worker), started on its first
+    request, so jobs left behind by a recycled worker are still picked up.
+    Convenient in development, but the handlers then share the eventlet hub
+    with that process's requests
+  - standalone: ``flask worker`` runs the same loop in its own process. This
+    is the production default (JOBS_IN_PROCESS is off in ProductionConfig;
+    docker-compose and the systemd deploy run a worker next to the web)
+
+Handlers are registered per kind with ``@job_handler('kind')`` next to the
+code they drive (modules create_app imports, so web processes and workers
+know the same kinds), and called as ``handler(ctx, **params)`` in a fresh
+app context. ``ctx.progress(done, total)`` records progress and doubles as the
+job's heartbeat; ``ctx.artifact(filename, mimetype)`` opens the file the
+download is written to. The return value becomes the job's message.
+
+Artifacts live under JOBS_DIR and are deleted JOBS_ARTIFACT_TTL seconds
+after the job finished. A running job whose heartbeat is older than
+JOBS_STALE_AFTER seconds (its worker died) is queued again, for at most
+JOBS_MAX_ATTEMPTS runs in all, and then failed; its partial artifact, which
+is recorded as soon as the file is opened, is deleted either way.
+
+Every write a run makes to its job is conditional on the job still being
+RUNNING under that run's attempt number. A run that was presumed dead and
+superseded (it was only slow) therefore cannot overwrite the newer run's
+row: its next progress call raises JobSuperseded, and if it finishes anyway
+its result and artifact are thrown away.
+
+Job state is written on its own connection, not the handler's session, so
+progress can be recorded while a handler is part-way through a query.
+"""
+
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(ctx, **params)
+_handlers = {}
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler for jobs of ``kind``."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+class JobSuperseded(Exception):
+    """This run's job was requeued (or failed) by a sweep; stop working on it."""
+
+
+class JobContext:
+    """What a running handler may report back about its job."""
+
+    def __init__(self, queue, job_id, attempt):
+        self.queue = queue
+        self.job_id = job_id
+        self.attempt = attempt
+        self.artifact_path = None
+        self.artifact_name = None
+        self.artifact_mimetype = None
+        self._last_progress = 0.0
+
+    def progress(self, done, total=None):
+        """Record ``done`` of ``total`` steps, at most every JOBS_PROGRESS_INTERVAL."""
+        now = time.monotonic()
+        if done != total and now - self._last_progress < self.queue.progress_interval:
+            return
+        self._last_progress = now
+        self.update(progress_done=done, progress_total=total, heartbeat_at=datetime.utcnow())
+
+    def update(self, **values):
+        """Write ``values`` to the job unless another run has taken it over."""
+        if not self.queue._update(self.job_id, self.attempt, **values):
+            raise JobSuperseded(f'Job {self.job_id} attempt {self.attempt} was superseded')
+
+    @contextmanager
+    def artifact(self, filename, mimetype):
+        """Open the job's download file for writing; ``filename`` is what the user sees."""
+        os.makedirs(self.queue.directory, exist_ok=True)
+        extension = os.path.splitext(filename)[1]
+        self.artifact_path = os.path.join(os.path.abspath(self.queue.directory),
+                                          f'{self.job_id}-{uuid.uuid4().hex}{extension}')
+        self.artifact_name = filename
+        self.artifact_mimetype = mimetype
+        # Recorded up front, so a sweep can delete it if this worker dies
+        self.update(artifact_path=self.artifact_path)
+        with open(self.artifact_path, 'wb') as f:
+            yield f
+
+    def discard_artifact(self):
+        if self.artifact_path is not None:
+            _remove(self.artifact_path)
+            self.artifact_path = None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class JobQueue:
+    """Queue of persistent jobs plus the worker loop that runs them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.app = None
+        self.in_process = False
+        self.workers = 1
+        self.directory = 'job_artifacts'
+        self.poll_interval = 2.0
+        self.progress_interval = 1.0
+        self.artifact_ttl = 24 * 3600
+        self.stale_after = 600
+        self.max_attempts = 2
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        config = app.config
+        self.shutdown()
+        self.app = app
+        self.in_process = config.get('JOBS_IN_PROCESS', True)
+        self.workers = max(1, config.get('JOBS_WORKERS', 1))
+        self.directory = config.get('JOBS_DIR') or 'job_artifacts'
+        self.poll_interval = config.get('JOBS_POLL_INTERVAL', 2.0)
+        self.progress_interval = config.get('JOBS_PROGRESS_INTERVAL', 1.0)
+        self.artifact_ttl = config.get('JOBS_ARTIFACT_TTL', 24 * 3600)
+        self.stale_after = config.get('JOBS_STALE_AFTER', 600)
+        self.max_attempts = max(1, config.get('JOBS_MAX_ATTEMPTS', 2))
+        app.before_request(self._start_in_process_workers)
+
+    @property
+    def worker_name(self):
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def enqueue(self, kind, user=None, **params):
+        """Queue a ``kind`` job for ``user`` and return its (committed) Job.
+
+        ``params`` must be JSON serializable; they are passed to the handler
+        as keyword arguments.
+        """
+        from app import db
+        from app.models.job import Job
+
+        if kind not in _handlers:
+            raise LookupError(f'No handler for job kind {kind!r}')
+        job = Job(kind=kind, params=json.dumps(params), status=Job.QUEUED,
+                  user_id=user.id if user is not None else None)
+        db.session.add(job)
+        db.session.commit()
+        if self.in_process:
+            self._ensure_threads()
+            self._wake.set()
+        return job
+
+    def claim(self):
+        """Mark the oldest queued job as running here and return its id, or None."""
+        from app import db
+        from app.models.job import Job
+
+        while True:
+            with db.engine.begin() as connection:
+                job_id = connection.scalar(
+                    db.select(Job.id).where(Job.status == Job.QUEUED).order_by(Job.id).limit(1))
+                if job_id is None:
+                    return None
+                now = datetime.utcnow()
+                claimed = connection.execute(
+                    db.update(Job).where(Job.id == job_id, Job.status == Job.QUEUED).values(
+                        status=Job.RUNNING, worker=self.worker_name, attempts=Job.attempts + 1,
+                        started_at=now, heartbeat_at=now, progress_done=0, progress_total=None)
+                ).rowcount
+            if claimed:
+                return job_id
+            # Another worker got there first; try the next one
+
+    def run(self, job_id):
+        """Run a claimed job to completion. Returns True if it succeeded."""
+        from app import db
+        from app.models.job import Job
+
+        job = db.session.get(Job, job_id, populate_existing=True)
+        kind = job.kind
+        ctx = JobContext(self, job_id, job.attempts)
+        try:
+            handler = _handlers.get(kind)
+            if handler is None:
+                raise LookupError(f'No handler for job kind {kind!r}')
+            message = handler(ctx, **job.arguments)
+        except JobSuperseded:
+            db.session.rollback()
+            ctx.discard_artifact()
+            logger.warning(f"Job {job_id} ({kind}) attempt {ctx.attempt} superseded; abandoned")
+            return False
+        except Exception as e:
+            db.session.rollback()
+            ctx.discard_artifact()
+            logger.exception(f"Job {job_id} ({kind}) failed")
+            self._update(job_id, ctx.attempt, status=Job.FAILED, finished_at=datetime.utcnow(),
+                         artifact_path=None, message=(str(e) or e.__class__.__name__)[:255])
+            return False
+
+        now = datetime.utcnow()
+        values = {'status': Job.SUCCEEDED, 'finished_at': now, 'heartbeat_at': now,
+                  'message': str(message)[:255] if message is not None else None}
+        if ctx.artifact_path is not None:
+            values.update(artifact_path=ctx.artifact_path, artifact_name=ctx.artifact_name,
+                          artifact_mimetype=ctx.artifact_mimetype,
+                          expires_at=now + timedelta(seconds=self.artifact_ttl))
+        if not self._update(job_id, ctx.attempt, **values):
+            ctx.discard_artifact()
+            logger.warning(f"Job {job_id} ({kind}) attempt {ctx.attempt} finished after being "
+                           f"superseded; result discarded")
+            return False
+        return True
+
+    def sweep(self, now=None):
+        """Delete expired artifacts and requeue (or fail) jobs of dead workers.
+
+        Partial artifacts of the dead runs are deleted too. Returns
+        ``(expired, requeued, failed)`` counts.
+        """
+        from app import db
+        from app.models.job import Job
+
+        now = now or datetime.utcnow()
+        with db.engine.begin() as connection:
+            expired = connection.execute(
+                db.select(Job.id, Job.artifact_path).where(
+                    Job.status == Job.SUCCEEDED, Job.expires_at <= now)).all()
+            for job_id, path in expired:
+                if path:
+                    _remove(path)
+            if expired:
+                connection.execute(
+                    db.update(Job).where(Job.id.in_([job_id for job_id, _ in expired]))
+                    .values(status=Job.EXPIRED, artifact_path=None))
+
+            stale = db.and_(Job.status == Job.RUNNING,
+                            Job.heartbeat_at < now - timedelta(seconds=self.stale_after))
+            for path in connection.scalars(
+                    db.select(Job.artifact_path).where(stale, Job.artifact_path.isnot(None))):
+                _remove(path)
+            failed = connection.execute(
+                db.update(Job).where(stale, Job.attempts >= self.max_attempts).values(
+                    status=Job.FAILED, finished_at=now, artifact_path=None,
+                    message='Worker stopped responding')
+            ).rowcount
+            requeued = connection.execute(
+                db.update(Job).where(stale).values(status=Job.QUEUED, worker=None,
+                                                   artifact_path=None)).rowcount
+        if expired or requeued or failed:
+            logger.info(f"Job sweep: {len(expired)} expired, {requeued} requeued, {failed} failed")
+        return len(expired), requeued, failed
+
+    def serve(self, stop=None, once=False):
+        """Claim and run jobs until ``stop`` is set (or the queue is empty, with ``once``).
+
+        Each job runs in its own app context. Sweeps at most once per
+        JOBS_POLL_INTERVAL while idle, and before the first claim.
+        """
+        stop = stop or self._stop
+        last_sweep = None
+        while not stop.is_set():
+            if last_sweep is None or time.monotonic() - last_sweep >= self.poll_interval:
+                with self.app.app_context():
+                    self.sweep()
+                last_sweep = time.monotonic()
+            with self.app.app_context():
+                job_id = self.claim()
+                if job_id is not None:
+                    self.run(job_id)
+                    continue
+            if once:
+                return
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def run_pending(self):
+        """Run every queued job here and now (``flask worker --once``, tests)."""
+        self.serve(stop=threading.Event(), once=True)
+
+    def shutdown(self, wait=True):
+        """Stop this process's in-process workers after their current job."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            if self._pid != os.getpid():
+                # Threads of a parent process do not exist in this one
+                threads = []
+            self._pid = None
+            self._stop.set()
+            self._wake.set()
+        if wait:
+            for thread in threads:
+                thread.join()
+        self._stop = threading.Event()
+        self._wake.clear()
+
+    def _start_in_process_workers(self):
+        # before_request hook: cheap once this process's threads are up
+        if self.in_process and not (self._threads and self._pid == os.getpid()):
+            self._ensure_threads()
+
+    def _ensure_threads(self):
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [threading.Thread(target=self._thread_main, args=(self._stop,),
+                                              name=f'jobs-{n}', daemon=True)
+                             for n in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def _thread_main(self, stop):
+        try:
+            self.serve(stop)
+        except Exception:
+            logger.exception("In-process job worker stopped")
+
+    def _update(self, job_id, attempt, **values):
+        """Write ``values`` to a job still running as ``attempt``; returns False if it is not."""
+        from app import db
+        from app.models.job import Job
+
+        with db.engine.begin() as connection:
+            return bool(connection.execute(
+                db.update(Job).where(Job.id == job_id, Job.status == Job.RUNNING,
+                                     Job.attempts == attempt).values(**values)
+            ).rowcount)
@@ -0,0 +1,47 @@
+"""Deferred imports for heavy optional dependencies.
+
+qrcode, boto3/botocore and reportlab together add hundreds of milliseconds
+and tens of MB to every worker and ``flask`` CLI start, yet most processes
+never touch them. Modules that need one bind a LazyModule at import time and
+the real import happens on first attribute access:
+
+    from app.lazy import lazy_import
+    qrcode = lazy_import('qrcode')
+
+scripts/bench_startup.py reports which of these end up loaded by create_app.
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f'<LazyModule {self._name!r} ({state})>'
+
+
+def lazy_import(name):
+    """Return a LazyModule for ``name`` (e.g. 'boto3' or 'reportlab.platypus')."""
+    return LazyModule(name)
@@ -0,0 +1,333 @@
+"""Background delivery of outbound email.
+
+Requests render their message and hand it to ``MailDispatcher.enqueue``,
+which only puts it on a bounded queue. A small pool of worker threads
+(green threads under the eventlet worker) drains the queue in batches and
+hands each message to a transport, retrying transient failures with
+exponential backoff.
+
+Transports, selected with MAIL_TRANSPORT:
+  - ses:    AWS SES through one boto3 client shared by the whole process
+  - file:   each message written as an .eml file under MAIL_FILE_DIR
+  - memory: messages appended to ``transport.outbox`` (tests)
+
+Workers start on the first enqueue, so create_app and forked gunicorn
+workers never inherit running threads. With MAIL_ASYNC off, enqueue
+delivers inline instead.
+
+The queue is in memory only: messages still waiting when the process exits
+(a recycled, restarted or crashed gunicorn worker) are lost, not retried
+elsewhere. Shutdown drains what it can within its timeout.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from email.message import EmailMessage
+
+from app.lazy import lazy_import
+
+# Loaded on first send, not at app start
+boto3 = lazy_import('boto3')
+botocore_exceptions = lazy_import('botocore.exceptions')
+
+logger = logging.getLogger(__name__)
+
+MailMessage = namedtuple('MailMessage', ['to', 'subject', 'text', 'html', 'sender'])
+
+DEFAULT_SENDER = 'noreply@teamsocialstyles.com'
+
+# SES error codes worth retrying; anything else (e.g. MessageRejected) is final
+RETRYABLE_SES_ERRORS = {
+    'Throttling', 'ThrottlingException', 'TooManyRequestsException',
+    'ServiceUnavailable', 'InternalFailure', 'RequestTimeout',
+}
+
+
+class MemoryTransport:
+    """Keep sent messages in a list."""
+
+    def __init__(self):
+        self.outbox = []
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self.outbox.append(message)
+        return f'memory-{len(self.outbox)}'
+
+    def is_retryable(self, error):
+        return False
+
+
+class FileTransport:
+    """Write each message to ``directory`` as an RFC 5322 .eml file."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, message):
+        email = EmailMessage()
+        email['From'] = message.sender
+        email['To'] = message.to
+        email['Subject'] = message.subject
+        email.set_content(message.text)
+        email.add_alternative(message.html, subtype='html')
+
+        message_id = f'{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}'
+        path = os.path.join(self.directory, f'{message_id}.eml')
+        with open(path, 'wb') as f:
+            f.write(email.as_bytes())
+        return message_id
+
+    def is_retryable(self, error):
+        return isinstance(error, OSError)
+
+
+class SESTransport:
+    """Send through AWS SES with one lazily created, process-wide client.
+
+    boto3 clients are thread-safe and keep a connection pool, so every worker
+    shares the same client instead of paying for a new one per message.
+    """
+
+    def __init__(self, region=None, access_key_id=None, secret_access_key=None):
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = boto3.client(
+                        'ses',
+                        region_name=self.region,
+                        aws_access_key_id=self.access_key_id,
+                        aws_secret_access_key=self.secret_access_key
+                    )
+        return self._client
+
+    def send(self, message):
+        response = self.client.send_email(
+            Destination={
+                'ToAddresses': [message.to],
+            },
+            Message={
+                'Body': {
+                    'Html': {
+                        'Charset': 'UTF-8',
+                        'Data': message.html,
+                    },
+                    'Text': {
+                        'Charset': 'UTF-8',
+                        'Data': message.text,
+                    },
+                },
+                'Subject': {
+                    'Charset': 'UTF-8',
+                    'Data': message.subject,
+                },
+            },
+            Source=message.sender,
+        )
+        return response['MessageId']
+
+    def is_retryable(self, error):
+        if isinstance(error, botocore_exceptions.ClientError):
+            return error.response.get('Error', {}).get('Code') in RETRYABLE_SES_ERRORS
+        # Connection resets, endpoint timeouts and the like
+        return isinstance(error, (botocore_exceptions.BotoCoreError, OSError))
+
+
+def create_transport(config):
+    """Build the transport named by MAIL_TRANSPORT."""
+    name = config.get('MAIL_TRANSPORT', 'ses')
+    if name == 'ses':
+        return SESTransport(
+            region=config.get('AWS_REGION'),
+            access_key_id=config.get('AWS_ACCESS_KEY_ID'),
+            secret_access_key=config.get('AWS_SECRET_ACCESS_KEY')
+        )
+    if name == 'file':
+        return FileTransport(config.get('MAIL_FILE_DIR') or 'mail_outbox')
+    if name == 'memory':
+        return MemoryTransport()
+    raise ValueError(f'Unknown MAIL_TRANSPORT {name!r}')
+
+
+class MailDispatcher:
+    """Bounded mail queue drained by background workers.
+
+    Configured from the app config with ``init_app``: MAIL_TRANSPORT,
+    MAIL_ASYNC, MAIL_QUEUE_SIZE, MAIL_WORKERS, MAIL_BATCH_SIZE,
+    MAIL_MAX_RETRIES, MAIL_RETRY_BACKOFF (seconds, doubled per attempt) and
+    MAIL_ENQUEUE_TIMEOUT (seconds each message of a bulk send may wait for
+    queue room).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._queue = None
+        self.transport = MemoryTransport()
+        self.asynchronous = True
+        self.workers = 2
+        self.batch_size = 25
+        self.max_retries = 3
+        self.retry_backoff = 1.0
+        self.queue_size = 1000
+        self.enqueue_timeout = 10.0
+        self.default_sender = DEFAULT_SENDER
+        self.reset_stats()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        config = app.config
+        self.shutdown()
+        self.transport = create_transport(config)
+        self.asynchronous = config.get('MAIL_ASYNC', True)
+        self.workers = max(1, config.get('MAIL_WORKERS', 2))
+        self.batch_size = max(1, config.get('MAIL_BATCH_SIZE', 25))
+        self.max_retries = config.get('MAIL_MAX_RETRIES', 3)
+        self.retry_backoff = config.get('MAIL_RETRY_BACKOFF', 1.0)
+        self.default_sender = config.get('MAIL_DEFAULT_SENDER') or DEFAULT_SENDER
+        self.queue_size = config.get('MAIL_QUEUE_SIZE', 1000)
+        self.enqueue_timeout = config.get('MAIL_ENQUEUE_TIMEOUT', 10.0)
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.sent = 0
+            self.failed = 0
+            self.retried = 0
+            self.dropped = 0
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        """Counters and current queue depth, e.g. for a health endpoint."""
+        with self._stats_lock:
+            stats = {
+                'sent': self.sent,
+                'failed': self.failed,
+                'retried': self.retried,
+                'dropped': self.dropped,
+            }
+        stats['queued'] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def enqueue(self, message, timeout=0):
+        """Queue ``message`` for delivery; returns False if the queue is full.
+
+        With a ``timeout``, waits up to that many seconds for room first.
+        """
+        if not self.asynchronous:
+            return self._deliver(message)
+        if self._queue is None:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+        self._ensure_workers()
+        try:
+            if timeout > 0:
+                self._queue.put(message, timeout=timeout)
+            else:
+                self._queue.put_nowait(message)
+        except queue.Full:
+            self._count('dropped')
+            logger.error(f"Mail queue full, dropping email to {message.to}")
+            return False
+        return True
+
+    def join(self):
+        """Block until every queued message has been handled."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout=10):
+        """Let the workers finish the queue, then stop them."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            if self._pid != os.getpid():
+                # Threads from a parent process do not exist in this one
+                threads = []
+            self._pid = None
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def _ensure_workers(self):
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'mail-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        work = self._queue
+        while True:
+            message = work.get()
+            if message is None:
+                work.task_done()
+                return
+            batch = [message]
+            stop = False
+            # Drain whatever else is waiting so one wake-up sends a batch
+            while len(batch) < self.batch_size:
+                try:
+                    message = work.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    # Stop signal for this worker: finish the batch first
+                    work.task_done()
+                    stop = True
+                    break
+                batch.append(message)
+            for message in batch:
+                try:
+                    self._deliver(message)
+                finally:
+                    work.task_done()
+            if stop:
+                return
+
+    def _deliver(self, message):
+        for attempt in range(self.max_retries + 1):
+            try:
+                message_id = self.transport.send(message)
+            except Exception as e:
+                if attempt < self.max_retries and self.transport.is_retryable(e):
+                    self._count('retried')
+                    delay = self.retry_backoff * (2 ** attempt)
+                    logger.warning(f"Retrying email to {message.to} in {delay:.1f}s: {e}")
+                    time.sleep(delay * random.uniform(0.5, 1.0) if delay else 0)
+                    continue
+                self._count('failed')
+                logger.error(f"Error sending email to {message.to}: {e}")
+                return False
+            self._count('sent')
+            logger.info(f"Email sent to {message.to}, message ID: {message_id}")
+            return True
+        return False
@@ -1,5 +1,7 @@
-from flask import render_template, redirect, url_for, jsonify
-from flask_login import current_user
+from datetime import datetime
+from flask import render_template, redirect, url_for, jsonify, abort, send_file
+from flask_login import current_user, login_required
+from app.models.job import Job
 from . import main
 
 @main.route('/health')
@@ -21,4 +23,46 @@ def dashboard():
     """Redirect to user dashboard if logged in, otherwise to homepage."""
     if current_user.is_authenticated:
         return redirect(url_for('assessment.dashboard'))
-    return redirect(url_for('main.index')) 
\ No newline at end of file
+    return redirect(url_for('main.index'))
+
+def visible_job(job_id):
+    """The job, if the current user queued it or is an admin; 404 otherwise."""
+    job = Job.query.get_or_404(job_id)
+    if not job.visible_to(current_user):
+        abort(404)
+    return job
+
+@main.route('/jobs/<int:job_id>')
+@login_required
+def job_detail(job_id):
+    """Show a background job's progress; the page polls job_status."""
+    job = visible_job(job_id)
+    return render_template('main/job.html', job=job, title='Background Job')
+
+@main.route('/jobs/<int:job_id>.json')
+@login_required
+def job_status(job_id):
+    """Status and progress of a background job (app/jobs.py)."""
+    job = visible_job(job_id)
+    status = job.to_dict()
+    status['download_url'] = url_for('main.job_download', job_id=job.id) if job.has_artifact else None
+    response = jsonify(status)
+    response.cache_control.no_store = True
+    return response
+
+@main.route('/jobs/<int:job_id>/download')
+@login_required
+def job_download(job_id):
+    """Download a finished job's file until it expires (410 afterwards)."""
+    job = visible_job(job_id)
+    if job.status == Job.EXPIRED or (job.has_artifact and job.expires_at <= datetime.utcnow()):
+        abort(410)
+    if not job.has_artifact:
+        abort(404)
+    try:
+        return send_file(job.artifact_path, mimetype=job.artifact_mimetype,
+                         as_attachment=True, download_name=job.artifact_name)
+    except FileNotFoundError:
+        # Deleted by a sweep on another host, or JOBS_DIR was cleared
+        abort(410)
+
@@ -6,3 +6,5 @@ Import all models here to expose them at the package level.
 from app.models.user import User
 from app.models.assessment import Assessment, AssessmentResult
 from app.models.team import Team, TeamMember, TeamInvite
+from app.models.rollup import DailySignups, DailyResults, DailyActiveUsers
+from app.models.job import Job
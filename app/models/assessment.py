@@ -1,7 +1,46 @@
 from datetime import datetime
 import json
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from app import db
 
+# AssessmentResult.responses holds one unsigned byte per question, in question
+# order (byte i is question i + 1). 0 means unanswered; Likert answers are
+# 1-4. 30 bytes replaces ~250 bytes of JSON, and the column can be read
+# straight into NumPy (see AssessmentResult.response_array).
+RESPONSE_COUNT = 30
+
+
+def pack_responses(responses):
+    """Encode a ``{question id: answer}`` dict as RESPONSE_COUNT bytes.
+
+    Keys that are not question ids 1-30 are ignored. Raises ValueError for
+    answers that are not integers in 0-255.
+    """
+    packed = bytearray(RESPONSE_COUNT)
+    for key, value in (responses or {}).items():
+        try:
+            index = int(key) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < RESPONSE_COUNT:
+            try:
+                packed[index] = value
+            except TypeError:
+                raise ValueError(f'Answer to question {index + 1} is not an integer: {value!r}') from None
+    return bytes(packed)
+
+
+def unpack_responses(packed):
+    """Decode packed responses to the ``{"1": answer, ...}`` dict form.
+
+    Unanswered questions are left out, as they were never stored before.
+    """
+    if not packed:
+        return {}
+    return {str(i): value for i, value in enumerate(bytes(packed), 1) if value}
+
+
 class Assessment(db.Model):
     __tablename__ = 'assessments'
     
@@ -28,34 +67,48 @@ class AssessmentResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     assessment_id = db.Column(db.Integer, db.ForeignKey('assessments.id'), nullable=False)
-    responses = db.Column(db.Text)  # JSON string of responses
+    responses = db.Column(db.LargeBinary(RESPONSE_COUNT))  # packed, see pack_responses
     assertiveness_score = db.Column(db.Float)
     responsiveness_score = db.Column(db.Float)
-    social_style = db.Column(db.String(20))  # Driver, Expressive, Amiable, Analytical
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    social_style = db.Column(db.String(20), index=True)  # Driver, Expressive, Amiable, Analytical
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        # Newest result per user (maintains users.latest_result_id)
+        db.Index('ix_assessment_results_user_id_created_at', 'user_id', 'created_at'),
+        # Per-assessment style distribution and counts in the admin views
+        db.Index('ix_assessment_results_assessment_id_social_style', 'assessment_id', 'social_style'),
+    )
     
     def get_responses(self):
-        """Return the responses as a Python object."""
-        return json.loads(self.responses)
+        """Return the responses as a ``{question id: answer}`` dictionary."""
+        return unpack_responses(self.responses)
     
     def set_responses(self, responses_dict):
         """Set the responses from a Python dictionary."""
-        self.responses = json.dumps(responses_dict)
+        self.responses = pack_responses(responses_dict)
+    
+    def response_array(self):
+        """Return the answers as a read-only uint8 NumPy view of the column.
+
+        No copy or parse: element ``i`` is question ``i + 1`` (0 = unanswered).
+        """
+        import numpy as np
+        if not self.responses:
+            return np.zeros(RESPONSE_COUNT, dtype=np.uint8)
+        return np.frombuffer(self.responses, dtype=np.uint8)
     
     def calculate_scores(self):
-        """Calculate assertiveness and responsiveness scores based on responses."""
-        responses = self.get_responses()
-        
-        # Calculate assertiveness score (questions 1-15)
-        assertiveness_total = sum(responses.get(str(i), 0) for i in range(1, 16))
-        self.assertiveness_score = assertiveness_total / 15
-        
-        # Calculate responsiveness score (questions 16-30)
-        responsiveness_total = sum(responses.get(str(i), 0) for i in range(16, 31))
-        self.responsiveness_score = responsiveness_total / 15
-        
-        # Determine social style based on scores
-        self.determine_social_style()
+        """Calculate assertiveness and responsiveness scores based on responses.
+
+        A one-row call into app.assessment.scoring.score_batch: each score is
+        the sum of its 15 answers / 15 (questions 1-15 and 16-30, missing
+        answers count as 0), and the style is geometry.quadrant of the pair.
+        """
+        # Local import keeps NumPy out of app start-up
+        from app.assessment.scoring import score_batch
+        (self.assertiveness_score, self.responsiveness_score,
+         self.social_style), = score_batch([self.responses])
         
         return self.assertiveness_score, self.responsiveness_score
     
@@ -74,4 +127,46 @@ class AssessmentResult(db.Model):
         return self.social_style
     
     def __repr__(self):
-        return f'<AssessmentResult {self.id} - User {self.user_id}>' 
\ No newline at end of file
+        return f'<AssessmentResult {self.id} - User {self.user_id}>' 
+
+def refresh_latest_results(connection, user_ids=None):
+    """Point ``users.latest_result_id`` at each user's newest result.
+
+    One UPDATE with a correlated subquery, served by the
+    (user_id, created_at) index. Restricted to ``user_ids`` when given,
+    otherwise every user is refreshed (the backfill). Returns the number of
+    users updated.
+    """
+    from app.models.user import User
+    users = User.__table__
+    results = AssessmentResult.__table__
+    newest = db.select(results.c.id).where(
+        results.c.user_id == users.c.id
+    ).order_by(results.c.created_at.desc(), results.c.id.desc()).limit(1).scalar_subquery()
+
+    stmt = users.update().values(latest_result_id=newest)
+    if user_ids is not None:
+        stmt = stmt.where(users.c.id.in_(user_ids))
+    return connection.execute(stmt).rowcount
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_latest_results_after_flush(session, flush_context):
+    """Keep latest_result_id current in the same transaction as the flush."""
+    user_ids = {
+        obj.user_id for obj in list(session.new) + list(session.deleted)
+        if isinstance(obj, AssessmentResult) and obj.user_id is not None
+    }
+    if user_ids:
+        refresh_latest_results(session.connection(), user_ids)
+        session.info.setdefault('latest_result_users', set()).update(user_ids)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_latest_results(session, flush_context):
+    """Expire the pointer on loaded users so they reload the new value."""
+    from app.models.user import User
+    for user_id in session.info.pop('latest_result_users', ()):
+        user = session.identity_map.get(db.inspect(User).identity_key_from_primary_key((user_id,)))
+        if user is not None:
+            session.expire(user, ['latest_result_id', 'latest_result'])
@@ -0,0 +1,79 @@
+"""Background jobs (report packs, exports, re-scoring); see app/jobs.py.
+
+A row is the job's whole state, so the web process that queued it, the
+worker that runs it (in-process or ``flask worker``) and the browser polling
+its status only ever share the database.
+"""
+
+from datetime import datetime
+import json
+
+from app import db
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    EXPIRED = 'expired'  # succeeded, artifact since deleted
+    FINISHED = (SUCCEEDED, FAILED, EXPIRED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text)  # JSON object of handler keyword arguments
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    # Who may see and download it; admins see every job
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), index=True)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(255))  # summary on success, error on failure
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(100))  # host:pid that claimed it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    artifact_path = db.Column(db.String(500))
+    artifact_name = db.Column(db.String(255))  # download filename
+    artifact_mimetype = db.Column(db.String(100))
+    expires_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Workers claim the oldest queued job; sweeps find stale and expired ones
+        db.Index('ix_jobs_status_id', 'status', 'id'),
+    )
+
+    @property
+    def arguments(self):
+        return json.loads(self.params) if self.params else {}
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
+
+    @property
+    def has_artifact(self):
+        return self.status == self.SUCCEEDED and self.artifact_path is not None
+
+    def visible_to(self, user):
+        return user.is_admin or (self.user_id is not None and self.user_id == user.id)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'done': self.progress_done,
+            'total': self.progress_total,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'artifact': self.artifact_name if self.has_artifact else None,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,225 @@
+"""Daily rollup tables for the admin analytics pages.
+
+Admin pages read these instead of scanning ``users`` and
+``assessment_results``, so they cost O(days) however many rows exist:
+
+  - daily_signups       users created per day
+  - daily_results       results per day, assessment and social style
+  - daily_active_users  users whose first login of the day fell on that day
+
+The counters are kept current in the same transaction as the change: an
+``after_flush`` listener turns new/deleted users and results, style changes
+and day-changing logins into upserted deltas. Bulk deletes bypass the ORM, so
+callers run ``discount_results`` on the query first. ``flask rollup``
+recomputes signups and results from the source tables (``rebuild_rollups``)
+to repair drift after bulk imports or raw SQL. Daily active users have no
+history to rebuild from, so they are only maintained incrementally.
+
+Days are UTC dates, matching the ``datetime.utcnow`` timestamps.
+"""
+
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.user import User
+from app.models.assessment import AssessmentResult
+
+# Stored for results that have no style yet (part of the primary key)
+NO_STYLE = ''
+
+
+class DailySignups(db.Model):
+    __tablename__ = 'daily_signups'
+
+    day = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyResults(db.Model):
+    __tablename__ = 'daily_results'
+
+    day = db.Column(db.Date, primary_key=True)
+    # Derived data: no foreign key, rows are rebuilt rather than cascaded
+    assessment_id = db.Column(db.Integer, primary_key=True)
+    social_style = db.Column(db.String(20), primary_key=True, default=NO_STYLE)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyActiveUsers(db.Model):
+    __tablename__ = 'daily_active_users'
+
+    day = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _insert_for(connection):
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def add_counts(connection, model, deltas):
+    """Add ``deltas`` (``{key tuple: n}``) to ``model``'s ``total`` column.
+
+    Keys are the model's primary-key values in column order. Uses one
+    INSERT ... ON CONFLICT DO UPDATE where the dialect has it, otherwise an
+    UPDATE with an INSERT for missing rows.
+    """
+    deltas = {key: n for key, n in deltas.items() if n}
+    if not deltas:
+        return
+    table = model.__table__
+    keys = [column.name for column in table.primary_key.columns]
+    rows = [dict(zip(keys, key), total=n) for key, n in deltas.items()]
+
+    insert = _insert_for(connection)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=keys,
+                                          set_={'total': table.c.total + stmt.excluded.total})
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        match = [table.c[key] == row[key] for key in keys]
+        updated = connection.execute(
+            table.update().where(*match).values(total=table.c.total + row['total'])).rowcount
+        if not updated:
+            connection.execute(table.insert().values(**row))
+
+
+def _day(value):
+    return (value or datetime.utcnow()).date()
+
+
+def result_key(result, style=None):
+    return (_day(result.created_at), result.assessment_id, (style or result.social_style) or NO_STYLE)
+
+
+@event.listens_for(AssessmentResult.social_style, 'set', active_history=True)
+@event.listens_for(User.last_login, 'set', active_history=True)
+def _load_previous_value(target, value, oldvalue, initiator):
+    """No-op; active_history makes assignments load the value they replace,
+    so the flush listener below can see what changed on expired objects."""
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_rollups_after_flush(session, flush_context):
+    """Fold this flush's user and result changes into the rollup counters."""
+    signups, results, active = Counter(), Counter(), Counter()
+    for obj in session.new:
+        if isinstance(obj, AssessmentResult):
+            results[result_key(obj)] += 1
+        elif isinstance(obj, User):
+            signups[(_day(obj.created_at),)] += 1
+            if obj.last_login is not None:
+                active[(_day(obj.last_login),)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, AssessmentResult):
+            results[result_key(obj)] -= 1
+        elif isinstance(obj, User):
+            signups[(_day(obj.created_at),)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, AssessmentResult):
+            history = db.inspect(obj).attrs.social_style.history
+            if history.deleted:
+                results[result_key(obj, history.deleted[0])] -= 1
+                results[result_key(obj)] += 1
+        elif isinstance(obj, User):
+            history = db.inspect(obj).attrs.last_login.history
+            if history.added and history.added[0] is not None:
+                previous = history.deleted[0] if history.deleted else None
+                if previous is None or previous.date() != history.added[0].date():
+                    active[(_day(history.added[0]),)] += 1
+
+    if signups or results or active:
+        connection = session.connection()
+        add_counts(connection, DailySignups, signups)
+        add_counts(connection, DailyResults, results)
+        add_counts(connection, DailyActiveUsers, active)
+
+
+def discount_results(query):
+    """Subtract the results matched by ``query`` from the rollups.
+
+    Call before ``query.delete()``, which skips the flush listener. Costs
+    one GROUP BY over the matched rows.
+    """
+    day = func.date(AssessmentResult.created_at)
+    grouped = query.with_entities(
+        day, AssessmentResult.assessment_id, AssessmentResult.social_style, func.count()
+    ).group_by(day, AssessmentResult.assessment_id, AssessmentResult.social_style)
+    deltas = Counter()
+    for result_day, assessment_id, style, count in grouped:
+        deltas[(_as_date(result_day), assessment_id, style or NO_STYLE)] -= count
+    add_counts(db.session.connection(), DailyResults, deltas)
+
+
+def _as_date(value):
+    # SQLite's date() returns text, PostgreSQL's a date
+    return datetime.strptime(value, '%Y-%m-%d').date() if isinstance(value, str) else value
+
+
+def rebuild_rollups(since=None):
+    """Recompute daily signups and results from the source tables.
+
+    Rebuilds every day from ``since`` (a date) onwards, or all history when
+    None. Does not commit. Returns ``(signup rows, result rows)`` written.
+    """
+    start = datetime.combine(since, datetime.min.time()) if since else None
+
+    user_day = func.date(User.created_at)
+    signups = db.session.query(user_day, func.count(User.id)).filter(User.created_at.isnot(None))
+    result_day = func.date(AssessmentResult.created_at)
+    results = db.session.query(
+        result_day, AssessmentResult.assessment_id, AssessmentResult.social_style, func.count(AssessmentResult.id)
+    ).filter(AssessmentResult.created_at.isnot(None))
+    signup_rollup = db.session.query(DailySignups)
+    result_rollup = db.session.query(DailyResults)
+    if start is not None:
+        signups = signups.filter(User.created_at >= start)
+        results = results.filter(AssessmentResult.created_at >= start)
+        signup_rollup = signup_rollup.filter(DailySignups.day >= since)
+        result_rollup = result_rollup.filter(DailyResults.day >= since)
+
+    signup_rows = [{'day': _as_date(day), 'total': count}
+                   for day, count in signups.group_by(user_day)]
+    result_counts = Counter()
+    for day, assessment_id, style, count in results.group_by(
+            result_day, AssessmentResult.assessment_id, AssessmentResult.social_style):
+        result_counts[(_as_date(day), assessment_id, style or NO_STYLE)] += count
+    result_rows = [{'day': day, 'assessment_id': assessment_id, 'social_style': style, 'total': count}
+                   for (day, assessment_id, style), count in result_counts.items()]
+
+    signup_rollup.delete(synchronize_session=False)
+    result_rollup.delete(synchronize_session=False)
+    if signup_rows:
+        db.session.execute(db.insert(DailySignups), signup_rows)
+    if result_rows:
+        db.session.execute(db.insert(DailyResults), result_rows)
+    return len(signup_rows), len(result_rows)
+
+
+def seed_active_users():
+    """Seed daily_active_users from ``users.last_login`` where it is empty.
+
+    Only each user's most recent login survives in the users table, so this
+    is a lower bound for past days; it is used once when the table is new.
+    """
+    if db.session.query(DailyActiveUsers.day).first() is not None:
+        return 0
+    login_day = func.date(User.last_login)
+    rows = [{'day': _as_date(day), 'total': count} for day, count in db.session.query(
+        login_day, func.count(User.id)).filter(User.last_login.isnot(None)).group_by(login_day)]
+    if rows:
+        db.session.execute(db.insert(DailyActiveUsers), rows)
+    return len(rows)
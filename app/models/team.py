@@ -1,9 +1,11 @@
 from datetime import datetime, timedelta
+import hashlib
+import hmac
 import uuid
+from functools import lru_cache
 from app import db
-from flask import url_for
+from flask import url_for, current_app
 import string
-import random
 
 # Base62 encoding for team links
 BASE62_CHARS = string.ascii_uppercase + string.ascii_lowercase + string.digits
@@ -24,13 +26,56 @@ def base62_encode(num):
     arr.reverse()
     return ''.join(arr)
 
+def base62_decode(text):
+    """Decode a Base62 string to a number; raises ValueError on bad input"""
+    if not text:
+        raise ValueError('empty Base62 string')
+    
+    num = 0
+    base = len(BASE62_CHARS)
+    for char in text:
+        index = BASE62_CHARS.find(char)
+        if index < 0:
+            raise ValueError(f'invalid Base62 character {char!r}')
+        num = num * base + index
+    return num
+
+def join_signature(team_id, secret_key):
+    """HMAC-SHA256 of the team id keyed with ``secret_key``, Base62-encoded"""
+    digest = hmac.new(secret_key.encode('utf-8'), f'team-join:{team_id}'.encode('utf-8'),
+                      hashlib.sha256).digest()
+    return base62_encode(int.from_bytes(digest[:8], 'big'))
+
+# Base62 digits needed for a signed 64-bit id; longer prefixes are rejected
+MAX_ENCODED_ID_LENGTH = 11
+
+@lru_cache(maxsize=4096)
+def resolve_join_token(token, secret_key):
+    """Return the team id a join token was issued for, or None.
+
+    Tokens look like ``{base62 team id}-{signature}-{team_name}``; the name
+    is informational only. The id is decoded and the signature verified in
+    constant time, so no database access is needed and the result can be
+    memoized per worker (a workshop QR is scanned by every phone in the room).
+    """
+    parts = token.split('-', 2)
+    if len(parts) < 2 or len(parts[0]) > MAX_ENCODED_ID_LENGTH:
+        return None
+    try:
+        team_id = base62_decode(parts[0])
+    except ValueError:
+        return None
+    if not hmac.compare_digest(parts[1], join_signature(team_id, secret_key)):
+        return None
+    return team_id
+
 # Association table for team memberships
 class TeamMember(db.Model):
     __tablename__ = 'team_members'
     
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     role = db.Column(db.String(20), default='member')  # 'owner' or 'member'
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -83,17 +128,121 @@ class Team(db.Model):
             return True
         return False
     
+    def get_roster(self, include_results=True, completed_only=False, results_after=None):
+        """Return the team's members as a list of roster dicts in one query.
+
+        Each entry has ``user``, ``role``, ``joined_at`` and ``result`` (the
+        member's latest AssessmentResult, or None). The latest result is a
+        plain join on the denormalized ``User.latest_result_id``, so the page
+        costs the same single round trip whether the team has 3 members or 300.
+
+        Args:
+            include_results (bool): Join each member's latest result.
+            completed_only (bool): Drop members without a result.
+            results_after (tuple): Only return members whose latest result
+                sorts after this ``(created_at, id)`` key, so results sharing
+                a timestamp are not skipped (implies ``completed_only``).
+        """
+        from app.models.user import User
+        from app.models.assessment import AssessmentResult
+
+        query = db.session.query(TeamMember, User).join(
+            User, User.id == TeamMember.user_id
+        ).filter(TeamMember.team_id == self.id)
+
+        if include_results:
+            join_cond = AssessmentResult.id == User.latest_result_id
+            if results_after is not None:
+                query = query.add_entity(AssessmentResult).join(AssessmentResult, join_cond).filter(
+                    db.tuple_(AssessmentResult.created_at, AssessmentResult.id) > db.tuple_(*results_after))
+            elif completed_only:
+                query = query.add_entity(AssessmentResult).join(AssessmentResult, join_cond)
+            else:
+                query = query.add_entity(AssessmentResult).outerjoin(AssessmentResult, join_cond)
+
+        rows = query.order_by(TeamMember.joined_at, TeamMember.id).all()
+
+        roster = []
+        for row in rows:
+            membership, user = row[0], row[1]
+            roster.append({
+                'user': user,
+                'role': membership.role,
+                'joined_at': membership.joined_at,
+                'result': row[2] if include_results else None
+            })
+        return roster
+
+    def get_completed_member_ids(self):
+        """Return the ids of members with a result, i.e. those on the live grid."""
+        from app.models.user import User
+
+        rows = db.session.query(User.id).join(
+            TeamMember, TeamMember.user_id == User.id
+        ).filter(
+            TeamMember.team_id == self.id, User.latest_result_id.isnot(None)
+        ).order_by(TeamMember.joined_at, TeamMember.id)
+        return [user_id for (user_id,) in rows]
+
+    def get_roster_version(self):
+        """Return a cheap version string for the team's roster.
+
+        One aggregate query over the memberships and the members' results.
+        The version changes whenever a member joins or leaves, or a member's
+        result is added or deleted, so it can be used as an ETag for the live
+        grid. A timestamp could not serve as a validator: a member leaving
+        does not make anything newer.
+        """
+        from app.models.assessment import AssessmentResult
+
+        member_count, last_joined, result_count, last_result = db.session.query(
+            db.func.count(db.distinct(TeamMember.id)),
+            db.func.max(TeamMember.joined_at),
+            db.func.count(AssessmentResult.id),
+            db.func.max(AssessmentResult.created_at)
+        ).select_from(TeamMember).outerjoin(
+            AssessmentResult, AssessmentResult.user_id == TeamMember.user_id
+        ).filter(TeamMember.team_id == self.id).one()
+
+        return '{}-{}-{}-{}'.format(
+            member_count,
+            result_count,
+            last_result.isoformat() if last_result else '',
+            last_joined.isoformat() if last_joined else ''
+        )
+
     def get_join_url(self):
         """Get the URL for joining this team"""
         return url_for('team.quick_join', token=self.generate_join_token(), _external=True)
     
+    def join_signature(self):
+        """Return the keyed signature part of the join token.
+
+        Derived from the team id and SECRET_KEY with HMAC-SHA256, so it is
+        stable for the life of the team (links and QR images can be cached)
+        but cannot be guessed from the id.
+        """
+        return join_signature(self.id, current_app.config['SECRET_KEY'])
+
     def generate_join_token(self):
-        """Generate a Base62 token for joining the team"""
-        # Base62 encoding of team_id and a random component for security
-        random_component = random.randint(1000000, 9999999)
+        """Generate the Base62 token for joining the team
+
+        Format is ``{base62 team id}-{signature}-{team_name}``. The token is
+        deterministic, so every page and email shows the same link.
+        """
         encoded_id = base62_encode(self.id)
-        encoded_random = base62_encode(random_component)
-        return f"{encoded_id}-{encoded_random}-{self.name.replace(' ', '_')}"
+        return f"{encoded_id}-{self.join_signature()}-{self.name.replace(' ', '_')}"
+    
+    @classmethod
+    def from_join_token(cls, token):
+        """Return the team for a join token, or None if it is invalid.
+
+        Costs a memoized signature check plus a primary-key lookup.
+        """
+        team_id = resolve_join_token(token, current_app.config['SECRET_KEY'])
+        if team_id is None:
+            return None
+        return db.session.get(cls, team_id)
     
     def __repr__(self):
         return f'<Team {self.name}>'
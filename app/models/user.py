@@ -15,12 +15,31 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128))
     name = db.Column(db.String(64))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_login = db.Column(db.DateTime)  # Track last login time
+    last_login = db.Column(db.DateTime, index=True)  # Track last login time
     is_admin = db.Column(db.Boolean, default=False)  # Admin flag
     is_anonymous_assessment = db.Column(db.Boolean, default=False)  # Flag for users created from anonymous assessments
+    # Denormalized pointer to the newest result, maintained on every flush that
+    # adds or deletes results (see app/models/assessment.py)
+    latest_result_id = db.Column(db.Integer, db.ForeignKey('assessment_results.id', use_alter=True,
+                                                           name='fk_users_latest_result_id',
+                                                           ondelete='SET NULL'))
+    
+    __table_args__ = (
+        # Admin user listing: keyset pages newest first (app/pagination.py)
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        # Case-insensitive prefix search in the admin listing; text_pattern_ops
+        # lets PostgreSQL use them for LIKE 'x%' (app/pagination.py)
+        db.Index('ix_users_lower_email', db.func.lower(email).label('lower_email'),
+                 postgresql_ops={'lower_email': 'text_pattern_ops'}),
+        db.Index('ix_users_lower_name', db.func.lower(name).label('lower_name'),
+                 postgresql_ops={'lower_name': 'text_pattern_ops'}),
+    )
     
     # Relationship with assessment results
-    assessment_results = db.relationship('AssessmentResult', backref='user', lazy='dynamic')
+    assessment_results = db.relationship('AssessmentResult', backref='user', lazy='dynamic',
+                                         foreign_keys='AssessmentResult.user_id')
+    latest_result = db.relationship('AssessmentResult', foreign_keys=[latest_result_id],
+                                    viewonly=True)
     
     # Team relationships
     owned_teams = db.relationship('Team', foreign_keys='Team.owner_id', 
@@ -74,7 +93,7 @@ class User(UserMixin, db.Model):
     
     def get_latest_assessment_result(self):
         """Get the user's most recent assessment result."""
-        return self.assessment_results.order_by(db.desc('created_at')).first()
+        return self.latest_result
     
     def __repr__(self):
         return f'<User {self.email}>'
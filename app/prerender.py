@@ -0,0 +1,147 @@
+"""Background pre-rendering of artifacts a request is about to need.
+
+Once a new assessment result is committed, its chart and PDF report are
+rendered on a small thread pool (green threads under the eventlet worker),
+so both are already cached when the browser follows the redirect to the
+results page. The hooks that schedule them live in app/assessment/utils.py.
+
+Views that need one of these artifacts call ``wait`` first. If a render of
+it is in flight they block until it lands in the cache (at most
+PRERENDER_WAIT seconds) instead of rendering it a second time. Otherwise
+``wait`` returns at once and the view renders synchronously on a cache miss,
+as it always has.
+
+Configured with PRERENDER_ENABLED, PRERENDER_WORKERS and PRERENDER_WAIT. The
+pool starts on the first submit, so create_app and forked gunicorn workers
+never inherit running threads.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
+
+logger = logging.getLogger(__name__)
+
+
+class Prerenderer:
+    """Thread pool running one render task per key at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = {}
+        self.app = None
+        self.enabled = False
+        self.workers = 2
+        self.wait_timeout = 5.0
+        self.reset_stats()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        config = app.config
+        self.shutdown()
+        self.app = app
+        self.enabled = config.get('PRERENDER_ENABLED', True)
+        self.workers = max(1, config.get('PRERENDER_WORKERS', 2))
+        self.wait_timeout = config.get('PRERENDER_WAIT', 5.0)
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.submitted = 0
+            self.completed = 0
+            self.failed = 0
+            self.waited = 0
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        """Counters and tasks in flight, e.g. for a health endpoint."""
+        with self._stats_lock:
+            stats = {
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'waited': self.waited,
+            }
+        stats['pending'] = len(self._pending)
+        return stats
+
+    def submit(self, key, fn, *args):
+        """Run ``fn(*args)`` in an app context on the pool.
+
+        A key already in flight is not submitted again. Returns the Future,
+        or None when pre-rendering is disabled.
+        """
+        if not self.enabled or self.app is None:
+            return None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._ensure_executor().submit(self._run, key, fn, args)
+            self._pending[key] = future
+        self._count('submitted')
+        return future
+
+    def wait(self, key, timeout=None):
+        """Block until the in-flight task for ``key``, if any, has finished.
+
+        Waits at most ``timeout`` seconds (PRERENDER_WAIT by default).
+        Returns True if there was a task to wait for.
+        """
+        with self._lock:
+            future = self._pending.get(key)
+        if future is None:
+            return False
+        self._count('waited')
+        wait_for_futures([future], timeout=self.wait_timeout if timeout is None else timeout)
+        return True
+
+    def join(self):
+        """Block until every task, including ones submitted by tasks, has finished."""
+        while True:
+            with self._lock:
+                futures = list(self._pending.values())
+            if not futures:
+                return
+            wait_for_futures(futures)
+
+    def shutdown(self, wait=True):
+        """Stop the pool, letting queued tasks finish when ``wait`` is true."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._pid != os.getpid():
+                # The pool of a parent process does not exist in this one
+                executor = None
+            self._pid = None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _ensure_executor(self):
+        # Called with self._lock held
+        if self._executor is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix='prerender')
+        return self._executor
+
+    def _run(self, key, fn, args):
+        try:
+            with self.app.app_context():
+                fn(*args)
+        except Exception as e:
+            self._count('failed')
+            logger.error(f"Pre-render of {key!r} failed: {e}")
+        else:
+            self._count('completed')
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
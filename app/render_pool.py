@@ -0,0 +1,258 @@
+"""Process pool for CPU-bound rendering (matplotlib charts, reportlab PDFs).
+
+Under the eventlet worker a long render in the request greenlet holds the
+hub, stalling every other green thread of that worker, Socket.IO included.
+``RenderPool.run`` instead hands the call to a separate process and waits on
+the result through (patched, cooperative) threading primitives, so the hub
+keeps serving other greenlets meanwhile.
+
+  - Bounded: at most RENDER_QUEUE_SIZE renders may be queued or running per
+    web worker; beyond that ``run`` raises RenderError immediately rather
+    than piling up work.
+  - Timeouts: ``run`` gives up after RENDER_TIMEOUT seconds with
+    RenderTimeout. The render itself is not interrupted; its process is
+    simply not waited for.
+  - Isolation: children are spawned fresh (never forked from a worker with
+    live greenlets and sockets) and replaced after RENDER_MAX_TASKS_PER_CHILD
+    renders, which bounds matplotlib's leaky global state. Python 3.11 does
+    this per child; on 3.10 the whole pool is replaced once it has run that
+    many renders per process. A child that dies mid-render raises
+    RenderError and the pool is rebuilt.
+  - Metrics: ``stats()`` reports counters plus how long renders waited in the
+    queue before a child picked them up.
+
+Every web worker (and ``flask worker``) has its own pool, started on its
+first render. RENDER_POOL_SIZE is the size of each of them; by default the
+host's CPUs are shared out between its WEB_WORKERS web processes, i.e. one
+process each under gunicorn's usual 2 * CPU + 1 workers, so a busy host runs
+about as many render processes as web workers rather than workers * CPUs. With RENDER_POOL_ENABLED off, ``run`` calls inline.
+Callables and arguments must be picklable: module-level functions and
+plain data.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+# ProcessPoolExecutor(max_tasks_per_child=...) is new in Python 3.11
+NATIVE_CHILD_RECYCLING = sys.version_info >= (3, 11)
+
+
+class RenderError(RuntimeError):
+    """A render could not be completed by the pool."""
+
+
+class RenderTimeout(RenderError):
+    """A render took longer than RENDER_TIMEOUT."""
+
+
+def default_pool_size(web_workers):
+    """Processes per pool when ``web_workers`` processes share the host's CPUs."""
+    return max(1, (os.cpu_count() or 1) // max(1, web_workers))
+
+
+def _timed_call(fn, args):
+    """Run in the child: return when the render started and its result."""
+    return time.time(), fn(*args)
+
+
+class RenderPool:
+    """Bounded process pool with timeouts and queue-wait metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._executor_tasks = 0
+        self.enabled = False
+        self.size = os.cpu_count() or 1
+        self.timeout = 30.0
+        self.max_tasks_per_child = 100
+        self.queue_size = 4 * self.size
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self.reset_stats()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        config = app.config
+        self.shutdown()
+        self.enabled = config.get('RENDER_POOL_ENABLED', True)
+        self.size = config.get('RENDER_POOL_SIZE') or default_pool_size(config.get('WEB_WORKERS', 1))
+        self.timeout = config.get('RENDER_TIMEOUT', 30.0)
+        self.max_tasks_per_child = config.get('RENDER_MAX_TASKS_PER_CHILD', 100)
+        self.queue_size = max(1, config.get('RENDER_QUEUE_SIZE') or 4 * self.size)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.completed = 0
+            self.timeouts = 0
+            self.crashes = 0
+            self.rejected = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def _count(self, counter, amount=1):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def stats(self):
+        """Counters and queue-wait times, e.g. for a health endpoint."""
+        with self._stats_lock:
+            completed = self.completed
+            return {
+                'completed': completed,
+                'timeouts': self.timeouts,
+                'crashes': self.crashes,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(1000 * self.wait_seconds / completed, 1) if completed else 0.0,
+                'max_wait_ms': round(1000 * self.max_wait_seconds, 1),
+            }
+
+    def run(self, fn, *args, timeout=None):
+        """Return ``fn(*args)``, computed in a pool process.
+
+        Raises RenderTimeout after ``timeout`` seconds (RENDER_TIMEOUT by
+        default) and RenderError when the queue is full or the child died.
+        Exceptions raised by ``fn`` itself propagate unchanged.
+        """
+        if not self.enabled:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise RenderError('Render queue is full')
+        try:
+            executor, submitted, future = self._submit(fn, args)
+            return self._result(executor, fn, submitted, future, timeout)
+        finally:
+            self._slots.release()
+
+    def map(self, fn, argument_tuples, window=None):
+        """Yield ``fn(*args)`` for each tuple, in order, ``window`` at a time.
+
+        For batches: keeps up to ``window`` renders (the pool size by
+        default) in flight, and waits up to RENDER_TIMEOUT for a free queue
+        slot instead of being refused. Errors are raised as by ``run``;
+        closing the generator cancels the renders not yet started.
+        """
+        if not self.enabled:
+            for args in argument_tuples:
+                yield fn(*args)
+            return
+        window = window or self.size
+        remaining = iter(argument_tuples)
+        pending = deque()
+        try:
+            while True:
+                for args in islice(remaining, window - len(pending)):
+                    if not self._slots.acquire(timeout=self.timeout):
+                        self._count('rejected')
+                        raise RenderError('Render queue is full')
+                    try:
+                        pending.append(self._submit(fn, args))
+                    except RenderError:
+                        self._slots.release()
+                        raise
+                if not pending:
+                    return
+                executor, submitted, future = pending.popleft()
+                try:
+                    result = self._result(executor, fn, submitted, future)
+                finally:
+                    self._slots.release()
+                yield result
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+                self._slots.release()
+
+    def _submit(self, fn, args):
+        executor = self._ensure_executor()
+        submitted = time.time()
+        try:
+            future = executor.submit(_timed_call, fn, args)
+            self._count_task(executor)
+            return executor, submitted, future
+        except BrokenProcessPool:
+            self._count('crashes')
+            self._discard(executor)
+            raise RenderError(f'Render pool is broken; dropped {getattr(fn, "__name__", fn)}')
+
+    def _result(self, executor, fn, submitted, future, timeout=None):
+        try:
+            started, result = future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count('timeouts')
+            raise RenderTimeout(f'{getattr(fn, "__name__", fn)} timed out')
+        except BrokenProcessPool:
+            self._count('crashes')
+            self._discard(executor)
+            raise RenderError(f'Render process died running {getattr(fn, "__name__", fn)}')
+
+        waited = max(0.0, started - submitted)
+        with self._stats_lock:
+            self.completed += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return result
+
+    def shutdown(self, wait=True):
+        """Stop the pool processes of this process, if any."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._pid != os.getpid():
+                # The pool of a parent process does not belong to this one
+                executor = None
+            self._pid = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _ensure_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor_tasks = 0
+                options = {}
+                if NATIVE_CHILD_RECYCLING:
+                    options['max_tasks_per_child'] = self.max_tasks_per_child or None
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    **options,
+                )
+            return self._executor
+
+    def _count_task(self, executor):
+        """Retire the pool after max_tasks_per_child renders per process (Python < 3.11)."""
+        if NATIVE_CHILD_RECYCLING or not self.max_tasks_per_child:
+            return
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor_tasks += 1
+            if self._executor_tasks < self.max_tasks_per_child * self.size:
+                return
+            self._executor = None
+        # Renders already submitted still finish; the next one starts a new pool
+        executor.shutdown(wait=False)
+
+    def _discard(self, executor):
+        """Drop a broken pool so the next render starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        logger.error("Render pool process died; restarting the pool")
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, TextAreaField, SubmitField, PasswordField
 from wtforms.validators import DataRequired, Email, Length, Optional, EqualTo
 
@@ -13,10 +14,21 @@ class TeamForm(FlaskForm):
 
 class InviteMembersForm(FlaskForm):
     """Form for inviting members to a team"""
-    emails = StringField('Email Addresses', 
-                       validators=[DataRequired()],
+    emails = TextAreaField('Email Addresses', 
+                       validators=[Optional()],
                        description="Separate multiple email addresses with commas")
+    csv_file = FileField('Or upload a CSV', 
+                         validators=[Optional(), FileAllowed(['csv', 'txt'], 'Upload a .csv or .txt file')],
+                         description="One address per row, or a column headed 'email'")
     submit = SubmitField('Send Invitations')
+    
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        if not (self.emails.data or '').strip() and not self.csv_file.data:
+            self.emails.errors.append('Enter at least one email address or upload a CSV file.')
+            return False
+        return True
 
 class QuickRegisterForm(FlaskForm):
     """Simplified registration form for users joining via QR code"""
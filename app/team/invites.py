@@ -0,0 +1,191 @@
+"""Bulk team invitations.
+
+Invite lists are normalized and deduplicated up front, then resolved with
+three set-based queries (users by email, their memberships in the team, and
+pending invites for the team) regardless of how many addresses were given.
+New TeamMember and TeamInvite rows are inserted with one executemany each.
+
+The notification emails are sent by an ``invite_notifications`` background
+job (app/jobs.py), so the request only inserts rows and queues the job, and a
+list longer than the in-memory mail queue is fed to it a chunk at a time
+instead of being dropped.
+"""
+
+import csv
+import io
+import re
+import uuid
+from datetime import datetime, timedelta
+
+from app import db
+from app.email import send_bulk_email
+from app.jobs import job_handler
+from app.models import Team, User, TeamMember, TeamInvite
+
+# Keeps every IN (...) list under SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+# Largest list accepted in one request (a whole department's CSV export)
+MAX_BULK_INVITES = 5000
+# Notification emails rendered and queued per step of the notification job
+NOTIFY_CHUNK_SIZE = 250
+INVITE_EXPIRY = timedelta(days=7)
+
+EMAIL_RE = re.compile(r'^[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+$')
+SPLIT_RE = re.compile(r'[\s,;]+')
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def normalize_emails(candidates):
+    """Lower-case, strip and dedupe addresses, preserving order.
+
+    Returns ``(valid, invalid)`` lists.
+    """
+    valid, invalid, seen = [], [], set()
+    for candidate in candidates:
+        email = candidate.strip().strip('<>"\'').lower()
+        if not email or email in seen:
+            continue
+        seen.add(email)
+        (valid if EMAIL_RE.match(email) else invalid).append(email)
+    return valid, invalid
+
+
+def emails_from_text(text):
+    """Split a comma, semicolon or newline separated list of addresses."""
+    return [part for part in SPLIT_RE.split(text or '') if part]
+
+
+def emails_from_csv(stream):
+    """Read addresses from an uploaded CSV file.
+
+    Uses the column headed ``email`` (or ``e-mail``/``email address``) if the
+    first row is a header, otherwise every cell that looks like an address.
+    """
+    raw = stream.read()
+    text = raw.decode('utf-8-sig', errors='replace') if isinstance(raw, bytes) else raw
+    rows = csv.reader(io.StringIO(text))
+    header = next(rows, None)
+    if header is None:
+        return []
+
+    columns = [cell.strip().lower() for cell in header]
+    for name in ('email', 'e-mail', 'email address'):
+        if name in columns:
+            index = columns.index(name)
+            return [row[index] for row in rows if len(row) > index]
+
+    emails = []
+    for row in [header, *rows]:
+        emails.extend(cell for cell in row if '@' in cell)
+    return emails
+
+
+class InviteResult:
+    """Outcome of a bulk invite, grouped by what happened to each address."""
+
+    def __init__(self):
+        self.added = []             # existing users added to the team
+        self.invited = []           # new invitations created
+        self.already_members = []
+        self.already_invited = []
+        self.invalid = []
+        self.skipped = []           # e.g. the inviting user themselves
+
+
+def bulk_invite(team, emails, exclude_email=None):
+    """Add or invite every address in ``emails`` to ``team``.
+
+    Existing users are added as members directly; unknown addresses get an
+    ``auto_accepted`` TeamInvite (same as the single-address flow). Does not
+    commit and does not send email; see ``send_invite_notifications``.
+    """
+    result = InviteResult()
+    valid, result.invalid = normalize_emails(emails)
+    if exclude_email:
+        exclude_email = exclude_email.lower()
+        if exclude_email in valid:
+            valid.remove(exclude_email)
+            result.skipped.append(exclude_email)
+
+    users = {}
+    pending = set()
+    for chunk in chunked(valid, CHUNK_SIZE):
+        users.update(
+            (email.lower(), user_id) for user_id, email in db.session.query(User.id, User.email).filter(
+                User.email.in_(chunk))
+        )
+        pending.update(
+            email for (email,) in db.session.query(TeamInvite.email).filter(
+                TeamInvite.team_id == team.id,
+                TeamInvite.status == 'pending',
+                TeamInvite.email.in_(chunk))
+        )
+
+    member_ids = set()
+    user_ids = list(users.values())
+    for chunk in chunked(user_ids, CHUNK_SIZE):
+        member_ids.update(
+            user_id for (user_id,) in db.session.query(TeamMember.user_id).filter(
+                TeamMember.team_id == team.id,
+                TeamMember.user_id.in_(chunk))
+        )
+
+    now = datetime.utcnow()
+    new_members, new_invites = [], []
+    for email in valid:
+        user_id = users.get(email)
+        if user_id is not None:
+            if user_id in member_ids:
+                result.already_members.append(email)
+            else:
+                member_ids.add(user_id)
+                new_members.append({'team_id': team.id, 'user_id': user_id,
+                                    'role': 'member', 'joined_at': now})
+                result.added.append(email)
+        elif email in pending:
+            result.already_invited.append(email)
+        else:
+            new_invites.append({'team_id': team.id, 'email': email, 'token': str(uuid.uuid4()),
+                                'status': 'auto_accepted', 'created_at': now,
+                                'expires_at': now + INVITE_EXPIRY})
+            result.invited.append(email)
+
+    if new_members:
+        db.session.execute(db.insert(TeamMember), new_members)
+    if new_invites:
+        db.session.execute(db.insert(TeamInvite), new_invites)
+    return result
+
+
+@job_handler('invite_notifications')
+def invite_notifications_job(ctx, team_id, invited=(), added=(), join_url=None, team_url=None):
+    """Email everyone a bulk invite added or invited, a chunk at a time.
+
+    ``invited`` addresses have no account and get ``join_url``; ``added``
+    users were put on the team and get ``team_url``. Waiting for room in the
+    mail queue happens here, in the worker, never in the request.
+    """
+    team = db.session.get(Team, team_id)
+    if team is None:
+        raise LookupError('The team no longer exists')
+    total = len(invited) + len(added)
+    done = 0
+    queued = {}
+    for kind, emails, url in (('invitation', invited, join_url), ('added-member', added, team_url)):
+        queued[kind] = 0
+        for chunk in chunked(emails, NOTIFY_CHUNK_SIZE):
+            queued[kind] += send_bulk_email(
+                chunk,
+                subject=f"You've been added to the {team.name} team",
+                template='team/email/auto_added',
+                team=team,
+                token_url=url
+            )
+            done += len(chunk)
+            ctx.progress(done, total)
+    return (f"Queued {queued['invitation']} of {len(invited)} invitation emails and "
+            f"{queued['added-member']} of {len(added)} added-member emails.")
@@ -0,0 +1,66 @@
+"""QR code images for team join links.
+
+The join token is stable per team, so the PNG for a given team, token and
+box size never changes. Images are kept in ``qr_cache`` and the QR encoder
+only runs once per team (per worker, or per host with QR_CACHE_DIR set).
+"""
+
+import hashlib
+from io import BytesIO
+
+from app import qr_cache
+from app.lazy import lazy_import
+
+# Loaded on first QR render, not at app start
+qrcode = lazy_import('qrcode')
+
+DEFAULT_BOX_SIZE = 10
+MIN_BOX_SIZE = 2
+MAX_BOX_SIZE = 20
+BORDER = 4
+
+
+def clamp_box_size(box_size):
+    """Keep a requested box size within the range the route will render."""
+    if box_size is None:
+        return DEFAULT_BOX_SIZE
+    return max(MIN_BOX_SIZE, min(MAX_BOX_SIZE, box_size))
+
+
+def qr_version(token):
+    """Short digest of the join token, used to version the image URL."""
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()[:12]
+
+
+def qr_cache_key(team_id, token, box_size, join_url):
+    # The encoded URL also carries the host, which differs between
+    # environments sharing a disk cache, so it is part of the key too.
+    url_digest = hashlib.sha1(join_url.encode('utf-8')).hexdigest()[:12]
+    return f'qr:v1:{team_id}:{token}:{box_size}:{url_digest}'
+
+
+def render_qr_png(data, box_size=DEFAULT_BOX_SIZE):
+    """Encode ``data`` as a black-on-white QR code and return PNG bytes."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer)
+    return buffer.getvalue()
+
+
+def team_join_qr(team_id, token, join_url, box_size=DEFAULT_BOX_SIZE):
+    """Return the PNG for a team's join URL, rendering it on a cache miss."""
+    key = qr_cache_key(team_id, token, box_size, join_url)
+    png = qr_cache.get(key)
+    if png is None:
+        png = render_qr_png(join_url, box_size)
+        qr_cache.set(key, png)
+    return png
@@ -0,0 +1,215 @@
+"""Team report pack: every member's PDF report plus a team summary, as a ZIP.
+
+Member reports come from ``report_cache`` when they have been built before
+(e.g. pre-rendered on submission); the rest are built through
+``render_pool.map`` several at a time, in roster order. The summary page
+(group grid and style distribution) is built in the pool too. The archive is
+written to the response as each PDF arrives, through a write-only sink, so
+only the PDFs in flight are held in memory, never the whole ZIP.
+
+Progress is broadcast to the team's Socket.IO room as ``report_pack_progress``
+events so the dashboard can show it. Teams too large to stream within a
+request get the same archive as a ``team_report_pack`` background job
+(app/jobs.py), which writes it to the job's download file instead.
+"""
+
+import io
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from werkzeug.utils import secure_filename
+
+from app import db, report_cache, render_pool
+from app.assessment import geometry
+from app.assessment.utils import build_pdf_report, pdf_report_args, report_cache_key
+from app.jobs import job_handler
+from app.models import Team
+from app.websockets.events import broadcast_report_pack_progress
+
+STYLE_ORDER = ['DRIVER', 'EXPRESSIVE', 'AMIABLE', 'ANALYTICAL']
+# Progress events per pack, at most (plus the final one)
+PROGRESS_STEPS = 20
+
+
+class _ZipSink:
+    """Write-only file that hands back what zipfile wrote since the last drain.
+
+    It has no ``seek``, so zipfile streams entries with data descriptors.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def pack_filename(team):
+    """``Team_Name-reports.zip``, the download name of ``team``'s pack."""
+    return f'{secure_filename(team.name) or f"team-{team.id}"}-reports.zip'
+
+
+def member_filename(index, user):
+    """``03-Jane_Doe.pdf``; the index keeps names unique and in roster order."""
+    name = secure_filename(user.name or '') or f'member-{user.id}'
+    return f'{index:02d}-{name}.pdf'
+
+
+def build_team_summary_pdf(team_name, generated_at, members, pending):
+    """Build the summary page and return the PDF as bytes.
+
+    Runs in the render pool, so it takes plain data: ``members`` is a list of
+    ``(name, assertiveness, responsiveness, social_style)`` and ``pending``
+    the names of members without a result.
+    """
+    from reportlab.graphics.shapes import Circle, Drawing, Line, Rect, String
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    # Paragraph text is markup; team and member names are user input
+    styles = getSampleStyleSheet()
+    content = [
+        Paragraph(f'{escape(team_name)}: Team Social Styles', styles['Title']),
+        Paragraph(f'{len(members)} completed assessments, generated '
+                  f'{generated_at.strftime("%B %d, %Y")}', styles['Normal']),
+        Spacer(1, 0.2 * inch),
+    ]
+
+    # Group grid, oriented like every other grid (app/assessment/geometry.py):
+    # assertiveness left to right, responsiveness top (low) to bottom (high)
+    side = 4.5 * inch
+    margin = 0.4 * inch
+    grid = Drawing(side + 2 * margin, side + 2 * margin)
+    half = side / 2
+    quadrants = [('ANALYTICAL', 0, half), ('DRIVER', half, half),
+                 ('AMIABLE', 0, 0), ('EXPRESSIVE', half, 0)]
+    for style, x, y in quadrants:
+        color = colors.HexColor(geometry.QUADRANT_COLORS[style])
+        grid.add(Rect(margin + x, margin + y, half, half, fillColor=color, fillOpacity=0.12,
+                      strokeColor=colors.grey, strokeWidth=0.5))
+        grid.add(String(margin + x + half / 2, margin + y + half - 14, style, fontSize=9,
+                        textAnchor='middle', fillColor=color))
+    grid.add(Line(margin, margin + half, margin + side, margin + half, strokeColor=colors.grey))
+    grid.add(Line(margin + half, margin, margin + half, margin + side, strokeColor=colors.grey))
+    grid.add(String(margin + side / 2, 8, 'Assertiveness: ASKS (left) to TELLS (right)',
+                    fontSize=8, textAnchor='middle'))
+    grid.add(String(margin + side / 2, margin + side + 8,
+                    'Responsiveness: CONTROLS (top) to EMOTES (bottom)', fontSize=8,
+                    textAnchor='middle'))
+    for name, assertiveness, responsiveness, _ in members:
+        nx, ny = geometry.normalize_position(assertiveness, responsiveness)
+        x, y = margin + nx * side, margin + (1 - ny) * side
+        grid.add(Circle(x, y, 4, fillColor=colors.HexColor(
+            geometry.quadrant_color(assertiveness, responsiveness)), strokeColor=colors.white))
+        grid.add(String(x + 6, y - 3, name, fontSize=6))
+    content += [grid, Spacer(1, 0.2 * inch)]
+
+    # Style distribution
+    counts = {style: 0 for style in STYLE_ORDER}
+    for *_, style in members:
+        if style in counts:
+            counts[style] += 1
+    total = len(members) or 1
+    rows = [['Style', 'Members', 'Share']] + [
+        [style.title(), str(count), f'{100 * count / total:.0f}%'] for style, count in counts.items()]
+    table = Table(rows, colWidths=[2 * inch, 1 * inch, 1 * inch])
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ]))
+    content += [Paragraph('Style Distribution', styles['Heading2']), table]
+
+    if pending:
+        content += [Spacer(1, 0.2 * inch),
+                    Paragraph('Not yet completed: ' + escape(', '.join(pending)), styles['Normal'])]
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(content)
+    return buffer.getvalue()
+
+
+def iter_report_pack(team, roster, progress=None):
+    """Yield the ZIP archive for ``team`` in chunks.
+
+    ``roster`` is ``team.get_roster()``; members without a result appear
+    only on the summary page. Progress goes to ``progress(done, total)``
+    when given, and to the team's Socket.IO room otherwise.
+    """
+    completed = [entry for entry in roster if entry['result'] is not None]
+    total = len(completed) + 1
+    step = max(1, total // PROGRESS_STEPS)
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED)
+
+    def add(filename, pdf, done):
+        archive.writestr(filename, pdf)
+        if done % step == 0 or done == total:
+            if progress is not None:
+                progress(done, total)
+            else:
+                broadcast_report_pack_progress(team.id, done, total)
+        return sink.drain()
+
+    summary = render_pool.run(build_team_summary_pdf, team.name, datetime.utcnow(), [
+        (entry['user'].name or entry['user'].email, entry['result'].assertiveness_score,
+         entry['result'].responsiveness_score, entry['result'].social_style)
+        for entry in completed
+    ], [entry['user'].name or entry['user'].email for entry in roster if entry['result'] is None])
+    yield add('00-team-summary.pdf', summary, 1)
+
+    # Only which reports are missing is kept, not the cached PDFs themselves
+    missing = {entry['result'].id for entry in completed
+               if report_cache.get(report_cache_key(entry['result'].id)) is None}
+    built = render_pool.map(build_pdf_report, (
+        pdf_report_args(entry['result'], entry['user'])
+        for entry in completed if entry['result'].id in missing))
+    try:
+        for index, entry in enumerate(completed, 1):
+            key = report_cache_key(entry['result'].id)
+            if entry['result'].id in missing:
+                pdf = next(built)
+                report_cache.set(key, pdf)
+            else:
+                pdf = report_cache.get(key)
+                if pdf is None:
+                    # Evicted since the check above
+                    pdf = render_pool.run(build_pdf_report, *pdf_report_args(entry['result'], entry['user']))
+            yield add(member_filename(index, entry['user']), pdf, index + 1)
+    finally:
+        built.close()
+
+    archive.close()
+    yield sink.drain()
+
+
+@job_handler('team_report_pack')
+def report_pack_job(ctx, team_id):
+    """Write ``team_id``'s report pack to the job's download file."""
+    team = db.session.get(Team, team_id)
+    if team is None:
+        raise LookupError('The team no longer exists')
+    roster = team.get_roster()
+    with ctx.artifact(pack_filename(team), 'application/zip') as f:
+        for data in iter_report_pack(team, roster, progress=ctx.progress):
+            f.write(data)
+    reports = sum(1 for entry in roster if entry['result'] is not None)
+    return f'{reports} member reports'
@@ -1,14 +1,21 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify, current_app, abort, session
+from flask import (render_template, redirect, url_for, flash, request, jsonify, current_app, abort, session,
+                   stream_with_context)
 from flask_login import login_required, current_user, login_user
-from app import db
+from app import db, job_queue
 from app.team import team
 from app.models import Team, TeamMember, TeamInvite, User, Assessment
 from app.team.forms import TeamForm, InviteMembersForm, QuickRegisterForm
 from app.email import send_email
-import qrcode
-from io import BytesIO
-import base64
+from app.team.qr import team_join_qr, qr_version, clamp_box_size
+from app.team.invites import bulk_invite, emails_from_text, emails_from_csv, MAX_BULK_INVITES
+from app.team.report_pack import iter_report_pack, pack_filename
+from app.pagination import encode_cursor, decode_cursor
 from werkzeug.security import generate_password_hash
+import hashlib
+
+# QR images are immutable for a given ?v= (the token digest), so browsers and
+# proxies can keep them for a year; a renamed team gets a new URL.
+QR_MAX_AGE = 365 * 24 * 3600
 
 @team.route('/teams')
 @login_required
@@ -77,16 +84,7 @@ def view_team(team_id):
         return redirect(url_for('team.list_teams'))
     
     # Get all team members with their latest assessment results
-    team_members = []
-    for membership in team.members.all():
-        user = User.query.get(membership.user_id)
-        latest_result = user.get_latest_assessment_result()
-        team_members.append({
-            'user': user,
-            'role': membership.role,
-            'joined_at': membership.joined_at,
-            'latest_result': latest_result
-        })
+    team_members = team.get_roster()
     
     # Note: No longer displaying pending invites as they're auto-accepted
     is_owner = team.is_owner(current_user)
@@ -109,59 +107,50 @@ def invite_members(team_id):
     
     form = InviteMembersForm()
     if form.validate_on_submit():
-        emails = [email.strip() for email in form.emails.data.split(',')]
-        users_added = 0
-        invites_sent = 0
+        emails = emails_from_text(form.emails.data)
+        if form.csv_file.data:
+            emails.extend(emails_from_csv(form.csv_file.data.stream))
         
-        for email in emails:
-            if email:
-                # Check if already a member
-                user = User.query.filter_by(email=email).first()
-                if user and team.is_member(user):
-                    flash(f'{email} is already a member of this team.', 'info')
-                    continue
-                
-                # If user exists, add them directly to the team
-                if user:
-                    team.add_member(user)
-                    users_added += 1
-                    # Send notification email
-                    send_team_notification(team, user.email)
-                else:
-                    # Check if invitation already exists
-                    existing_invite = TeamInvite.query.filter_by(
-                        team_id=team.id, 
-                        email=email, 
-                        status='pending'
-                    ).first()
-                    
-                    if existing_invite:
-                        flash(f'An invitation for {email} is already pending.', 'info')
-                        continue
-                    
-                    # Create and send invitation for users who don't have accounts yet
-                    invite = TeamInvite(
-                        team_id=team.id,
-                        email=email,
-                        status='auto_accepted'  # Mark as auto-accepted
-                    )
-                    db.session.add(invite)
-                    send_team_invitation(invite)
-                    invites_sent += 1
+        if len(emails) > MAX_BULK_INVITES:
+            flash(f'Please invite at most {MAX_BULK_INVITES} people at a time.', 'danger')
+            return redirect(url_for('team.invite_members', team_id=team.id))
         
+        # Three set-based lookups and bulk inserts, however long the list is
+        result = bulk_invite(team, emails, exclude_email=current_user.email)
         db.session.commit()
+        send_invite_notifications(team, result)
         
-        if users_added > 0:
-            flash(f'{users_added} users have been added to the team!', 'success')
+        if result.added:
+            flash(f'{len(result.added)} users have been added to the team!', 'success')
         
-        if invites_sent > 0:
-            flash(f'{invites_sent} invitations sent to users who don\'t have accounts yet.', 'success')
+        if result.invited:
+            flash(f'{len(result.invited)} people without an account have been invited; '
+                  f'they join the team when they sign up.', 'success')
+        
+        if result.added or result.invited:
+            flash('Their notification emails are being sent in the background.', 'info')
+        
+        if result.skipped:
+            flash('You are already on this team, so your own address was skipped.', 'info')
+        
+        if result.already_members:
+            flash(f'{len(result.already_members)} already members of this team: '
+                  f'{summarize_emails(result.already_members)}', 'info')
+        
+        if result.already_invited:
+            flash(f'{len(result.already_invited)} invitations already pending: '
+                  f'{summarize_emails(result.already_invited)}', 'info')
+        
+        if result.invalid:
+            flash(f'{len(result.invalid)} invalid email addresses skipped: '
+                  f'{summarize_emails(result.invalid)}', 'warning')
         
         return redirect(url_for('team.view_team', team_id=team.id))
     
     return render_template('team/invite_members.html', 
                           team=team,
                           form=form,
+                          max_invites=MAX_BULK_INVITES,
                           title=f'Invite to {team.name}')
 
 @team.route('/teams/<int:team_id>/dashboard')
@@ -174,39 +163,21 @@ def team_dashboard(team_id):
         flash('You are not a member of this team.', 'danger')
         return redirect(url_for('team.list_teams'))
     
-    # Get all team members with their latest assessment results
-    team_members = []
-    for membership in team.members.all():
-        user = User.query.get(membership.user_id)
-        latest_result = user.get_latest_assessment_result()
-        if latest_result:  # Only include members with completed assessments
-            team_members.append({
-                'user': user,
-                'result': latest_result
-            })
+    # Only include members with completed assessments
+    team_members = team.get_roster(completed_only=True)
     
-    # Generate the team join QR code with Base62 token
+    # The join token is stable, so the QR image is served (and cached) separately
     token = team.generate_join_token()
     join_url = url_for('team.quick_join', token=token, _external=True)
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(join_url)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer)
-    qr_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    qr_url = url_for('team.team_qr', team_id=team.id, v=qr_version(token))
     
     return render_template('team/dashboard.html',
                           team=team,
                           members=team_members,
-                          qr_image=qr_image,
+                          qr_url=qr_url,
                           join_url=join_url,
+                          can_download_pack=team.is_owner(current_user) or current_user.is_admin,
+                          queue_report_pack=len(team_members) > current_app.config['REPORT_PACK_STREAM_LIMIT'],
                           title=f'{team.name} Dashboard')
 
 @team.route('/teams/<int:team_id>/present')
@@ -219,44 +190,93 @@ def team_presentation(team_id):
         flash('You are not a member of this team.', 'danger')
         return redirect(url_for('team.list_teams'))
     
-    # Get all team members with their latest assessment results
-    team_members = []
-    for membership in team.members.all():
-        user = User.query.get(membership.user_id)
-        latest_result = user.get_latest_assessment_result()
-        if latest_result:  # Only include members with completed assessments
-            team_members.append({
-                'user': user,
-                'result': latest_result
-            })
+    # Only include members with completed assessments
+    team_members = team.get_roster(completed_only=True)
     
-    # Generate the team join QR code with Base62 token
+    # The join token is stable, so the QR image is served (and cached) separately
     token = team.generate_join_token()
     join_url = url_for('team.quick_join', token=token, _external=True)
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(join_url)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer)
-    qr_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    qr_url = url_for('team.team_qr', team_id=team.id, v=qr_version(token))
     
     # Include dashboard grid data for the presentation view
     # The grid data will be passed to the template for cleaner display
     return render_template('team/presentation.html',
                           team=team,
                           members=team_members,
-                          qr_image=qr_image,
+                          qr_url=qr_url,
                           join_url=join_url,
                           team_id=team.id,
                           title=f'{team.name} - Presentation')
 
+@team.route('/teams/<int:team_id>/report-pack.zip')
+@login_required
+def team_report_pack(team_id):
+    """Download every member's PDF report plus a team summary as one ZIP.
+
+    The archive is streamed as the reports are built (app/team/report_pack.py).
+    Teams above REPORT_PACK_STREAM_LIMIT completed members are sent to
+    queue_report_pack instead, as their pack may not finish in one request.
+    """
+    team = Team.query.get_or_404(team_id)
+    
+    if not team.is_owner(current_user) and not current_user.is_admin:
+        flash('Only the team owner can download the team report pack.', 'danger')
+        return redirect(url_for('team.team_dashboard', team_id=team.id))
+    
+    roster = team.get_roster()
+    reports = sum(1 for entry in roster if entry['result'] is not None)
+    if reports > current_app.config['REPORT_PACK_STREAM_LIMIT']:
+        flash('This team is too large to download in one go. Use "Prepare All Reports" '
+              'to build the report pack in the background.', 'info')
+        return redirect(url_for('team.team_dashboard', team_id=team.id))
+    
+    filename = pack_filename(team)
+    return current_app.response_class(
+        stream_with_context(iter_report_pack(team, roster)),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Report-Count': str(reports),
+        })
+
+@team.route('/teams/<int:team_id>/report-pack', methods=['POST'])
+@login_required
+def queue_report_pack(team_id):
+    """Build the team report pack as a background job and show its progress."""
+    team = Team.query.get_or_404(team_id)
+    
+    if not team.is_owner(current_user) and not current_user.is_admin:
+        flash('Only the team owner can download the team report pack.', 'danger')
+        return redirect(url_for('team.team_dashboard', team_id=team.id))
+    
+    job = job_queue.enqueue('team_report_pack', current_user, team_id=team.id)
+    return redirect(url_for('main.job_detail', job_id=job.id))
+
+@team.route('/teams/<int:team_id>/qr.png')
+@login_required
+def team_qr(team_id):
+    """Serve the team join QR code as a cacheable PNG"""
+    team = Team.query.get_or_404(team_id)
+
+    if not team.is_member(current_user) and not current_user.is_admin:
+        abort(403)
+
+    box_size = clamp_box_size(request.args.get('box', type=int))
+    token = team.generate_join_token()
+    join_url = url_for('team.quick_join', token=token, _external=True)
+    png = team_join_qr(team.id, token, join_url, box_size)
+
+    response = current_app.response_class(png, mimetype='image/png')
+    response.set_etag(hashlib.sha1(png).hexdigest())
+    response.cache_control.private = True
+    if request.args.get('v') == qr_version(token):
+        response.cache_control.max_age = QR_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # Unversioned or stale URL: make clients revalidate against the ETag
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @team.route('/teams/<int:team_id>/remove/<int:user_id>', methods=['POST'])
 @login_required
 def remove_member(team_id, user_id):
@@ -320,22 +340,8 @@ def delete_team(team_id):
 @team.route('/join/<token>')
 def join(token):
     """Join a team using a token - redirects to quick_join with appropriate parameters"""
-    try:
-        # Parse the Base62 token
-        parts = token.split('-')
-        if len(parts) >= 2:
-            # Extract team name from token if present
-            team_name = parts[2].replace('_', ' ') if len(parts) > 2 else None
-            
-            # Find team by name or redirect to teams list
-            team = None
-            if team_name:
-                team = Team.query.filter_by(name=team_name).first()
-            
-            if team:
-                return redirect(url_for('team.quick_join', token=token))
-    except Exception as e:
-        current_app.logger.error(f"Error parsing join token: {e}")
+    if Team.from_join_token(token):
+        return redirect(url_for('team.quick_join', token=token))
     
     flash('Invalid or expired join link. Please ask for a new invitation.', 'danger')
     return redirect(url_for('main.index'))
@@ -357,69 +363,101 @@ def send_team_invitation(invite):
     
     return True
 
-def send_team_notification(team, email):
-    """Send a notification that the user has been added to a team"""
-    # Generate a direct link to the team
-    team_url = url_for('team.view_team', team_id=team.id, _external=True)
-    
-    send_email(
-        to=email,
-        subject=f"You've been added to the {team.name} team",
-        template='team/email/auto_added',
-        team=team,
-        token_url=team_url
+def send_invite_notifications(team, result):
+    """Queue the background job that emails a bulk invite's addresses.
+
+    The links are built here, where the request knows the external URL.
+    Returns the Job, or None when there is nobody to notify.
+    """
+    if not (result.invited or result.added):
+        return None
+    return job_queue.enqueue(
+        'invite_notifications', current_user,
+        team_id=team.id, invited=result.invited, added=result.added,
+        join_url=url_for('team.join', token=team.generate_join_token(), _external=True),
+        team_url=url_for('team.view_team', team_id=team.id, _external=True)
     )
-    
-    return True
+
+def summarize_emails(emails, limit=5):
+    """First few addresses of a list for a flash message"""
+    shown = ', '.join(emails[:limit])
+    return shown + (f' and {len(emails) - limit} more' if len(emails) > limit else '')
 
 @team.route('/teams/<int:team_id>/members-data')
 @login_required
 def team_members_data(team_id):
-    """JSON endpoint returning team members with assessment scores for live polling."""
+    """JSON endpoint returning team members with assessment scores for live polling.
+
+    Supports conditional GET: the response carries an ETag derived from
+    Team.get_roster_version() and a matching If-None-Match is answered with
+    304 before the roster is loaded. There is deliberately no Last-Modified:
+    a member leaving changes the roster without making anything newer.
+    Pass ``?since=<cursor>`` to get only members whose latest result is newer
+    than a cursor returned by a previous call. Cursors are the newest result's
+    ``(created_at, id)`` key (app/pagination.py), so a result written in the
+    same instant as the cursor's is still delivered. Every response lists the
+    current ``member_ids`` so a delta client can drop members who left.
+    """
     team_obj = Team.query.get_or_404(team_id)
 
     if not team_obj.is_member(current_user) and not current_user.is_admin:
         return jsonify({'error': 'Not authorized'}), 403
 
-    members = []
-    for membership in team_obj.members.all():
-        user = User.query.get(membership.user_id)
-        latest_result = user.get_latest_assessment_result()
-        if latest_result:
+    since = request.args.get('since')
+    if since:
+        try:
+            since = decode_cursor(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since cursor'}), 400
+
+    version = team_obj.get_roster_version()
+
+    if request.if_none_match.contains(version):
+        response = current_app.response_class(status=304)
+    else:
+        members = []
+        # The newest key among the members' latest results is the newest of
+        # the team's results; with nothing newer the cursor stays put
+        cursor = since or None
+        for entry in team_obj.get_roster(completed_only=True, results_after=cursor):
+            key = (entry['result'].created_at, entry['result'].id)
+            cursor = max(cursor, key) if cursor else key
             members.append({
-                'user_id': user.id,
-                'name': user.name,
-                'assertiveness_score': latest_result.assertiveness_score,
-                'responsiveness_score': latest_result.responsiveness_score,
-                'social_style': latest_result.social_style
+                'user_id': entry['user'].id,
+                'name': entry['user'].name,
+                'assertiveness_score': entry['result'].assertiveness_score,
+                'responsiveness_score': entry['result'].responsiveness_score,
+                'social_style': entry['result'].social_style
             })
 
-    return jsonify({'members': members})
+        if since:
+            member_ids = team_obj.get_completed_member_ids()
+        else:
+            member_ids = [member['user_id'] for member in members]
+
+        response = jsonify({
+            'members': members,
+            'member_ids': member_ids,
+            'cursor': encode_cursor(*cursor) if cursor else None,
+            'delta': bool(since)
+        })
+
+    response.set_etag(version)
+    # Let browsers cache the body but revalidate on every poll.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 @team.route('/quick-join/<token>', methods=['GET', 'POST'])
 def quick_join(token):
     """Streamlined join process initiated from QR code or join link using Base62 token"""
-    try:
-        # Parse the Base62 token: format is {id}-{random}-{team_name}
-        # Use maxsplit=2 so team names containing '-' are preserved
-        parts = token.split('-', 2)
-        team_name = parts[2].replace('_', ' ') if len(parts) > 2 else None
-        
-        # Find team by name
-        team = None
-        if team_name:
-            team = Team.query.filter_by(name=team_name).first()
-        
-        if not team:
-            flash('Invalid team link. Please ask for a new invitation.', 'danger')
-            return redirect(url_for('main.index'))
-    except Exception as e:
-        current_app.logger.error(f"Error parsing join token: {e}")
+    # Token format is {base62 id}-{signature}-{team_name}; resolved by primary key
+    team = Team.from_join_token(token)
+    if not team:
         flash('Invalid team link. Please ask for a new invitation.', 'danger')
         return redirect(url_for('main.index'))
     
     # Find the active assessment
-    from ..models.assessment import Assessment
     active_assessment = Assessment.query.first()
     assessment_id = active_assessment.id if active_assessment else 1
 
@@ -4,6 +4,8 @@ socketio = SocketIO()
 
 def init_websockets(app):
     """Initialize the WebSocket functionality"""
+    # Import the handlers before init_app so they are queued on the SocketIO
+    # object and bound to every server it creates, not just the first app's.
+    from . import events
+
     socketio.init_app(app, cors_allowed_origins="*")
-    
-    from . import events 
\ No newline at end of file
@@ -1,5 +1,6 @@
 from flask_socketio import emit, join_room
-from flask import request
+from flask import request, current_app
+from flask_login import current_user
 from . import socketio
 
 @socketio.on('connect')
@@ -14,18 +15,79 @@ def handle_disconnect():
 
 @socketio.on('join')
 def handle_join(data):
-    """Handle client joining a specific room"""
+    """Handle client joining a team room.
+
+    Accepts ``{'team_id': 3}`` or the legacy ``{'room': 'team_3'}``. Only
+    members of the team (or admins) may join, so result deltas never leak to
+    other teams' screens.
+    """
+    from app.models import Team
+
+    data = data or {}
+    team_id = data.get('team_id')
     room = data.get('room')
-    if room:
-        join_room(room)
-        emit('status', {'message': 'Joined room: ' + room}, room=room)
+    if team_id is None and room and room.startswith('team_'):
+        team_id = room[len('team_'):]
+
+    try:
+        team_id = int(team_id)
+    except (TypeError, ValueError):
+        emit('status', {'error': 'Unknown room'})
+        return
+
+    if not current_user.is_authenticated:
+        emit('status', {'error': 'Not authorized'})
+        return
+
+    team = Team.query.get(team_id)
+    if team is None or (not team.is_member(current_user) and not current_user.is_admin):
+        emit('status', {'error': 'Not authorized'})
+        return
+
+    room = f'team_{team.id}'
+    join_room(room)
+    emit('status', {'message': 'Joined room: ' + room, 'room': room})
 
-def broadcast_new_assessment(team_id, user_id, user_name, assertiveness_score, responsiveness_score):
+def broadcast_new_assessment(team_id, user_id, user_name, assertiveness_score, responsiveness_score,
+                             social_style=None):
     """Broadcast new assessment results to all clients in the team room"""
     socketio.emit('new_assessment_result', {
         'team_id': team_id,
         'user_id': user_id,
         'user_name': user_name,
         'assertiveness_score': assertiveness_score,
-        'responsiveness_score': responsiveness_score
-    }, room=f'team_{team_id}') 
\ No newline at end of file
+        'responsiveness_score': responsiveness_score,
+        'social_style': social_style
+    }, room=f'team_{team_id}')
+
+def notify_teams_of_result(user, result):
+    """Push a saved result to the live grid of every team the user belongs to.
+
+    Call after the result has been committed. Failures are logged rather than
+    raised: a dropped live update must never fail an assessment submission,
+    and polling clients will still pick the result up.
+    """
+    from app import db
+    from app.models import TeamMember
+
+    try:
+        team_ids = [row[0] for row in db.session.query(TeamMember.team_id).filter_by(user_id=user.id)]
+        for team_id in team_ids:
+            broadcast_new_assessment(
+                team_id,
+                user.id,
+                user.name,
+                result.assertiveness_score,
+                result.responsiveness_score,
+                social_style=result.social_style
+            )
+    except Exception as e:
+        current_app.logger.error(f"Error broadcasting assessment result: {e}")
+
+def broadcast_report_pack_progress(team_id, done, total):
+    """Tell the team room how far a report pack download has got."""
+    socketio.emit('report_pack_progress', {
+        'team_id': team_id,
+        'done': done,
+        'total': total
+    }, room=f'team_{team_id}')
@@ -33,6 +33,19 @@ class Config:
     AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
     
+    # Outbound mail queue (app/mail_queue.py): 'ses', 'file' or 'memory'.
+    # The queue lives in each process's memory: mail still queued when a
+    # gunicorn worker is recycled, restarted or crashes is lost, not retried
+    MAIL_TRANSPORT = os.environ.get('MAIL_TRANSPORT', 'ses')
+    MAIL_FILE_DIR = os.environ.get('MAIL_FILE_DIR', os.path.join(basedir, 'mail_outbox'))
+    MAIL_ASYNC = os.environ.get('MAIL_ASYNC', 'True').lower() in ['true', 'yes', '1']
+    MAIL_QUEUE_SIZE = int(os.environ.get('MAIL_QUEUE_SIZE', 1000))
+    MAIL_WORKERS = int(os.environ.get('MAIL_WORKERS', 2))
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 25))
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES', 3))
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF', 1.0))
+    MAIL_ENQUEUE_TIMEOUT = float(os.environ.get('MAIL_ENQUEUE_TIMEOUT', 10.0))
+    
     # CSRF settings
     WTF_CSRF_CHECK_DEFAULT = True
     WTF_CSRF_SSL_STRICT = False  # Disable strict referrer checking for better compatibility
@@ -42,6 +55,62 @@ class Config:
     APP_NAME = os.environ.get('APP_NAME', 'Social Styles Assessment')
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL')
     
+    # Rendered chart cache: in-process LRU plus an optional on-disk tier
+    # shared by all workers on the host (disabled when CHART_CACHE_DIR is unset)
+    CHART_CACHE_SIZE = int(os.environ.get('CHART_CACHE_SIZE', 256))
+    CHART_CACHE_DIR = os.environ.get('CHART_CACHE_DIR')
+    CHART_CACHE_DISK_BYTES = int(os.environ.get('CHART_CACHE_DISK_BYTES', 50 * 1024 * 1024))
+    # 'native' (Pillow/SVG templates, app/assessment/chart.py) or 'matplotlib'
+    CHART_RENDERER = os.environ.get('CHART_RENDERER', 'native')
+    # Team join QR images, same two tiers as the chart cache
+    QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', 128))
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR')
+    QR_CACHE_DISK_BYTES = int(os.environ.get('QR_CACHE_DISK_BYTES', 10 * 1024 * 1024))
+    # Rendered template fragments ({% cache %} blocks), same two tiers
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 256))
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR')
+    FRAGMENT_CACHE_DISK_BYTES = int(os.environ.get('FRAGMENT_CACHE_DISK_BYTES', 20 * 1024 * 1024))
+    # Finished PDF reports, keyed by result and report template version: the
+    # same two tiers plus an optional S3 tier shared by every host
+    REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE', 32))
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+    REPORT_CACHE_DISK_BYTES = int(os.environ.get('REPORT_CACHE_DISK_BYTES', 200 * 1024 * 1024))
+    REPORT_CACHE_S3_BUCKET = os.environ.get('REPORT_CACHE_S3_BUCKET')
+    REPORT_CACHE_S3_PREFIX = os.environ.get('REPORT_CACHE_S3_PREFIX', 'reports/')
+    REPORT_CACHE_S3_BYTES = int(os.environ.get('REPORT_CACHE_S3_BYTES', 1024 * 1024 * 1024))
+    # Render each new result's chart and PDF in the background right after it
+    # is committed; views wait up to PRERENDER_WAIT seconds for one in flight
+    PRERENDER_ENABLED = os.environ.get('PRERENDER_ENABLED', 'True').lower() in ['true', 'yes', '1']
+    PRERENDER_WORKERS = int(os.environ.get('PRERENDER_WORKERS', 2))
+    PRERENDER_WAIT = float(os.environ.get('PRERENDER_WAIT', 5.0))
+    # Process pool for matplotlib charts and PDF builds, keeping them off the
+    # eventlet hub. Each web worker has its own pool of RENDER_POOL_SIZE
+    # processes; by default the CPUs are divided between the WEB_WORKERS web
+    # processes of the host (as many as gunicorn_config.py starts), so the
+    # host runs about one render process per worker, not CPU count per worker.
+    # Children are replaced after RENDER_MAX_TASKS_PER_CHILD renders
+    WEB_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+    RENDER_POOL_ENABLED = os.environ.get('RENDER_POOL_ENABLED', 'True').lower() in ['true', 'yes', '1']
+    RENDER_POOL_SIZE = int(os.environ.get('RENDER_POOL_SIZE', 0)) or None
+    RENDER_QUEUE_SIZE = int(os.environ.get('RENDER_QUEUE_SIZE', 0)) or None
+    RENDER_TIMEOUT = float(os.environ.get('RENDER_TIMEOUT', 20.0))
+    RENDER_MAX_TASKS_PER_CHILD = int(os.environ.get('RENDER_MAX_TASKS_PER_CHILD', 100))
+    # Persistent background jobs (app/jobs.py): report packs, exports and
+    # re-scoring. Run by threads in each web process, or by `flask worker`
+    # with JOBS_IN_PROCESS off (the production default). Downloads are deleted
+    # after JOBS_ARTIFACT_TTL; web and worker must share JOBS_DIR
+    JOBS_IN_PROCESS = os.environ.get('JOBS_IN_PROCESS', 'True').lower() in ['true', 'yes', '1']
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 1))
+    JOBS_DIR = os.environ.get('JOBS_DIR', os.path.join(basedir, 'job_artifacts'))
+    JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 2.0))
+    JOBS_PROGRESS_INTERVAL = float(os.environ.get('JOBS_PROGRESS_INTERVAL', 1.0))
+    JOBS_ARTIFACT_TTL = int(os.environ.get('JOBS_ARTIFACT_TTL', 24 * 3600))
+    JOBS_STALE_AFTER = int(os.environ.get('JOBS_STALE_AFTER', 600))
+    JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 2))
+    # Teams with more completed members than this get their report pack as a
+    # background job rather than a streamed download
+    REPORT_PACK_STREAM_LIMIT = int(os.environ.get('REPORT_PACK_STREAM_LIMIT', 25))
+    
     @staticmethod
     def init_app(app):
         """Initialize the application with environment-specific settings"""
@@ -61,11 +130,19 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite://'  # In-memory database
     WTF_CSRF_ENABLED = False  # Disable CSRF during testing
+    MAIL_TRANSPORT = 'memory'  # Never reach AWS from tests
+    MAIL_ASYNC = False
+    PRERENDER_ENABLED = False  # Tests that need it switch it on
+    RENDER_POOL_ENABLED = False  # Render inline
+    JOBS_IN_PROCESS = False  # Tests run queued jobs with job_queue.run_pending()
+    JOBS_PROGRESS_INTERVAL = 0
 
 
 class ProductionConfig(Config):
     """Production environment configuration"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') 
+    # Jobs run in a separate `flask worker` process, off the web workers' hub
+    JOBS_IN_PROCESS = os.environ.get('JOBS_IN_PROCESS', 'False').lower() in ['true', 'yes', '1']
     
     @classmethod
     def init_app(cls, app):
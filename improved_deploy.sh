@@ -500,11 +500,33 @@ StartLimitIntervalSec=0
 WantedBy=multi-user.target
 EOF
     
+    # Background job worker (report packs, exports, re-scoring)
+    cat > socialstyles-worker.service << EOF
+[Unit]
+Description=Social Styles Assessment background jobs
+After=network.target
+
+[Service]
+User=$APP_NAME
+Group=www-data
+WorkingDirectory=$APP_DIR
+Environment="PATH=$APP_DIR/venv/bin"
+Environment="FLASK_APP=wsgi.py"
+ExecStart=$APP_DIR/venv/bin/flask worker
+Restart=always
+RestartSec=5
+StartLimitIntervalSec=0
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
     copy_to_remote "socialstyles.service" "/etc/systemd/system/socialstyles.service"
+    copy_to_remote "socialstyles-worker.service" "/etc/systemd/system/socialstyles-worker.service"
     run_remote "systemctl daemon-reload && \
-                systemctl enable socialstyles.service && \
-                systemctl start socialstyles.service"
-    rm socialstyles.service
+                systemctl enable socialstyles.service socialstyles-worker.service && \
+                systemctl start socialstyles.service socialstyles-worker.service"
+    rm socialstyles.service socialstyles-worker.service
     
     print_message "systemd service set up successfully!"
     return 0
@@ -639,7 +661,7 @@ update_app() {
                 sudo -u $APP_NAME venv/bin/pip install eventlet flask-socketio"
     
     # Restart services
-    run_remote "systemctl restart socialstyles.service && \
+    run_remote "systemctl restart socialstyles.service socialstyles-worker.service && \
                 systemctl restart nginx"
     
     print_message "Application updated successfully!"
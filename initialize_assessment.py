@@ -1,7 +1,8 @@
 import json
 import os
 from app import create_app, db
-from app.models.assessment import Assessment, AssessmentResult
+from app.models.assessment import Assessment, AssessmentResult, refresh_latest_results
+from app.models.rollup import discount_results
 
 def initialize_assessment():
     """Initialize the database with the Social Styles Assessment."""
@@ -17,7 +18,13 @@ def initialize_assessment():
             
             if existing_assessment:
                 # Delete any existing assessment results that reference this assessment
-                AssessmentResult.query.filter_by(assessment_id=existing_assessment.id).delete()
+                # (bulk, so take them out of the rollups and repoint the users'
+                # latest results by hand)
+                results = AssessmentResult.query.filter_by(assessment_id=existing_assessment.id)
+                user_ids = {user_id for user_id, in results.with_entities(AssessmentResult.user_id).distinct()}
+                discount_results(results)
+                results.delete()
+                refresh_latest_results(db.session.connection(), user_ids)
                 # Delete the existing assessment
                 db.session.delete(existing_assessment)
                 db.session.commit()
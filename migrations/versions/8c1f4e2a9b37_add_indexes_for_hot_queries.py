@@ -0,0 +1,45 @@
+"""Add indexes for hot assessment, team and statistics queries
+
+Revision ID: 8c1f4e2a9b37
+Revises: cd947c7d5a28
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1f4e2a9b37'
+down_revision = 'cd947c7d5a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assessment_results', schema=None) as batch_op:
+        batch_op.create_index('ix_assessment_results_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_assessment_results_assessment_id_social_style', ['assessment_id', 'social_style'], unique=False)
+        batch_op.create_index(batch_op.f('ix_assessment_results_social_style'), ['social_style'], unique=False)
+        batch_op.create_index(batch_op.f('ix_assessment_results_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('team_members', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_team_members_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_last_login'), ['last_login'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_created_at'))
+        batch_op.drop_index(batch_op.f('ix_users_last_login'))
+
+    with op.batch_alter_table('team_members', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_team_members_user_id'))
+
+    with op.batch_alter_table('assessment_results', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_assessment_results_created_at'))
+        batch_op.drop_index(batch_op.f('ix_assessment_results_social_style'))
+        batch_op.drop_index('ix_assessment_results_assessment_id_social_style')
+        batch_op.drop_index('ix_assessment_results_user_id_created_at')
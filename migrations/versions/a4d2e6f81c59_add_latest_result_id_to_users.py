@@ -0,0 +1,36 @@
+"""Add denormalized latest_result_id to users
+
+Revision ID: a4d2e6f81c59
+Revises: 8c1f4e2a9b37
+Create Date: 2026-10-18 11:02:47.530861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d2e6f81c59'
+down_revision = '8c1f4e2a9b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latest_result_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_users_latest_result_id', 'assessment_results',
+                                    ['latest_result_id'], ['id'], ondelete='SET NULL')
+
+    # Backfill; `flask backfill-latest-results` runs the same repair later
+    op.execute(
+        'UPDATE users SET latest_result_id = ('
+        'SELECT r.id FROM assessment_results r WHERE r.user_id = users.id '
+        'ORDER BY r.created_at DESC, r.id DESC LIMIT 1)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_users_latest_result_id', type_='foreignkey')
+        batch_op.drop_column('latest_result_id')
@@ -0,0 +1,83 @@
+"""Store assessment responses as 30 packed bytes instead of JSON
+
+Revision ID: b7e3c9d14f20
+Revises: a4d2e6f81c59
+Create Date: 2026-10-18 14:20:11.402317
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3c9d14f20'
+down_revision = 'a4d2e6f81c59'
+branch_labels = None
+depends_on = None
+
+RESPONSE_COUNT = 30
+CHUNK_SIZE = 1000
+
+
+# Codec copied from app.models.assessment so the migration does not change
+# if the model does.
+def pack(responses):
+    packed = bytearray(RESPONSE_COUNT)
+    for key, value in (responses or {}).items():
+        try:
+            index = int(key) - 1
+        except (TypeError, ValueError):
+            continue
+        # Anything that never was a valid answer is stored as unanswered
+        if 0 <= index < RESPONSE_COUNT and isinstance(value, int) and 0 <= value <= 255:
+            packed[index] = value
+    return bytes(packed)
+
+
+def unpack(packed):
+    return {str(i): value for i, value in enumerate(bytes(packed), 1) if value}
+
+
+def convert(source, target, encode):
+    """Copy ``source`` into ``target`` through ``encode``, in id order."""
+    conn = op.get_bind()
+    table = sa.table('assessment_results', sa.column('id', sa.Integer),
+                     sa.column(source), sa.column(target))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, table.c[source])
+            .where(table.c.id > last_id, table.c[source].isnot(None))
+            .order_by(table.c.id).limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        conn.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id')),
+            [{'row_id': row_id, target: encode(value)} for row_id, value in rows]
+        )
+
+
+def upgrade():
+    with op.batch_alter_table('assessment_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('responses_packed', sa.LargeBinary(length=RESPONSE_COUNT), nullable=True))
+
+    convert('responses', 'responses_packed', lambda value: pack(json.loads(value)))
+
+    with op.batch_alter_table('assessment_results', schema=None) as batch_op:
+        batch_op.drop_column('responses')
+        batch_op.alter_column('responses_packed', new_column_name='responses')
+
+
+def downgrade():
+    with op.batch_alter_table('assessment_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('responses_json', sa.Text(), nullable=True))
+
+    convert('responses', 'responses_json', lambda value: json.dumps(unpack(value)))
+
+    with op.batch_alter_table('assessment_results', schema=None) as batch_op:
+        batch_op.drop_column('responses')
+        batch_op.alter_column('responses_json', new_column_name='responses')
@@ -0,0 +1,62 @@
+"""Add daily rollup tables for admin analytics
+
+Revision ID: c3f58a1d6e92
+Revises: b7e3c9d14f20
+Create Date: 2026-10-18 15:41:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f58a1d6e92'
+down_revision = 'b7e3c9d14f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_signups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('daily_results',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('assessment_id', sa.Integer(), nullable=False),
+    sa.Column('social_style', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'assessment_id', 'social_style')
+    )
+    op.create_table('daily_active_users',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+    # Backfill; `flask rollup` recomputes signups and results the same way.
+    # Only each user's latest login is known, so past active-user counts start
+    # as a lower bound and are exact from here on.
+    op.execute(
+        'INSERT INTO daily_signups (day, total) '
+        'SELECT date(created_at), COUNT(*) FROM users '
+        'WHERE created_at IS NOT NULL GROUP BY date(created_at)'
+    )
+    op.execute(
+        "INSERT INTO daily_results (day, assessment_id, social_style, total) "
+        "SELECT date(created_at), assessment_id, COALESCE(social_style, ''), COUNT(*) "
+        "FROM assessment_results WHERE created_at IS NOT NULL "
+        "GROUP BY date(created_at), assessment_id, COALESCE(social_style, '')"
+    )
+    op.execute(
+        'INSERT INTO daily_active_users (day, total) '
+        'SELECT date(last_login), COUNT(*) FROM users '
+        'WHERE last_login IS NOT NULL GROUP BY date(last_login)'
+    )
+
+
+def downgrade():
+    op.drop_table('daily_active_users')
+    op.drop_table('daily_results')
+    op.drop_table('daily_signups')
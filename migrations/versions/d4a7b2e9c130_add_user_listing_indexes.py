@@ -0,0 +1,31 @@
+"""Add indexes for keyset pagination and prefix search of users
+
+Revision ID: d4a7b2e9c130
+Revises: c3f58a1d6e92
+Create Date: 2026-10-18 16:52:08.774519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7b2e9c130'
+down_revision = 'c3f58a1d6e92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        # (created_at, id) serves everything the single-column index did
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.drop_index('ix_users_created_at')
+    op.create_index('ix_users_lower_name', 'users', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_name', table_name='users')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at', ['created_at'], unique=False)
+        batch_op.drop_index('ix_users_created_at_id')
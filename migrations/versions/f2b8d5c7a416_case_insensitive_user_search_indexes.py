@@ -0,0 +1,35 @@
+"""Index lower(email) and use text_pattern_ops for user prefix search
+
+Revision ID: f2b8d5c7a416
+Revises: e6c2f4a8d913
+Create Date: 2026-10-18 20:41:19.306822
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d5c7a416'
+down_revision = 'e6c2f4a8d913'
+branch_labels = None
+depends_on = None
+
+
+def _lower(column):
+    # PostgreSQL serves LIKE 'x%' from the index only with text_pattern_ops
+    if op.get_bind().dialect.name == 'postgresql':
+        return sa.text(f'lower({column}) text_pattern_ops')
+    return sa.text(f'lower({column})')
+
+
+def upgrade():
+    op.drop_index('ix_users_lower_name', table_name='users')
+    op.create_index('ix_users_lower_name', 'users', [_lower('name')], unique=False)
+    op.create_index('ix_users_lower_email', 'users', [_lower('email')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_email', table_name='users')
+    op.drop_index('ix_users_lower_name', table_name='users')
+    op.create_index('ix_users_lower_name', 'users', [sa.text('lower(name)')], unique=False)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Startup benchmark: measure create_app() wall time and memory in fresh processes.
+
+Each run starts a clean interpreter, imports the app package, calls
+create_app() and reports the wall time, the RSS before and after, and which
+heavy optional dependencies ended up loaded. Run it on two commits to compare
+before/after a change.
+
+Usage:
+  python scripts/bench_startup.py
+  python scripts/bench_startup.py --runs 10 --config testing
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    'matplotlib', 'matplotlib.pyplot', 'numpy', 'pandas',
+    'reportlab', 'reportlab.platypus', 'qrcode', 'boto3', 'botocore', 'PIL',
+]
+
+CHILD = r'''
+import json, os, sys, time
+
+def rss_kb():
+    # Current resident set size; falls back to peak RSS where /proc is missing.
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+sys.path.insert(0, os.environ['BENCH_ROOT'])
+rss_before = rss_kb()
+start = time.perf_counter()
+from app import create_app
+create_app(os.environ['BENCH_CONFIG'])
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'rss_before_kb': rss_before,
+    'rss_after_kb': rss_kb(),
+    'loaded': [m for m in json.loads(os.environ['BENCH_MODULES']) if m in sys.modules],
+}))
+'''
+
+
+def run_once(config_name):
+    env = dict(os.environ, BENCH_ROOT=ROOT, BENCH_CONFIG=config_name,
+               BENCH_MODULES=json.dumps(HEAVY_MODULES))
+    proc = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh processes to sample')
+    parser.add_argument('--config', default='testing', help='Config name passed to create_app')
+    args = parser.parse_args()
+
+    samples = [run_once(args.config) for _ in range(args.runs)]
+    times = [s['seconds'] for s in samples]
+    rss_after = [s['rss_after_kb'] for s in samples]
+    rss_delta = [s['rss_after_kb'] - s['rss_before_kb'] for s in samples]
+
+    print(f"create_app('{args.config}') over {args.runs} fresh processes")
+    print(f"  wall time : median {statistics.median(times) * 1000:.0f} ms "
+          f"(min {min(times) * 1000:.0f}, max {max(times) * 1000:.0f})")
+    print(f"  RSS after : median {statistics.median(rss_after) / 1024:.1f} MiB")
+    print(f"  RSS added : median {statistics.median(rss_delta) / 1024:.1f} MiB")
+    print(f"  heavy modules loaded: {', '.join(samples[-1]['loaded']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
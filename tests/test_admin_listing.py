@@ -0,0 +1,184 @@
+"""
+Tests for keyset pagination, prefix search and streaming in the admin listings.
+"""
+
+import pytest
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.admin import views
+from app.models import User, Assessment, AssessmentResult
+from app.pagination import keyset_page, encode_cursor, decode_cursor, starts_with
+
+BASE = datetime(2024, 1, 1, 12)
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def admin_client(app):
+    admin = User(email='admin@example.com', name='Admin', is_admin=True, created_at=BASE)
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+    return client
+
+
+def add_users(count, same_time_every=3):
+    # Several users share each created_at so the id tie-break matters
+    users = [User(email=f'member{i:03d}@example.com', name=f'Member {i:03d}',
+                  created_at=BASE + timedelta(hours=1 + i // same_time_every))
+             for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+class TestCursor:
+
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(BASE, 42)) == (BASE, 42)
+
+    @pytest.mark.parametrize('cursor', ['', 'not-base64!', encode_cursor(BASE, 1)[:-3] + 'x'])
+    def test_malformed_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_starts_with(self, app):
+        add_users(3)
+        db.session.add(User(email='other@example.com', name='memberz'))
+        db.session.commit()
+        matched = User.query.filter(starts_with(User.email, 'member')).count()
+        assert matched == 3
+
+    def test_starts_with_is_like_on_postgresql(self):
+        clause = starts_with(User.email, 'a_b%')
+        compiled = clause.compile(dialect=postgresql.dialect())
+        assert str(compiled) == "users.email LIKE %(email_1)s ESCAPE '/'"
+        assert list(compiled.params.values()) == ['a/_b/%%']
+
+
+class TestKeysetPage:
+
+    def test_pages_cover_every_row_once(self, app):
+        users = add_users(23)
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(User.query, User.created_at, User.id, cursor, limit=5)
+            seen.extend(user.id for user in page.items)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        expected = sorted(users, key=lambda user: (user.created_at, user.id), reverse=True)
+        assert seen == [user.id for user in expected]
+
+    def test_last_page_has_no_cursor(self, app):
+        add_users(5)
+        assert keyset_page(User.query, User.created_at, User.id, limit=5).next_cursor is None
+
+
+class TestUsersPage:
+
+    def test_paginates(self, app, admin_client, monkeypatch):
+        monkeypatch.setattr(views, 'USERS_PER_PAGE', 10)
+        add_users(15)
+        first = admin_client.get('/admin/users').get_data(as_text=True)
+        assert 'member014@example.com' in first and 'member005@example.com' in first
+        assert 'member004@example.com' not in first
+        assert 'Older' in first
+        cursor = first.split('after=')[1].split('"')[0]
+
+        second = admin_client.get(f'/admin/users?after={cursor}').get_data(as_text=True)
+        assert 'admin@example.com' in second
+        assert 'member014@example.com' not in second
+        assert 'Older' not in second
+
+    def test_bad_cursor_is_rejected(self, app, admin_client):
+        assert admin_client.get('/admin/users?after=garbage').status_code == 400
+
+    def test_search_by_email_or_name_prefix(self, app, admin_client):
+        add_users(3)
+        db.session.add(User(email='zed@example.com', name='Carol Member'))
+        db.session.add(User(email='carol@example.com', name='Zed'))
+        db.session.commit()
+
+        html = admin_client.get('/admin/users?q=Carol').get_data(as_text=True)
+        assert 'carol@example.com' in html and 'zed@example.com' in html
+        assert 'member000@example.com' not in html
+
+        html = admin_client.get('/admin/users?q=MEMBER00').get_data(as_text=True)
+        assert 'member001@example.com' in html and 'carol@example.com' not in html
+
+    def test_search_ignores_the_case_emails_were_stored_in(self, app, admin_client):
+        db.session.add(User(email='Mixed.Case@Example.com', name='Zed'))
+        db.session.commit()
+        assert 'Mixed.Case@Example.com' in admin_client.get('/admin/users?q=mixed').get_data(as_text=True)
+
+    def test_search_uses_indexes(self, app):
+        add_users(3)
+        query = views.user_search(User.query, 'mem').order_by(User.created_at.desc(), User.id.desc())
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(str(row[-1]) for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)))
+        assert 'ix_users_lower_email' in plan and 'ix_users_lower_name' in plan
+        assert 'SCAN users' not in plan
+
+
+class TestUsersJson:
+
+    def test_streams_all_matching_users_in_chunks(self, app, admin_client, monkeypatch):
+        monkeypatch.setattr(views, 'STREAM_CHUNK_SIZE', 4)
+        add_users(11)
+        resp = admin_client.get('/admin/users.json')
+        assert resp.is_streamed
+        payload = json.loads(resp.get_data(as_text=True))
+        assert len(payload['users']) == 12
+        assert payload['users'][-1]['email'] == 'admin@example.com'
+        assert set(payload['users'][0]) == {'id', 'name', 'email', 'created_at', 'last_login', 'is_admin'}
+
+        searched = json.loads(admin_client.get('/admin/users.json?q=member01').get_data(as_text=True))
+        assert [u['email'] for u in searched['users']] == ['member010@example.com']
+
+    def test_empty_listing(self, app, admin_client):
+        payload = json.loads(admin_client.get('/admin/users.json?q=nobody').get_data(as_text=True))
+        assert payload == {'users': []}
+
+
+class TestUserDetail:
+
+    def test_results_are_paged(self, app, admin_client, monkeypatch):
+        monkeypatch.setattr(views, 'RESULTS_PER_PAGE', 3)
+        user = add_users(1)[0]
+        assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+        db.session.add(assessment)
+        db.session.flush()
+        for day in range(5):
+            db.session.add(AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                            assertiveness_score=3.0, responsiveness_score=2.0,
+                                            social_style='DRIVER', created_at=BASE + timedelta(days=day)))
+        db.session.commit()
+
+        html = admin_client.get(f'/admin/users/{user.id}').get_data(as_text=True)
+        assert html.count('Completed Assessment') == 3
+        assert '>5</span>' in html
+        cursor = html.split('after=')[1].split('"')[0]
+        html = admin_client.get(f'/admin/users/{user.id}?after={cursor}').get_data(as_text=True)
+        assert html.count('Completed Assessment') == 2
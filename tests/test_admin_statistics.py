@@ -0,0 +1,125 @@
+"""
+Tests for the aggregated admin statistics page (app/admin/stats.py).
+"""
+
+import pytest
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.admin.stats import month_starts, statistics_context
+from app.models import User, Assessment, AssessmentResult
+
+NOW = datetime(2024, 3, 31, 12, 0)
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def count_selects():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_user(created, last_login=None):
+    user = User(email=f'user-{created:%Y%m%d%H%M}@example.com', name='User',
+                created_at=created, last_login=last_login)
+    db.session.add(user)
+    return user
+
+
+def seed(results_per_style=1, owner_email='owner@example.com'):
+    assessment = Assessment(name='Social Styles', questions='[]')
+    owner = User(email=owner_email, name='Owner', created_at=datetime(2023, 1, 5))
+    db.session.add_all([assessment, owner])
+    db.session.flush()
+    for style in ('DRIVER', 'DRIVER', 'AMIABLE', 'ANALYTICAL'):
+        for _ in range(results_per_style):
+            db.session.add(AssessmentResult(user_id=owner.id, assessment_id=assessment.id,
+                                            social_style=style, created_at=datetime(2024, 2, 29, 23, 59)))
+    db.session.commit()
+
+
+class TestMonthWindows:
+
+    def test_calendar_months_at_month_end(self):
+        # timedelta(days=30) steps from March 31 skipped February entirely
+        assert [d.strftime('%Y-%m') for d in month_starts(NOW)] == [
+            '2023-10', '2023-11', '2023-12', '2024-01', '2024-02', '2024-03']
+
+    def test_crosses_year_boundary(self):
+        assert month_starts(datetime(2024, 1, 15), count=2) == [datetime(2023, 12, 1), datetime(2024, 1, 1)]
+
+
+class TestStatisticsContext:
+
+    def test_buckets(self, app):
+        seed()
+        add_user(datetime(2024, 2, 29, 23, 59), last_login=datetime(2024, 3, 25, 9))   # a Monday
+        add_user(datetime(2024, 3, 1, 0, 0), last_login=datetime(2024, 3, 30, 9))     # a Saturday
+        add_user(datetime(2023, 9, 30, 23, 59), last_login=datetime(2024, 1, 7, 9))   # Sunday, too old
+        db.session.commit()
+
+        context = statistics_context(NOW)
+        assert context['month_labels'][0] == 'Oct 2023'
+        assert context['user_counts'] == [0, 0, 0, 0, 1, 1]
+        assert context['result_counts'] == [0, 0, 0, 0, 4, 0]
+        assert context['style_counts'] == [2, 0, 1, 1]
+        assert context['total_results'] == 4
+        assert context['total_users'] == 4
+        assert (context['active_users_30d'], context['active_users_7d']) == (2, 2)
+        assert context['day_counts'] == [1, 0, 0, 0, 0, 1, 1]
+
+
+class TestStatisticsPage:
+
+    def login_admin(self, app):
+        admin = User(email='admin@example.com', name='Admin', is_admin=True)
+        db.session.add(admin)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.id)
+            sess['_fresh'] = True
+        return client
+
+    def test_query_count_is_constant(self, app):
+        client = self.login_admin(app)
+        seed(results_per_style=1)
+        with count_selects() as small:
+            assert client.get('/admin/statistics').status_code == 200
+
+        seed(results_per_style=25, owner_email='owner2@example.com')
+        for month in range(1, 13):
+            add_user(datetime(2023, month, 10), last_login=datetime(2024, 3, month))
+        db.session.commit()
+        with count_selects() as large:
+            resp = client.get('/admin/statistics')
+        assert resp.status_code == 200
+        # current user + six aggregates
+        assert len(small) == len(large) == 7
+        assert not any('EXTRACT' in statement.upper() for statement in large)
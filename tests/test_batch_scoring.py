@@ -0,0 +1,121 @@
+"""
+Tests for the vectorized scoring engine and the rescore-results command.
+"""
+
+import pytest
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.assessment import geometry
+from app.assessment.scoring import score_batch, score_matrix, response_matrix
+from app.models import User, Assessment, AssessmentResult
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def reference_score(responses):
+    """The original per-row scoring loop."""
+    assertiveness = sum(responses.get(str(i), 0) for i in range(1, 16)) / 15
+    responsiveness = sum(responses.get(str(i), 0) for i in range(16, 31)) / 15
+    return assertiveness, responsiveness, geometry.quadrant(assertiveness, responsiveness)
+
+
+def random_responses(rng, drop=0.0):
+    return {str(i): rng.randint(1, 4) for i in range(1, 31) if rng.random() >= drop}
+
+
+class TestScoreBatch:
+
+    def test_matches_reference_scoring(self):
+        rng = random.Random(13)
+        response_sets = [random_responses(rng, drop=0.1) for _ in range(500)]
+        for responses, scored in zip(response_sets, score_batch(response_sets)):
+            expected = reference_score(responses)
+            assert scored[0] == pytest.approx(expected[0], abs=1e-12)
+            assert scored[1] == pytest.approx(expected[1], abs=1e-12)
+            assert scored[2] == expected[2]
+
+    @pytest.mark.parametrize("a,r", [(2.5, 2.5), (2.5, 2.6), (2.6, 2.5), (2.49, 2.51), (1, 4), (4, 1)])
+    def test_style_matches_quadrant_at_boundaries(self, a, r):
+        matrix = [[a] * 15 + [r] * 15]
+        _, _, styles = score_matrix(matrix)
+        assert styles[0] == geometry.quadrant(a, r)
+
+    def test_returns_plain_python_values(self):
+        (a, r, style), = score_batch([{str(i): 3 for i in range(1, 31)}])
+        assert type(a) is float and type(r) is float and type(style) is str
+
+    def test_accepts_json_strings_and_ignores_unknown_keys(self):
+        responses = {str(i): 4 for i in range(1, 31)}
+        responses.update({'comment': 'hi', '31': 4})
+        (a, r, style), = score_batch([json.dumps(responses)])
+        assert (a, r, style) == (4.0, 4.0, 'EXPRESSIVE')
+
+    def test_missing_answers_count_as_zero(self):
+        matrix = response_matrix([{'1': 4}])
+        assert matrix.shape == (1, 30)
+        assert matrix.sum() == 4
+
+    def test_empty_batch(self):
+        assert score_batch([]) == []
+
+
+class TestRescoreCommand:
+
+    def make_results(self, count):
+        assessment = Assessment(name='Social Styles', questions='[]')
+        user = User(email='rescore@example.com', name='Rescore')
+        db.session.add_all([assessment, user])
+        db.session.flush()
+        rng = random.Random(7)
+        results = []
+        for _ in range(count):
+            result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                      assertiveness_score=0.0, responsiveness_score=0.0,
+                                      social_style='STALE')
+            result.set_responses(random_responses(rng))
+            results.append(result)
+        db.session.add_all(results)
+        # One row without responses is left alone
+        db.session.add(AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                        social_style='DRIVER'))
+        db.session.commit()
+        return results
+
+    def test_rescores_in_chunks(self, app):
+        results = self.make_results(7)
+        outcome = app.test_cli_runner().invoke(args=['rescore-results', '--chunk-size', '3'])
+        assert outcome.exit_code == 0, outcome.output
+        assert 'Updated 7 of 7 results (7 changed style)' in outcome.output
+
+        db.session.expire_all()
+        for result in results:
+            expected = reference_score(result.get_responses())
+            assert result.assertiveness_score == pytest.approx(expected[0])
+            assert result.responsiveness_score == pytest.approx(expected[1])
+            assert result.social_style == expected[2]
+        assert AssessmentResult.query.filter_by(responses=None).one().social_style == 'DRIVER'
+
+        again = app.test_cli_runner().invoke(args=['rescore-results'])
+        assert 'Updated 0 of 7 results' in again.output
+
+    def test_dry_run_writes_nothing(self, app):
+        self.make_results(4)
+        outcome = app.test_cli_runner().invoke(args=['rescore-results', '--dry-run'])
+        assert 'Would update 4 of 4 results' in outcome.output
+        db.session.expire_all()
+        assert AssessmentResult.query.filter_by(social_style='STALE').count() == 4
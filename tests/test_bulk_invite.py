@@ -0,0 +1,212 @@
+"""
+Tests for the bulk team invite pipeline (app/team/invites.py).
+"""
+
+import pytest
+import io
+import os
+import sys
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, job_queue, mailer
+from app.models import User, Team, TeamMember, TeamInvite, Job
+from app.team import invites
+from app.team.invites import bulk_invite, normalize_emails, emails_from_text, emails_from_csv
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def team_setup(app):
+    owner = User(email='owner@example.com', name='Owner')
+    member = User(email='member@example.com', name='Member')
+    outsider = User(email='outsider@example.com', name='Outsider')
+    db.session.add_all([owner, member, outsider])
+    db.session.flush()
+    team = Team(name='Bulk Team', owner_id=owner.id)
+    db.session.add(team)
+    db.session.flush()
+    db.session.add_all([
+        TeamMember(team_id=team.id, user_id=owner.id, role='owner'),
+        TeamMember(team_id=team.id, user_id=member.id),
+        TeamInvite(team_id=team.id, email='pending@example.com', status='pending'),
+    ])
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(owner.id)
+        sess['_fresh'] = True
+    return {'team': team, 'client': client, 'outsider': outsider}
+
+
+@contextmanager
+def count_selects():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+class TestParsing:
+
+    def test_normalize_dedupes_and_lowercases(self):
+        valid, invalid = normalize_emails(['A@Example.com', ' a@example.com ', '<b@example.com>',
+                                           'not-an-email', '', 'c@example'])
+        assert valid == ['a@example.com', 'b@example.com']
+        assert invalid == ['not-an-email', 'c@example']
+
+    def test_text_accepts_commas_semicolons_and_newlines(self):
+        assert emails_from_text('a@x.com, b@x.com;c@x.com\nd@x.com') == [
+            'a@x.com', 'b@x.com', 'c@x.com', 'd@x.com']
+
+    def test_csv_with_email_header(self):
+        data = b'\xef\xbb\xbfName,Email,Department\nAda,ada@x.com,R&D\nBob,bob@x.com,Ops\n'
+        assert emails_from_csv(io.BytesIO(data)) == ['ada@x.com', 'bob@x.com']
+
+    def test_csv_without_header(self):
+        data = b'ada@x.com\nbob@x.com,extra\n'
+        assert emails_from_csv(io.BytesIO(data)) == ['ada@x.com', 'bob@x.com']
+
+
+class TestBulkInvite:
+
+    def test_sorts_addresses_into_outcomes(self, app, team_setup):
+        team = team_setup['team']
+        result = bulk_invite(team, ['member@example.com', 'OUTSIDER@example.com', 'pending@example.com',
+                                    'new@example.com', 'new@example.com', 'broken'])
+        db.session.commit()
+
+        assert result.already_members == ['member@example.com']
+        assert result.added == ['outsider@example.com']
+        assert result.already_invited == ['pending@example.com']
+        assert result.invited == ['new@example.com']
+        assert result.invalid == ['broken']
+        assert team.is_member(team_setup['outsider'])
+        invite = TeamInvite.query.filter_by(team_id=team.id, email='new@example.com').one()
+        assert invite.status == 'auto_accepted'
+        assert invite.token and invite.expires_at
+
+    def test_excluded_address_is_skipped(self, app, team_setup):
+        result = bulk_invite(team_setup['team'], ['owner@example.com', 'x@example.com'],
+                             exclude_email='Owner@example.com')
+        assert result.skipped == ['owner@example.com']
+        assert result.invited == ['x@example.com']
+
+    def test_query_count_does_not_grow_with_list(self, app, team_setup):
+        team = team_setup['team']
+        team.id  # load before counting
+        with count_selects() as small:
+            bulk_invite(team, [f'small{i}@example.com' for i in range(5)] + ['outsider@example.com'])
+        db.session.rollback()
+        team.id
+        with count_selects() as large:
+            bulk_invite(team, [f'large{i}@example.com' for i in range(400)] + ['outsider@example.com'])
+        assert len(small) == len(large) == 3
+
+    def test_long_lists_are_chunked(self, app, team_setup, monkeypatch):
+        monkeypatch.setattr(invites, 'CHUNK_SIZE', 10)
+        team = team_setup['team']
+        team.id  # load before counting
+        emails = [f'user{i}@example.com' for i in range(25)]
+        with count_selects() as statements:
+            result = bulk_invite(team, emails)
+        assert len(result.invited) == 25
+        assert len(statements) == 6  # users + pending invites for each of 3 chunks
+
+
+class TestInviteRoute:
+
+    def test_text_invites_queue_one_email_each(self, app, team_setup):
+        team = team_setup['team']
+        resp = team_setup['client'].post(f'/team/teams/{team.id}/invite', data={
+            'emails': 'outsider@example.com, new1@example.com\nnew2@example.com, member@example.com'})
+        assert resp.status_code == 302
+        assert mailer.transport.outbox == []  # sent by the background job
+        job_queue.run_pending()
+        assert sorted(m.to for m in mailer.transport.outbox) == [
+            'new1@example.com', 'new2@example.com', 'outsider@example.com']
+
+    def test_csv_upload_of_a_department(self, app, team_setup):
+        team = team_setup['team']
+        rows = 'email\n' + '\n'.join(f'person{i}@dept.example.com' for i in range(1500))
+        with count_selects() as statements:
+            resp = team_setup['client'].post(
+                f'/team/teams/{team.id}/invite',
+                data={'emails': '', 'csv_file': (io.BytesIO(rows.encode()), 'dept.csv')},
+                content_type='multipart/form-data')
+        assert resp.status_code == 302
+        assert TeamInvite.query.filter_by(team_id=team.id, status='auto_accepted').count() == 1500
+        # Lookups are chunked (3 chunks of 500); nothing is per-address
+        assert len(statements) < 30
+        job_queue.run_pending()
+        assert len(mailer.transport.outbox) == 1500
+
+    def test_requires_addresses_or_file(self, app, team_setup):
+        team = team_setup['team']
+        resp = team_setup['client'].post(f'/team/teams/{team.id}/invite', data={'emails': ''})
+        assert resp.status_code == 200
+        assert 'Enter at least one email address' in resp.get_data(as_text=True)
+
+    def test_rejects_oversized_lists(self, app, team_setup, monkeypatch):
+        monkeypatch.setattr('app.team.routes.MAX_BULK_INVITES', 3)
+        team = team_setup['team']
+        resp = team_setup['client'].post(f'/team/teams/{team.id}/invite', data={
+            'emails': 'a@x.com, b@x.com, c@x.com, d@x.com'})
+        assert resp.status_code == 302
+        assert TeamInvite.query.filter_by(team_id=team.id).count() == 1
+
+    def test_lists_longer_than_the_mail_queue_are_all_sent(self, app, team_setup):
+        app.config.update(MAIL_ASYNC=True, MAIL_QUEUE_SIZE=2)
+        mailer.init_app(app)
+        try:
+            team = team_setup['team']
+            emails = ', '.join(f'new{i}@example.com' for i in range(7))
+            resp = team_setup['client'].post(f'/team/teams/{team.id}/invite', data={'emails': emails})
+            assert resp.status_code == 302
+            assert TeamInvite.query.filter_by(team_id=team.id, status='auto_accepted').count() == 7
+            job_queue.run_pending()
+            mailer.join()
+            assert len(mailer.transport.outbox) == 7
+            assert Job.query.one().message == 'Queued 7 of 7 invitation emails and 0 of 0 added-member emails.'
+        finally:
+            mailer.shutdown()
+
+    def test_added_and_invited_are_reported_separately(self, app, team_setup, monkeypatch):
+        monkeypatch.setattr(invites, 'send_bulk_email', lambda recipients, **kwargs: len(recipients) - 1)
+        team = team_setup['team']
+        resp = team_setup['client'].post(f'/team/teams/{team.id}/invite', data={
+            'emails': 'new1@example.com, new2@example.com, outsider@example.com'}, follow_redirects=True)
+        page = resp.get_data(as_text=True)
+        assert '1 users have been added' in page
+        assert '2 people without an account have been invited' in page
+        job_queue.run_pending()
+        assert Job.query.one().message == 'Queued 1 of 2 invitation emails and 0 of 1 added-member emails.'
+
+    def test_inviting_yourself_is_skipped(self, app, team_setup):
+        team = team_setup['team']
+        resp = team_setup['client'].post(f'/team/teams/{team.id}/invite', data={
+            'emails': 'OWNER@example.com, new1@example.com'}, follow_redirects=True)
+        assert 'your own address was skipped' in resp.get_data(as_text=True)
+        job_queue.run_pending()
+        assert [m.to for m in mailer.transport.outbox] == ['new1@example.com']
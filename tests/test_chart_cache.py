@@ -0,0 +1,141 @@
+"""
+Tests for the rendered-chart cache (app/cache.py) and its use by
+generate_social_style_chart.
+"""
+
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, chart_cache
+from app.cache import MemoryCache, DiskCache, TieredCache
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestMemoryCache:
+
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', b'1')
+        cache.set('b', b'2')
+        cache.get('a')  # 'b' is now the least recently used
+        cache.set('c', b'3')
+        assert cache.get('a') == b'1'
+        assert cache.get('b') is None
+        assert cache.get('c') == b'3'
+
+    def test_zero_size_disables_caching(self):
+        cache = MemoryCache(max_entries=0)
+        cache.set('a', b'1')
+        assert cache.get('a') is None
+
+
+class TestDiskCache:
+
+    def test_round_trip_and_delete(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        cache.set('key', b'payload')
+        assert cache.get('key') == b'payload'
+        cache.delete('key')
+        assert cache.get('key') is None
+
+    def test_size_bounded_eviction(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=250)
+        for i in range(5):
+            cache.set(f'key{i}', b'x' * 100)
+            # Give each entry a distinct, increasing mtime.
+            os.utime(cache._path(f'key{i}'), (1000 + i, 1000 + i))
+        assert cache.size() <= 250
+        assert cache.get('key4') == b'x' * 100
+        assert cache.get('key0') is None
+
+    def test_writes_under_budget_do_not_list_the_directory(self, tmp_path, monkeypatch):
+        cache = DiskCache(str(tmp_path), max_bytes=1000, sweep_every=10)
+        cache.set('key0', b'x' * 100)
+        listings = []
+        monkeypatch.setattr(cache, '_entries', lambda: listings.append(1) or [])
+        for i in range(1, 9):
+            cache.set(f'key{i}', b'x' * 100)
+        assert listings == []
+        cache.set('key9', b'x' * 100)
+        assert listings == [1]
+
+    def test_no_temp_files_left_behind(self, tmp_path):
+        cache = DiskCache(str(tmp_path))
+        cache.set('key', b'payload')
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+class TestTieredCache:
+
+    def test_counters(self):
+        cache = TieredCache('TEST')
+        assert cache.get('k') is None
+        cache.set('k', b'v')
+        assert cache.get('k') == b'v'
+        stats = cache.stats()
+        assert stats['misses'] == 1
+        assert stats['memory_hits'] == 1
+        assert stats['memory_entries'] == 1
+
+    def test_disk_tier_is_shared_between_workers(self, tmp_path):
+        worker_a = TieredCache('TEST', directory=str(tmp_path))
+        worker_b = TieredCache('TEST', directory=str(tmp_path))
+        worker_a.set('k', b'v')
+        assert worker_b.get('k') == b'v'
+        assert worker_b.stats()['disk_hits'] == 1
+        # Promoted to worker B's memory tier.
+        assert worker_b.get('k') == b'v'
+        assert worker_b.stats()['memory_hits'] == 1
+
+    def test_init_app_reads_prefixed_config(self, app, tmp_path):
+        app.config['TEST_SIZE'] = 3
+        app.config['TEST_DIR'] = str(tmp_path)
+        cache = TieredCache('TEST')
+        cache.init_app(app)
+        assert cache.memory.max_entries == 3
+        assert cache.disk is not None and cache.disk.directory == str(tmp_path)
+
+
+class TestChartCaching:
+
+    def test_repeat_chart_is_served_from_cache(self, app):
+        from app.assessment.utils import generate_social_style_chart
+        first = generate_social_style_chart(3.0, 2.0)
+        second = generate_social_style_chart(3.0, 2.0)
+        assert first == second
+        assert chart_cache.stats()['misses'] == 1
+        assert chart_cache.stats()['memory_hits'] == 1
+
+    def test_scores_are_keyed_at_label_precision(self, app):
+        from app.assessment.utils import generate_social_style_chart
+        generate_social_style_chart(3.0, 2.0)
+        generate_social_style_chart(3.0001, 1.9999)
+        assert chart_cache.stats()['misses'] == 1
+
+    def test_size_and_format_are_part_of_the_key(self, app):
+        from app.assessment.utils import generate_social_style_chart
+        png = generate_social_style_chart(3.0, 2.0)
+        svg = generate_social_style_chart(3.0, 2.0, fmt='svg')
+        small = generate_social_style_chart(3.0, 2.0, size=4)
+        assert png.startswith('data:image/png;base64,')
+        assert svg.startswith('data:image/svg+xml;base64,')
+        assert small != png
+        assert chart_cache.stats()['misses'] == 3
+
+    def test_unknown_format_is_rejected(self, app):
+        from app.assessment.utils import generate_social_style_chart
+        with pytest.raises(ValueError):
+            generate_social_style_chart(3.0, 2.0, fmt='gif')
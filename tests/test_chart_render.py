@@ -0,0 +1,112 @@
+"""
+Tests for the matplotlib-free chart renderer (app/assessment/chart.py).
+
+The renderer must place the quadrants and the marker exactly where the web
+SVG grids do, since both derive positions from app/assessment/geometry.py.
+"""
+
+import pytest
+import io
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, chart_cache
+from app.assessment import chart, geometry
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def hex_to_rgb(hex_color):
+    return tuple(int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+class TestSVG:
+
+    def test_quadrant_labels_use_grid_positions(self):
+        svg = chart.render_svg(3.0, 2.0).decode('utf-8')
+        for a, r, name in chart.QUADRANT_LABELS:
+            x, y = geometry.svg_position(a, r)
+            assert re.search(rf'<text x="{x:g}" y="{y:g}"[^>]*>{name}</text>', svg), name
+
+    @pytest.mark.parametrize("a,r", [(1.5, 1.5), (3.5, 1.5), (1.5, 3.5), (3.5, 3.5), (2.5, 2.5)])
+    def test_marker_matches_web_grid(self, a, r):
+        svg = chart.render_svg(a, r).decode('utf-8')
+        x, y = geometry.svg_position(a, r)
+        color = geometry.quadrant_color(a, r)
+        assert f'<circle cx="{x:g}" cy="{y:g}" r="{chart.MARKER_RADIUS}" fill="{color}"' in svg
+        assert f'({a:.2f}, {r:.2f})' in svg
+
+    def test_size_sets_pixel_dimensions(self):
+        svg = chart.render_svg(3.0, 2.0, size=4).decode('utf-8')
+        assert 'width="400" height="400"' in svg
+        assert 'viewBox="0 0 400 400"' in svg
+
+    def test_only_marker_differs_between_charts(self):
+        first = chart.render_svg(1.5, 1.5).decode('utf-8')
+        second = chart.render_svg(3.5, 3.5).decode('utf-8')
+        head, _ = chart._svg_template(8)
+        assert first.startswith(head) and second.startswith(head)
+
+
+class TestPNG:
+
+    def test_png_signature_and_size(self):
+        from PIL import Image
+        data = chart.render_png(3.0, 2.0, size=4)
+        assert data.startswith(b'\x89PNG\r\n\x1a\n')
+        assert Image.open(io.BytesIO(data)).size == (400, 400)
+
+    @pytest.mark.parametrize("a,r", [(1.5, 1.5), (3.5, 1.5), (1.5, 3.5), (3.5, 3.5)])
+    def test_marker_pixel_has_quadrant_color(self, a, r):
+        from PIL import Image
+        image = Image.open(io.BytesIO(chart.render_png(a, r))).convert('RGB')
+        scale = image.width / chart.VIEWBOX
+        x, y = geometry.svg_position(a, r)
+        assert image.getpixel((round(x * scale), round(y * scale))) == hex_to_rgb(
+            geometry.quadrant_color(a, r))
+
+    def test_template_is_not_modified_by_rendering(self):
+        template = chart._png_template(8)
+        before = template.tobytes()
+        chart.render_png(3.5, 3.5)
+        assert template.tobytes() == before
+
+
+class TestGenerateChart:
+
+    def test_native_renderer_is_default(self, app, monkeypatch):
+        from app.assessment import utils
+
+        def fail(*args, **kwargs):
+            raise AssertionError('matplotlib should not be used')
+
+        monkeypatch.setattr(utils, 'render_chart_matplotlib', fail)
+        assert utils.generate_social_style_chart(3.0, 2.0).startswith('data:image/png;base64,')
+
+    def test_falls_back_to_matplotlib(self, app, monkeypatch):
+        from app.assessment import utils
+
+        def unavailable(*args, **kwargs):
+            raise ImportError('No module named PIL')
+
+        monkeypatch.setattr(utils, 'render_chart', unavailable)
+        assert utils.generate_social_style_chart(3.0, 2.0).startswith('data:image/png;base64,')
+
+    def test_renderer_is_part_of_cache_key(self, app):
+        from app.assessment.utils import generate_social_style_chart
+        native = generate_social_style_chart(3.0, 2.0)
+        app.config['CHART_RENDERER'] = 'matplotlib'
+        assert generate_social_style_chart(3.0, 2.0) != native
+        assert chart_cache.stats()['misses'] == 2
@@ -0,0 +1,124 @@
+"""
+Tests for the {% cache %} template fragment cache.
+"""
+
+import pytest
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import render_template_string
+from markupsafe import Markup
+
+from app import create_app, db, fragment_cache
+from app.assessment import question_bank
+from app.models import Assessment
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        fragment_cache.clear()
+        fragment_cache.reset_stats()
+        question_bank.invalidate()
+        yield app
+        fragment_cache.clear()
+        question_bank.invalidate()
+        db.session.remove()
+        db.drop_all()
+
+
+def make_assessment(prefix='Q'):
+    questions = [{'id': i, 'text': f'{prefix}{i}', 'format': 'likert',
+                  'category': 'assertiveness' if i <= 15 else 'responsiveness'}
+                 for i in range(1, 31)]
+    assessment = Assessment(name='Social Styles', description='Test', questions=json.dumps(questions))
+    db.session.add(assessment)
+    db.session.commit()
+    return assessment
+
+
+class TestCacheTag:
+
+    TEMPLATE = "[{% cache 'block', key %}{{ render() }}{% endcache %}|{{ user }}]"
+
+    def render(self, calls, key, user):
+        def counted():
+            calls.append(key)
+            return Markup(f'<b>{key}</b>')
+        return render_template_string(self.TEMPLATE, render=counted, key=key, user=user)
+
+    def test_block_is_rendered_once_per_key(self, app):
+        calls = []
+        with app.test_request_context():
+            assert self.render(calls, 1, 'ann') == '[<b>1</b>|ann]'
+            assert self.render(calls, 1, 'bob') == '[<b>1</b>|bob]'
+            assert self.render(calls, 2, 'bob') == '[<b>2</b>|bob]'
+        assert calls == [1, 2]
+        assert fragment_cache.stats()['memory_hits'] == 1
+
+    def test_cached_markup_is_not_escaped_again(self, app):
+        with app.test_request_context():
+            render_template_string("{% cache 'markup' %}<i>{{ '<x>' }}</i>{% endcache %}")
+            html = render_template_string("{% cache 'markup' %}<i>{{ '<x>' }}</i>{% endcache %}")
+        assert html == '<i>&lt;x&gt;</i>'
+
+    def test_changed_template_source_is_not_served_stale_markup(self, app):
+        with app.test_request_context():
+            assert render_template_string("{% cache 'deploy' %}old{% endcache %}") == 'old'
+            assert render_template_string("{% cache 'deploy' %}new{% endcache %}") == 'new'
+
+    def test_key_includes_the_template_name(self, app):
+        app.test_client().get(f'/assessment/take/{make_assessment().id}')
+        keys = list(fragment_cache.memory._data)
+        assert keys and all(key.startswith('fragment:assessment/take.html@') for key in keys)
+
+    def test_disabled_without_a_backing_cache(self, app):
+        app.jinja_env.fragment_cache = None
+        calls = []
+        with app.test_request_context():
+            self.render(calls, 1, 'ann')
+            self.render(calls, 1, 'ann')
+        assert calls == [1, 1]
+
+
+class TestTakeAssessmentFragments:
+
+    def questions_block(self, html):
+        start = html.index('<!-- Assertiveness Section -->')
+        return html[start:html.index('</form>')]
+
+    def test_question_block_shared_between_visitors(self, app):
+        app.config['WTF_CSRF_ENABLED'] = True
+        assessment = make_assessment()
+
+        first = app.test_client().get(f'/assessment/take/{assessment.id}').get_data(as_text=True)
+        second = app.test_client().get(f'/assessment/take/{assessment.id}').get_data(as_text=True)
+
+        # The CSRF token is rendered per request, outside the cached block
+        for html in (first, second):
+            assert re.search(r'name="csrf_token" type="hidden" value="[^"]+"', html)
+            assert 'csrf_token' not in self.questions_block(html)
+        assert self.questions_block(first) == self.questions_block(second)
+        assert 'name="assertiveness_1"' in self.questions_block(first)
+        stats = fragment_cache.stats()
+        assert stats['misses'] == 2 and stats['memory_hits'] == 2
+
+    def test_new_question_version_renders_fresh_block(self, app):
+        assessment = make_assessment()
+        client = app.test_client()
+        client.get(f'/assessment/take/{assessment.id}')
+
+        questions = assessment.get_questions()
+        questions[0]['text'] = 'Reworded question'
+        assessment.questions = json.dumps(questions)
+        db.session.commit()
+
+        html = client.get(f'/assessment/take/{assessment.id}').get_data(as_text=True)
+        assert 'Reworded question' in html
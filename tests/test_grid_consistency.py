@@ -92,10 +92,10 @@ class TestMatplotlibChart:
           EXPRESSIVE at (3.25, 3.25) → bottom-right (high assert, high resp)
         """
         # The chart function is tested via its output. We verify the source code
-        # contains the correct coordinate-label pairs.
+        # of the matplotlib renderer contains the correct coordinate-label pairs.
         import inspect
-        from app.assessment.utils import generate_social_style_chart
-        source = inspect.getsource(generate_social_style_chart)
+        from app.assessment.utils import render_chart_matplotlib
+        source = inspect.getsource(render_chart_matplotlib)
 
         assert "1.75, 1.75, 'ANALYTICAL'" in source or '1.75, 1.75, "ANALYTICAL"' in source
         assert "3.25, 1.75, 'DRIVER'" in source or '3.25, 1.75, "DRIVER"' in source
@@ -106,8 +106,8 @@ class TestMatplotlibChart:
     def test_chart_plots_user_at_correct_position(self, app):
         """Chart must plot user position as (assertiveness, responsiveness)."""
         import inspect
-        from app.assessment.utils import generate_social_style_chart
-        source = inspect.getsource(generate_social_style_chart)
+        from app.assessment.utils import render_chart_matplotlib
+        source = inspect.getsource(render_chart_matplotlib)
 
         # The plot call should use assertiveness as X and responsiveness as Y
         assert "ax.plot(assertiveness_score, responsiveness_score" in source
@@ -125,11 +125,13 @@ class TestMatplotlibChart:
                 (1.0, 4.0, "extreme"),
                 (4.0, 1.0, "extreme"),
             ]
-            for a, r, label in test_cases:
-                result = generate_social_style_chart(a, r)
-                assert result.startswith('data:image/png;base64,'), (
-                    f"Chart failed for {label} at ({a}, {r})"
-                )
+            for renderer in ('native', 'matplotlib'):
+                app.config['CHART_RENDERER'] = renderer
+                for a, r, label in test_cases:
+                    result = generate_social_style_chart(a, r)
+                    assert result.startswith('data:image/png;base64,'), (
+                        f"{renderer} chart failed for {label} at ({a}, {r})"
+                    )
 
 
 # ============================================================
@@ -0,0 +1,290 @@
+"""
+Tests for persistent background jobs: queueing, workers, status and downloads.
+"""
+
+import pytest
+import csv
+import io
+import os
+import sys
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from flask import g
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, job_queue, report_cache
+from app.jobs import JobContext, job_handler
+from app.models import User, Assessment, AssessmentResult, Team, TeamMember, Job
+from config import config
+
+
+@job_handler('test_fail')
+def failing_job(ctx):
+    with ctx.artifact('partial.txt', 'text/plain') as f:
+        f.write(b'half')
+    raise ValueError('Something broke')
+
+
+@job_handler('test_echo')
+def echo_job(ctx, text='hi'):
+    ctx.progress(1, 1)
+    return text
+
+
+def take_over(ctx):
+    # Another worker presumes this run dead, requeues the job and claims it
+    job_queue.sweep(datetime.utcnow() + timedelta(seconds=job_queue.stale_after + 1))
+    assert job_queue.claim() == ctx.job_id
+
+
+@job_handler('test_superseded')
+def superseded_job(ctx, report=True):
+    with ctx.artifact('slow.txt', 'text/plain') as f:
+        f.write(b'slow')
+    take_over(ctx)
+    if report:
+        ctx.progress(1, 1)
+    return 'stale result'
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Create application for testing, with job artifacts in a temporary directory."""
+    app = create_app('testing')
+    app.config['JOBS_DIR'] = str(tmp_path / 'jobs')
+    job_queue.init_app(app)
+    with app.app_context():
+        db.create_all()
+        report_cache.clear()
+        yield app
+        job_queue.shutdown()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def setup(app):
+    admin = User(email='admin@example.com', name='Admin', is_admin=True)
+    owner = User(email='owner@example.com', name='Owner')
+    ann = User(email='ann@example.com', name='Ann')
+    assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+    db.session.add_all([admin, owner, ann, assessment])
+    db.session.flush()
+    team = Team(name='Big Team', owner_id=owner.id)
+    db.session.add(team)
+    db.session.flush()
+    for user in (owner, ann):
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id))
+        result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                  assertiveness_score=3.0, responsiveness_score=2.0,
+                                  social_style='DRIVER', created_at=datetime(2024, 3, 1, 10))
+        db.session.add(result)
+        db.session.flush()
+        user.latest_result_id = result.id
+    db.session.commit()
+    return {'admin': admin, 'owner': owner, 'ann': ann, 'team': team, 'assessment': assessment}
+
+
+def login(app, user):
+    g.pop('_login_user', None)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+def fetch(job_id):
+    return db.session.get(Job, job_id, populate_existing=True)
+
+
+class TestJobQueue:
+
+    def test_enqueue_and_run(self, app, setup):
+        job = job_queue.enqueue('test_echo', setup['ann'], text='done')
+        assert job.status == Job.QUEUED
+        job_queue.run_pending()
+        job = fetch(job.id)
+        assert (job.status, job.message, job.attempts) == (Job.SUCCEEDED, 'done', 1)
+        assert (job.progress_done, job.progress_total) == (1, 1)
+        assert job.artifact_path is None and job.finished_at is not None
+
+    def test_unknown_kind_is_refused(self, app, setup):
+        with pytest.raises(LookupError):
+            job_queue.enqueue('no_such_job', setup['ann'])
+
+    def test_failure_is_recorded_and_partial_file_removed(self, app, setup, tmp_path):
+        job = job_queue.enqueue('test_fail', setup['ann'])
+        job_queue.run_pending()
+        job = fetch(job.id)
+        assert (job.status, job.message) == (Job.FAILED, 'Something broke')
+        assert os.listdir(tmp_path / 'jobs') == []
+
+    def test_a_job_is_claimed_once(self, app, setup):
+        first = job_queue.enqueue('test_echo', setup['ann'])
+        second = job_queue.enqueue('test_echo', setup['ann'])
+        assert job_queue.claim() == first.id
+        assert job_queue.claim() == second.id
+        assert job_queue.claim() is None
+
+    def test_stale_jobs_are_requeued_then_failed(self, app, setup):
+        job = job_queue.enqueue('test_echo', setup['ann'])
+        job_queue.claim()
+        later = datetime.utcnow() + timedelta(seconds=job_queue.stale_after + 1)
+        assert job_queue.sweep(later) == (0, 1, 0)
+        assert fetch(job.id).status == Job.QUEUED
+        job_queue.claim()
+        assert job_queue.sweep(later) == (0, 0, 1)
+        job = fetch(job.id)
+        assert (job.status, job.attempts) == (Job.FAILED, 2)
+
+    @pytest.mark.parametrize('report', [True, False])
+    def test_superseded_run_cannot_overwrite_the_job(self, app, setup, tmp_path, report):
+        job = job_queue.enqueue('test_superseded', setup['ann'], report=report)
+        assert job_queue.run(job_queue.claim()) is False
+        job = fetch(job.id)
+        assert (job.status, job.attempts, job.message) == (Job.RUNNING, 2, None)
+        assert job.artifact_path is None
+        assert os.listdir(tmp_path / 'jobs') == []
+
+    def test_partial_artifact_of_a_dead_worker_is_swept(self, app, setup, tmp_path):
+        job = job_queue.enqueue('test_echo', setup['ann'])
+        job_queue.claim()
+        ctx = JobContext(job_queue, job.id, 1)
+        with ctx.artifact('partial.txt', 'text/plain') as f:
+            f.write(b'half')
+        assert fetch(job.id).artifact_path == ctx.artifact_path
+        later = datetime.utcnow() + timedelta(seconds=job_queue.stale_after + 1)
+        assert job_queue.sweep(later) == (0, 1, 0)
+        assert fetch(job.id).artifact_path is None
+        assert os.listdir(tmp_path / 'jobs') == []
+
+    def test_in_process_worker(self, app, setup):
+        app.config['JOBS_IN_PROCESS'] = True
+        job_queue.init_app(app)
+        job = job_queue.enqueue('test_echo', setup['ann'], text='threaded')
+        deadline = time.monotonic() + 10
+        while fetch(job.id).status != Job.SUCCEEDED and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert fetch(job.id).message == 'threaded'
+
+    def test_first_request_starts_workers(self, app, setup):
+        # A job queued by another process (e.g. a recycled web worker)
+        db.session.add(Job(kind='test_echo', params='{"text": "picked up"}', status=Job.QUEUED))
+        db.session.commit()
+        job_id = Job.query.one().id
+        app.config['JOBS_IN_PROCESS'] = True
+        job_queue.init_app(app)
+        assert app.test_client().get('/health').status_code == 200
+        deadline = time.monotonic() + 10
+        while fetch(job_id).status != Job.SUCCEEDED and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert fetch(job_id).message == 'picked up'
+
+    def test_production_uses_a_standalone_worker(self):
+        assert config['production'].JOBS_IN_PROCESS is False
+
+    def test_worker_command(self, app, setup):
+        job = job_queue.enqueue('test_echo', setup['ann'])
+        outcome = app.test_cli_runner().invoke(args=['worker', '--once'])
+        assert outcome.exit_code == 0, outcome.output
+        assert fetch(job.id).status == Job.SUCCEEDED
+
+
+class TestJobViews:
+
+    def test_status_and_download(self, app, setup):
+        client = login(app, setup['admin'])
+        resp = client.post('/admin/results/export', data={'format': 'csv'})
+        assert resp.status_code == 302
+        job_id = int(resp.headers['Location'].rsplit('/', 1)[1])
+        assert client.get(f'/jobs/{job_id}.json').json['status'] == Job.QUEUED
+        assert client.get(f'/jobs/{job_id}/download').status_code == 404
+
+        job_queue.run_pending()
+        status = client.get(f'/jobs/{job_id}.json').json
+        assert status['status'] == Job.SUCCEEDED
+        assert (status['done'], status['total'], status['message']) == (2, 2, '2 results')
+        assert status['download_url'] == f'/jobs/{job_id}/download'
+        assert client.get(f'/jobs/{job_id}').status_code == 200
+
+        resp = client.get(status['download_url'])
+        assert resp.status_code == 200
+        assert resp.mimetype == 'text/csv'
+        assert 'attachment; filename=assessment-results-' in resp.headers['Content-Disposition']
+        rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+        assert [row['user_email'] for row in rows] == ['owner@example.com', 'ann@example.com']
+        resp.close()
+
+    def test_export_filters_are_validated(self, app, setup):
+        client = login(app, setup['admin'])
+        assert client.post('/admin/results/export', data={'format': 'xlsx'}).status_code == 400
+        assert client.post('/admin/results/export', data={'since': 'soon'}).status_code == 400
+        assert Job.query.count() == 0
+
+    def test_jobs_are_private(self, app, setup):
+        job = job_queue.enqueue('test_echo', setup['ann'])
+        assert login(app, setup['owner']).get(f'/jobs/{job.id}.json').status_code == 404
+        assert login(app, setup['ann']).get(f'/jobs/{job.id}.json').status_code == 200
+        assert login(app, setup['admin']).get(f'/jobs/{job.id}.json').status_code == 200
+
+    def test_expired_download_is_gone(self, app, setup):
+        client = login(app, setup['admin'])
+        job_id = int(client.post('/admin/results/export', data={'format': 'csv'})
+                     .headers['Location'].rsplit('/', 1)[1])
+        job_queue.run_pending()
+        path = fetch(job_id).artifact_path
+        assert os.path.exists(path)
+
+        later = datetime.utcnow() + timedelta(seconds=job_queue.artifact_ttl + 1)
+        assert job_queue.sweep(later) == (1, 0, 0)
+        assert not os.path.exists(path)
+        assert fetch(job_id).status == Job.EXPIRED
+        assert client.get(f'/jobs/{job_id}/download').status_code == 410
+
+    def test_rescore_job(self, app, setup):
+        client = login(app, setup['admin'])
+        resp = client.post('/admin/results/rescore', data={'dry_run': '1'})
+        assert resp.status_code == 302
+        job_queue.run_pending()
+        job = Job.query.one()
+        assert (job.kind, job.status) == ('rescore_results', Job.SUCCEEDED)
+        assert job.message.startswith('Would update 0 of 0 results')
+
+    def test_admin_only_queues(self, app, setup):
+        client = login(app, setup['ann'])
+        assert client.post('/admin/results/export', data={'format': 'csv'}).status_code == 302
+        assert client.post('/admin/results/rescore').status_code == 302
+        assert Job.query.count() == 0
+
+
+class TestReportPackJob:
+
+    def test_large_team_pack_is_built_in_the_background(self, app, setup):
+        app.config['REPORT_PACK_STREAM_LIMIT'] = 1
+        team = setup['team']
+        client = login(app, setup['owner'])
+        assert 'Prepare All Reports' in client.get(f'/team/teams/{team.id}/dashboard').get_data(as_text=True)
+        assert client.get(f'/team/teams/{team.id}/report-pack.zip').status_code == 302
+
+        resp = client.post(f'/team/teams/{team.id}/report-pack')
+        assert resp.status_code == 302
+        job_queue.run_pending()
+        job = Job.query.one()
+        assert (job.status, job.message, job.user_id) == (Job.SUCCEEDED, '2 member reports', setup['owner'].id)
+        assert (job.progress_done, job.progress_total) == (3, 3)
+
+        resp = client.get(f'/jobs/{job.id}/download')
+        assert resp.mimetype == 'application/zip'
+        assert 'Big_Team-reports.zip' in resp.headers['Content-Disposition']
+        archive = zipfile.ZipFile(io.BytesIO(resp.data))
+        assert archive.namelist() == ['00-team-summary.pdf', '01-Owner.pdf', '02-Ann.pdf']
+        resp.close()
+
+    def test_members_cannot_queue_the_pack(self, app, setup):
+        client = login(app, setup['ann'])
+        assert client.post(f'/team/teams/{setup["team"].id}/report-pack').status_code == 302
+        assert Job.query.count() == 0
@@ -0,0 +1,121 @@
+"""
+Tests for resolving team join tokens by primary key.
+"""
+
+import pytest
+import os
+import sys
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.models import User, Team
+from app.models.team import base62_encode, base62_decode, resolve_join_token
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        resolve_join_token.cache_clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def team(app):
+    owner = User(email='owner@example.com', name='Owner')
+    db.session.add(owner)
+    db.session.flush()
+    team = Team(name='Workshop - Day 1', owner_id=owner.id)
+    db.session.add(team)
+    db.session.commit()
+    return team
+
+
+class TestBase62:
+
+    @pytest.mark.parametrize("num", [0, 1, 61, 62, 12345, 2 ** 63 - 1])
+    def test_round_trip(self, num):
+        assert base62_decode(base62_encode(num)) == num
+
+    @pytest.mark.parametrize("text", ['', 'ab+c', 'é'])
+    def test_rejects_invalid_input(self, text):
+        with pytest.raises(ValueError):
+            base62_decode(text)
+
+
+class TestResolveToken:
+
+    def test_valid_token_resolves_to_team(self, app, team):
+        assert Team.from_join_token(team.generate_join_token()) == team
+
+    def test_name_part_is_not_used_for_lookup(self, app, team):
+        encoded_id, signature, _ = team.generate_join_token().split('-', 2)
+        assert Team.from_join_token(f'{encoded_id}-{signature}-Renamed') == team
+        assert Team.from_join_token(f'{encoded_id}-{signature}') == team
+
+    def test_wrong_signature_is_rejected(self, app, team):
+        encoded_id, _, name = team.generate_join_token().split('-', 2)
+        assert Team.from_join_token(f'{encoded_id}-AAAAAAAA-{name}') is None
+
+    def test_legacy_random_token_is_rejected(self, app, team):
+        assert Team.from_join_token(f'{base62_encode(team.id)}-Cxyz1-Workshop_-_Day_1') is None
+
+    @pytest.mark.parametrize("token", ['', 'nodash', '!!-sig-Name', 'A' * 40 + '-sig'])
+    def test_malformed_tokens_are_rejected(self, app, team, token):
+        assert Team.from_join_token(token) is None
+
+    def test_deleted_team_is_rejected(self, app, team):
+        token = team.generate_join_token()
+        db.session.delete(team)
+        db.session.commit()
+        assert Team.from_join_token(token) is None
+
+    def test_resolution_is_memoized(self, app, team):
+        token = team.generate_join_token()
+        secret = app.config['SECRET_KEY']
+        for _ in range(5):
+            assert resolve_join_token(token, secret) == team.id
+        info = resolve_join_token.cache_info()
+        assert (info.hits, info.misses) == (4, 1)
+
+    def test_lookup_is_by_primary_key(self, app, team):
+        token = team.generate_join_token()
+        db.session.expunge_all()
+        statements = []
+
+        def record(conn, cursor, statement, params, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            assert Team.from_join_token(token).id == team.id
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(statements) == 1
+        assert 'teams.id = ' in statements[0]
+        assert 'teams.name' not in statements[0].split('WHERE')[1]
+
+
+class TestJoinRoutes:
+
+    def test_quick_join_accepts_token(self, app, team):
+        resp = app.test_client().get(f'/team/quick-join/{team.generate_join_token()}')
+        assert resp.status_code == 200
+        assert team.name in resp.get_data(as_text=True)
+
+    def test_quick_join_rejects_forged_token(self, app, team):
+        resp = app.test_client().get('/team/quick-join/B-forged-Workshop_-_Day_1')
+        assert resp.status_code == 302
+
+    def test_join_redirects_to_quick_join(self, app, team):
+        token = team.generate_join_token()
+        resp = app.test_client().get(f'/team/join/{token}')
+        assert resp.status_code == 302
+        assert resp.headers['Location'].endswith(f'/team/quick-join/{token}')
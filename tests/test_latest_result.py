@@ -0,0 +1,156 @@
+"""
+Tests for the denormalized User.latest_result_id pointer.
+"""
+
+import pytest
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.models import User, Team, TeamMember, Assessment, AssessmentResult
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def setup(app):
+    assessment = Assessment(name='Social Styles', questions='[]')
+    user = User(email='user@example.com', name='User')
+    db.session.add_all([assessment, user])
+    db.session.commit()
+    return {'assessment': assessment, 'user': user}
+
+
+def add_result(user, assessment, created_at, style='DRIVER'):
+    result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                              assertiveness_score=3.0, responsiveness_score=2.0,
+                              social_style=style, created_at=created_at)
+    db.session.add(result)
+    return result
+
+
+def login(app, user):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+class TestPointerMaintenance:
+
+    def test_new_result_becomes_latest(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        first = add_result(user, assessment, datetime(2024, 1, 1))
+        db.session.commit()
+        assert user.latest_result_id == first.id
+
+        second = add_result(user, assessment, datetime(2024, 2, 1))
+        db.session.commit()
+        assert user.latest_result_id == second.id
+        assert user.get_latest_assessment_result() == second
+
+    def test_pointer_is_set_before_commit(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        result = add_result(user, assessment, datetime(2024, 1, 1))
+        db.session.flush()
+        assert user.latest_result_id == result.id
+        db.session.rollback()
+        assert db.session.get(User, user.id).latest_result_id is None
+
+    def test_backdated_result_does_not_replace_newer(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        newer = add_result(user, assessment, datetime(2024, 3, 1))
+        db.session.commit()
+        add_result(user, assessment, datetime(2024, 1, 1))
+        db.session.commit()
+        assert user.latest_result_id == newer.id
+
+    def test_deleting_latest_falls_back_to_previous(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        older = add_result(user, assessment, datetime(2024, 1, 1))
+        newer = add_result(user, assessment, datetime(2024, 2, 1))
+        db.session.commit()
+
+        db.session.delete(newer)
+        db.session.commit()
+        assert user.latest_result_id == older.id
+
+        db.session.delete(older)
+        db.session.commit()
+        assert user.latest_result_id is None
+        assert user.get_latest_assessment_result() is None
+
+
+class TestRoutes:
+
+    def test_delete_result_view_repairs_pointer(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        older = add_result(user, assessment, datetime(2024, 1, 1))
+        newer = add_result(user, assessment, datetime(2024, 2, 1))
+        db.session.commit()
+
+        resp = login(app, user).post(f'/assessment/delete_result/{newer.id}')
+        assert resp.status_code == 302
+        assert db.session.get(User, user.id).latest_result_id == older.id
+
+    def test_admin_delete_user(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        add_result(user, assessment, datetime(2024, 1, 1))
+        admin = User(email='admin@example.com', name='Admin', is_admin=True)
+        db.session.add(admin)
+        db.session.commit()
+        user_id = user.id
+
+        resp = login(app, admin).post(f'/admin/users/{user_id}/delete')
+        assert resp.status_code == 302
+        db.session.expunge_all()
+        assert db.session.get(User, user_id) is None
+        assert AssessmentResult.query.filter_by(user_id=user_id).count() == 0
+
+
+class TestBackfill:
+
+    def test_backfill_command_repairs_stale_pointers(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        add_result(user, assessment, datetime(2024, 1, 1))
+        newest = add_result(user, assessment, datetime(2024, 2, 1))
+        db.session.commit()
+        User.query.update({User.latest_result_id: None}, synchronize_session=False)
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['backfill-latest-results'])
+        assert result.exit_code == 0, result.output
+        assert '1 have a latest result' in result.output
+        db.session.expire_all()
+        assert db.session.get(User, user.id).latest_result_id == newest.id
+
+
+class TestRoster:
+
+    def test_roster_uses_pointer(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        team = Team(name='Pointer', owner_id=user.id)
+        db.session.add(team)
+        db.session.flush()
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id, role='owner'))
+        add_result(user, assessment, datetime(2024, 1, 1), style='AMIABLE')
+        latest = add_result(user, assessment, datetime(2024, 2, 1), style='DRIVER')
+        db.session.commit()
+
+        roster = team.get_roster()
+        assert [entry['result'] for entry in roster] == [latest]
+        assert team.get_roster(results_after=(datetime(2024, 1, 15), 0))[0]['result'] == latest
+        assert team.get_roster(results_after=(datetime(2024, 2, 1), latest.id)) == []
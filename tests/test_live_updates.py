@@ -0,0 +1,132 @@
+"""
+Tests for the push-based live team grid.
+
+Assessment submissions publish a delta to the ``team_<id>`` Socket.IO room of
+every team the user belongs to, and only team members (or admins) may join a
+team's room.
+"""
+
+import pytest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.models import User, Team, TeamMember, Assessment
+from app.websockets import socketio
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def team_setup(app):
+    """A team with one member, plus an outsider and an assessment."""
+    questions = [{'id': i, 'text': f'Q{i}', 'format': 'likert',
+                  'category': 'assertiveness' if i <= 15 else 'responsiveness'}
+                 for i in range(1, 31)]
+    assessment = Assessment(name='Social Styles', questions=json.dumps(questions))
+    member = User(email='member@example.com', name='Member')
+    outsider = User(email='outsider@example.com', name='Outsider')
+    db.session.add_all([assessment, member, outsider])
+    db.session.flush()
+    team = Team(name='Live Team', owner_id=member.id)
+    db.session.add(team)
+    db.session.flush()
+    db.session.add(TeamMember(team_id=team.id, user_id=member.id, role='owner'))
+    db.session.commit()
+    return {'team': team, 'member': member, 'outsider': outsider, 'assessment': assessment}
+
+
+def logged_in_client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+def joined_rooms(sio_client):
+    return [r for r in sio_client.get_received() if r['name'] == 'status']
+
+
+class TestRoomJoins:
+
+    def test_member_can_join_team_room(self, app, team_setup):
+        team = team_setup['team']
+        client = logged_in_client(app, team_setup['member'])
+        sio = socketio.test_client(app, flask_test_client=client)
+        sio.emit('join', {'team_id': team.id})
+        status = joined_rooms(sio)
+        assert status and status[-1]['args'][0].get('room') == f'team_{team.id}'
+
+    def test_legacy_room_name_is_accepted(self, app, team_setup):
+        team = team_setup['team']
+        client = logged_in_client(app, team_setup['member'])
+        sio = socketio.test_client(app, flask_test_client=client)
+        sio.emit('join', {'room': f'team_{team.id}'})
+        assert joined_rooms(sio)[-1]['args'][0].get('room') == f'team_{team.id}'
+
+    def test_outsider_cannot_join_team_room(self, app, team_setup):
+        team = team_setup['team']
+        client = logged_in_client(app, team_setup['outsider'])
+        sio = socketio.test_client(app, flask_test_client=client)
+        sio.emit('join', {'team_id': team.id})
+        assert joined_rooms(sio)[-1]['args'][0].get('error') == 'Not authorized'
+
+    def test_anonymous_cannot_join_team_room(self, app, team_setup):
+        team = team_setup['team']
+        sio = socketio.test_client(app)
+        sio.emit('join', {'team_id': team.id})
+        assert joined_rooms(sio)[-1]['args'][0].get('error') == 'Not authorized'
+
+
+class TestSubmissionBroadcast:
+
+    def test_take_assessment_pushes_delta_to_team_room(self, app, team_setup):
+        team = team_setup['team']
+        member = team_setup['member']
+        client = logged_in_client(app, member)
+
+        sio = socketio.test_client(app, flask_test_client=client)
+        sio.emit('join', {'team_id': team.id})
+        sio.get_received()
+
+        form = {f'assertiveness_{i}': 4 for i in range(1, 16)}
+        form.update({f'responsiveness_{i}': 1 for i in range(16, 31)})
+        resp = client.post(f'/assessment/take/{team_setup["assessment"].id}', data=form)
+        assert resp.status_code == 302
+
+        deltas = [r for r in sio.get_received() if r['name'] == 'new_assessment_result']
+        assert len(deltas) == 1
+        delta = deltas[0]['args'][0]
+        assert delta['team_id'] == team.id
+        assert delta['user_id'] == member.id
+        assert delta['assertiveness_score'] == pytest.approx(4.0)
+        assert delta['responsiveness_score'] == pytest.approx(1.0)
+        assert delta['social_style'] == 'DRIVER'
+
+    def test_rejected_outsider_receives_nothing(self, app, team_setup):
+        team = team_setup['team']
+        outsider_client = logged_in_client(app, team_setup['outsider'])
+
+        sio = socketio.test_client(app, flask_test_client=outsider_client)
+        sio.emit('join', {'team_id': team.id})
+        sio.get_received()
+
+        member_client = logged_in_client(app, team_setup['member'])
+        form = {f'assertiveness_{i}': 1 for i in range(1, 16)}
+        form.update({f'responsiveness_{i}': 1 for i in range(16, 31)})
+        member_client.post(f'/assessment/take/{team_setup["assessment"].id}', data=form)
+
+        assert not [r for r in sio.get_received() if r['name'] == 'new_assessment_result']
@@ -0,0 +1,230 @@
+"""
+Tests for the background mail queue and its transports.
+"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+from email import message_from_bytes
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, job_queue, mailer
+from app.models import User, Team, TeamMember
+import app.mail_queue as dispatcher_module
+from app.mail_queue import (MailDispatcher, MailMessage, MemoryTransport,
+                            FileTransport, SESTransport)
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_dispatcher(**config):
+    settings = {'MAIL_TRANSPORT': 'memory', 'MAIL_ASYNC': True, 'MAIL_RETRY_BACKOFF': 0}
+    settings.update(config)
+    dispatcher = MailDispatcher()
+    dispatcher.init_app(SimpleNamespace(config=settings))
+    return dispatcher
+
+
+def message(to='someone@example.com'):
+    return MailMessage(to=to, subject='Hello', text='Hi there', html='<p>Hi there</p>',
+                       sender='noreply@example.com')
+
+
+class RetryableError(Exception):
+    pass
+
+
+class FlakyTransport(MemoryTransport):
+    """Fails the first ``failures`` sends with a retryable error."""
+
+    def __init__(self, failures, error=RetryableError):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    def send(self, message):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error('temporary failure')
+        return super().send(message)
+
+    def is_retryable(self, error):
+        return isinstance(error, RetryableError)
+
+
+class TestDispatcher:
+
+    def test_enqueue_returns_before_delivery(self):
+        dispatcher = make_dispatcher(MAIL_WORKERS=1)
+        release = threading.Event()
+
+        class BlockingTransport(MemoryTransport):
+            def send(self, message):
+                release.wait(5)
+                return super().send(message)
+
+        dispatcher.transport = BlockingTransport()
+        start = time.perf_counter()
+        for i in range(20):
+            assert dispatcher.enqueue(message(f'user{i}@example.com'))
+        assert time.perf_counter() - start < 0.5
+        assert dispatcher.transport.outbox == []
+
+        release.set()
+        dispatcher.join()
+        assert len(dispatcher.transport.outbox) == 20
+        assert dispatcher.stats()['sent'] == 20
+        dispatcher.shutdown()
+
+    def test_retries_transient_failures(self):
+        dispatcher = make_dispatcher(MAIL_MAX_RETRIES=3)
+        dispatcher.transport = FlakyTransport(failures=2)
+        dispatcher.enqueue(message())
+        dispatcher.join()
+        assert len(dispatcher.transport.outbox) == 1
+        assert dispatcher.stats()['retried'] == 2
+        dispatcher.shutdown()
+
+    def test_gives_up_after_max_retries(self):
+        dispatcher = make_dispatcher(MAIL_MAX_RETRIES=2, MAIL_ASYNC=False)
+        dispatcher.transport = FlakyTransport(failures=10)
+        assert dispatcher.enqueue(message()) is False
+        assert dispatcher.transport.attempts == 3
+        assert dispatcher.stats()['failed'] == 1
+
+    def test_permanent_errors_are_not_retried(self):
+        dispatcher = make_dispatcher(MAIL_ASYNC=False)
+        dispatcher.transport = FlakyTransport(failures=10, error=ValueError)
+        assert dispatcher.enqueue(message()) is False
+        assert dispatcher.transport.attempts == 1
+
+    def test_full_queue_drops_message(self):
+        dispatcher = make_dispatcher(MAIL_QUEUE_SIZE=1, MAIL_WORKERS=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        class BlockingTransport(MemoryTransport):
+            def send(self, message):
+                started.set()
+                release.wait(5)
+                return super().send(message)
+
+        dispatcher.transport = BlockingTransport()
+        assert dispatcher.enqueue(message('first@example.com'))
+        started.wait(5)
+        assert dispatcher.enqueue(message('second@example.com'))
+        assert dispatcher.enqueue(message('third@example.com')) is False
+        assert dispatcher.stats()['dropped'] == 1
+
+        release.set()
+        dispatcher.join()
+        assert [m.to for m in dispatcher.transport.outbox] == ['first@example.com', 'second@example.com']
+        dispatcher.shutdown()
+
+    def test_enqueue_can_wait_for_room(self):
+        dispatcher = make_dispatcher(MAIL_QUEUE_SIZE=1, MAIL_WORKERS=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        class BlockingTransport(MemoryTransport):
+            def send(self, message):
+                started.set()
+                release.wait(5)
+                return super().send(message)
+
+        dispatcher.transport = BlockingTransport()
+        assert dispatcher.enqueue(message('first@example.com'))
+        started.wait(5)
+        assert dispatcher.enqueue(message('second@example.com'))
+        threading.Timer(0.1, release.set).start()
+        assert dispatcher.enqueue(message('third@example.com'), timeout=5)
+        dispatcher.join()
+        assert len(dispatcher.transport.outbox) == 3
+        assert dispatcher.stats()['dropped'] == 0
+        dispatcher.shutdown()
+
+    def test_shutdown_drains_queue(self):
+        dispatcher = make_dispatcher(MAIL_WORKERS=2)
+        for i in range(10):
+            dispatcher.enqueue(message(f'user{i}@example.com'))
+        dispatcher.shutdown()
+        assert len(dispatcher.transport.outbox) == 10
+
+
+class TestTransports:
+
+    def test_file_transport_writes_eml(self, tmp_path):
+        transport = FileTransport(str(tmp_path))
+        transport.send(message('reader@example.com'))
+        files = list(tmp_path.glob('*.eml'))
+        assert len(files) == 1
+        parsed = message_from_bytes(files[0].read_bytes())
+        assert parsed['To'] == 'reader@example.com'
+        assert parsed['Subject'] == 'Hello'
+        assert parsed.is_multipart()
+
+    def test_ses_client_is_created_once(self, monkeypatch):
+        created = []
+
+        class FakeClient:
+            def send_email(self, **kwargs):
+                return {'MessageId': f'id-{kwargs["Destination"]["ToAddresses"][0]}'}
+
+        def fake_client(service, **kwargs):
+            created.append(service)
+            return FakeClient()
+
+        monkeypatch.setattr(dispatcher_module, 'boto3', SimpleNamespace(client=fake_client))
+        transport = SESTransport(region='us-east-1')
+        for i in range(5):
+            assert transport.send(message(f'u{i}@example.com')) == f'id-u{i}@example.com'
+        assert created == ['ses']
+
+    def test_transport_selected_from_config(self, tmp_path):
+        assert isinstance(make_dispatcher(MAIL_TRANSPORT='memory').transport, MemoryTransport)
+        dispatcher = make_dispatcher(MAIL_TRANSPORT='file', MAIL_FILE_DIR=str(tmp_path))
+        assert isinstance(dispatcher.transport, FileTransport)
+        with pytest.raises(ValueError):
+            make_dispatcher(MAIL_TRANSPORT='pigeon')
+
+
+class TestSendEmail:
+
+    def test_invites_go_through_the_mail_queue(self, app):
+        owner = User(email='owner@example.com', name='Owner')
+        existing = User(email='existing@example.com', name='Existing')
+        db.session.add_all([owner, existing])
+        db.session.flush()
+        team = Team(name='Mail Team', owner_id=owner.id)
+        db.session.add(team)
+        db.session.flush()
+        db.session.add(TeamMember(team_id=team.id, user_id=owner.id, role='owner'))
+        db.session.commit()
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(owner.id)
+            sess['_fresh'] = True
+        emails = ['existing@example.com'] + [f'new{i}@example.com' for i in range(5)]
+        resp = client.post(f'/team/teams/{team.id}/invite', data={'emails': ', '.join(emails)})
+        assert resp.status_code == 302
+        job_queue.run_pending()
+
+        outbox = mailer.transport.outbox
+        assert sorted(m.to for m in outbox) == sorted(emails)
+        assert all(m.html and m.text for m in outbox)
+        assert mailer.stats()['sent'] == len(emails)
@@ -0,0 +1,164 @@
+"""
+Tests for conditional GET and delta responses on the members-data endpoint.
+"""
+
+import pytest
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.models import User, Team, TeamMember, Assessment, AssessmentResult
+from app.pagination import decode_cursor
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def team_setup(app):
+    """A team whose owner and two members have one result each."""
+    assessment = Assessment(name='Social Styles', questions='[]')
+    owner = User(email='owner@example.com', name='Owner')
+    db.session.add_all([assessment, owner])
+    db.session.flush()
+    team = Team(name='Polling Team', owner_id=owner.id)
+    db.session.add(team)
+    db.session.flush()
+    db.session.add(TeamMember(team_id=team.id, user_id=owner.id, role='owner'))
+
+    users = [owner]
+    for i in range(2):
+        user = User(email=f'member{i}@example.com', name=f'Member {i}')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id))
+        users.append(user)
+
+    base = datetime(2024, 1, 1)
+    for i, user in enumerate(users):
+        add_result(user, assessment, base + timedelta(minutes=i))
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(owner.id)
+        sess['_fresh'] = True
+    return {'team': team, 'users': users, 'assessment': assessment, 'client': client}
+
+
+def add_result(user, assessment, created_at, score=3.0):
+    result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                              assertiveness_score=score, responsiveness_score=score,
+                              social_style='EXPRESSIVE', created_at=created_at)
+    db.session.add(result)
+    return result
+
+
+def url(team, **params):
+    query = '&'.join(f'{k}={v}' for k, v in params.items())
+    return f'/team/teams/{team.id}/members-data' + (f'?{query}' if query else '')
+
+
+class TestConditionalGet:
+
+    def test_full_response_carries_validators(self, app, team_setup):
+        resp = team_setup['client'].get(url(team_setup['team']))
+        assert resp.status_code == 200
+        assert resp.headers.get('ETag')
+        assert 'no-cache' in resp.headers.get('Cache-Control')
+        data = resp.get_json()
+        assert len(data['members']) == 3
+        assert data['member_ids'] == [user.id for user in team_setup['users']]
+        assert data['delta'] is False
+
+    def test_matching_etag_returns_304(self, app, team_setup):
+        client = team_setup['client']
+        etag = client.get(url(team_setup['team'])).headers['ETag']
+        resp = client.get(url(team_setup['team']), headers={'If-None-Match': etag})
+        assert resp.status_code == 304
+        assert resp.data == b''
+
+    def test_if_modified_since_alone_is_not_a_validator(self, app, team_setup):
+        client = team_setup['client']
+        assert 'Last-Modified' not in client.get(url(team_setup['team'])).headers
+        team_setup['team'].remove_member(team_setup['users'][2])
+        db.session.commit()
+        resp = client.get(url(team_setup['team']),
+                          headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        assert resp.status_code == 200
+        assert len(resp.get_json()['members']) == 2
+
+    def test_new_result_changes_etag(self, app, team_setup):
+        client = team_setup['client']
+        etag = client.get(url(team_setup['team'])).headers['ETag']
+        add_result(team_setup['users'][1], team_setup['assessment'], datetime(2024, 2, 1))
+        db.session.commit()
+        resp = client.get(url(team_setup['team']), headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert resp.headers['ETag'] != etag
+
+    def test_member_removal_changes_etag(self, app, team_setup):
+        client = team_setup['client']
+        etag = client.get(url(team_setup['team'])).headers['ETag']
+        team_setup['team'].remove_member(team_setup['users'][2])
+        db.session.commit()
+        resp = client.get(url(team_setup['team']), headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert len(resp.get_json()['members']) == 2
+
+
+class TestSinceCursor:
+
+    def test_cursor_returns_only_newer_results(self, app, team_setup):
+        client = team_setup['client']
+        cursor = client.get(url(team_setup['team'])).get_json()['cursor']
+        assert cursor
+
+        resp = client.get(url(team_setup['team'], since=cursor))
+        assert resp.get_json()['members'] == []
+
+        add_result(team_setup['users'][2], team_setup['assessment'], datetime(2024, 2, 1), score=1.5)
+        db.session.commit()
+
+        data = client.get(url(team_setup['team'], since=cursor)).get_json()
+        assert data['delta'] is True
+        assert [m['user_id'] for m in data['members']] == [team_setup['users'][2].id]
+        assert data['members'][0]['assertiveness_score'] == pytest.approx(1.5)
+        assert decode_cursor(data['cursor']) > decode_cursor(cursor)
+
+    def test_result_in_the_same_instant_as_the_cursor_is_delivered(self, app, team_setup):
+        client = team_setup['client']
+        cursor = client.get(url(team_setup['team'])).get_json()['cursor']
+        assert decode_cursor(cursor)[0] == datetime(2024, 1, 1, 0, 2)
+
+        add_result(team_setup['users'][0], team_setup['assessment'], datetime(2024, 1, 1, 0, 2), score=1.5)
+        db.session.commit()
+
+        data = client.get(url(team_setup['team'], since=cursor)).get_json()
+        assert [m['user_id'] for m in data['members']] == [team_setup['users'][0].id]
+        assert client.get(url(team_setup['team'], since=data['cursor'])).get_json()['members'] == []
+
+    def test_delta_lists_current_members_after_a_departure(self, app, team_setup):
+        client = team_setup['client']
+        cursor = client.get(url(team_setup['team'])).get_json()['cursor']
+        team_setup['team'].remove_member(team_setup['users'][1])
+        db.session.commit()
+
+        data = client.get(url(team_setup['team'], since=cursor)).get_json()
+        assert data['members'] == []
+        assert data['member_ids'] == [team_setup['users'][0].id, team_setup['users'][2].id]
+
+    def test_invalid_cursor_is_rejected(self, app, team_setup):
+        resp = team_setup['client'].get(url(team_setup['team'], since='yesterday'))
+        assert resp.status_code == 400
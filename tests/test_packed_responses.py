@@ -0,0 +1,111 @@
+"""
+Tests for the packed (one byte per question) responses column.
+"""
+
+import pytest
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.assessment.scoring import packed_matrix, response_matrix, score_batch
+from app.models import User, Assessment, AssessmentResult
+from app.models.assessment import RESPONSE_COUNT, pack_responses, unpack_responses
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def full_responses(rng):
+    return {str(i): rng.randint(1, 4) for i in range(1, 31)}
+
+
+class TestCodec:
+
+    def test_round_trip(self):
+        responses = full_responses(random.Random(16))
+        packed = pack_responses(responses)
+        assert len(packed) == RESPONSE_COUNT
+        assert unpack_responses(packed) == responses
+
+    def test_missing_and_unknown_keys(self):
+        packed = pack_responses({'1': 4, 30: 2, 'comment': 'hi', '31': 3, '0': 1})
+        assert packed[0] == 4 and packed[29] == 2 and sum(packed) == 6
+        assert unpack_responses(packed) == {'1': 4, '30': 2}
+
+    def test_empty_values(self):
+        assert unpack_responses(None) == {}
+        assert pack_responses(None) == bytes(RESPONSE_COUNT)
+
+    def test_out_of_range_answer_is_rejected(self):
+        with pytest.raises(ValueError):
+            pack_responses({'1': 256})
+
+    @pytest.mark.parametrize('answer', ['4', 2.5, None])
+    def test_non_integer_answer_is_rejected(self, answer):
+        with pytest.raises(ValueError):
+            pack_responses({'1': answer})
+
+
+class TestModel:
+
+    def test_stored_compactly_and_api_compatible(self, app):
+        user = User(email='packed@example.com', name='Packed')
+        assessment = Assessment(name='Social Styles', questions='[]')
+        db.session.add_all([user, assessment])
+        db.session.flush()
+        responses = full_responses(random.Random(3))
+        result = AssessmentResult(user_id=user.id, assessment_id=assessment.id)
+        result.set_responses(responses)
+        result.calculate_scores()
+        db.session.add(result)
+        db.session.commit()
+        db.session.expire_all()
+
+        stored = db.session.execute(db.text('SELECT responses FROM assessment_results')).scalar()
+        assert len(stored) == RESPONSE_COUNT
+        assert result.get_responses() == responses
+        (a, r, style), = score_batch([responses])
+        assert (result.assertiveness_score, result.social_style) == (a, style)
+
+    def test_response_array_is_a_view(self):
+        result = AssessmentResult()
+        result.set_responses({'1': 4, '16': 2})
+        array = result.response_array()
+        assert array.dtype == np.uint8 and array.shape == (RESPONSE_COUNT,)
+        assert array[0] == 4 and array[15] == 2
+        assert not array.flags.writeable
+        assert np.shares_memory(array, np.frombuffer(result.responses, dtype=np.uint8))
+
+    def test_response_array_without_responses(self):
+        assert AssessmentResult().response_array().sum() == 0
+
+
+class TestPackedScoring:
+
+    def test_packed_matrix_matches_dict_path(self):
+        rng = random.Random(30)
+        response_sets = [full_responses(rng) for _ in range(50)]
+        packed = [pack_responses(responses) for responses in response_sets]
+        assert packed_matrix(packed).shape == (50, RESPONSE_COUNT)
+        assert np.array_equal(response_matrix(packed), response_matrix(response_sets))
+        assert score_batch(packed) == score_batch(response_sets)
+
+    def test_mixed_inputs(self):
+        responses = {'1': 4, '30': 1}
+        matrix = response_matrix([pack_responses(responses), responses, b'\x04'])
+        assert matrix.shape == (3, RESPONSE_COUNT)
+        assert matrix[0].tolist() == matrix[1].tolist()
+        assert matrix[2].sum() == 4
@@ -0,0 +1,150 @@
+"""
+Tests for background pre-rendering of charts and PDF reports.
+"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import g
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, chart_cache, report_cache, prerenderer
+from app.assessment import utils
+from app.models import User, Assessment, AssessmentResult
+from app.prerender import Prerenderer
+
+
+@pytest.fixture
+def app():
+    """Create application for testing, with pre-rendering switched on."""
+    app = create_app('testing')
+    app.config['PRERENDER_ENABLED'] = True
+    prerenderer.init_app(app)
+    with app.app_context():
+        db.create_all()
+        chart_cache.clear()
+        chart_cache.reset_stats()
+        report_cache.clear()
+        yield app
+        prerenderer.join()
+        prerenderer.shutdown()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def setup(app):
+    user = User(email='user@example.com', name='User')
+    assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+    db.session.add_all([user, assessment])
+    db.session.commit()
+    return {'user': user, 'assessment': assessment}
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count PDF builds."""
+    calls = []
+    real = utils.generate_pdf_report
+
+    def counting(result, chart_img, user):
+        calls.append(result.id)
+        return real(result, chart_img, user)
+
+    monkeypatch.setattr(utils, 'generate_pdf_report', counting)
+    return calls
+
+
+def add_result(setup, assertiveness=3.2, responsiveness=1.7):
+    result = AssessmentResult(user_id=setup['user'].id, assessment_id=setup['assessment'].id,
+                              assertiveness_score=assertiveness, responsiveness_score=responsiveness,
+                              social_style='DRIVER', created_at=datetime(2024, 6, 1, 9))
+    db.session.add(result)
+    return result
+
+
+def login(app, user):
+    g.pop('_login_user', None)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+class TestPrerenderer:
+
+    def test_one_task_per_key_in_flight(self, app):
+        release = threading.Event()
+        calls = []
+
+        def task(n):
+            release.wait(5)
+            calls.append(n)
+
+        first = prerenderer.submit('k', task, 1)
+        assert prerenderer.submit('k', task, 2) is first
+        release.set()
+        prerenderer.join()
+        assert calls == [1]
+        assert prerenderer.submit('k', task, 3) is not first
+        prerenderer.join()
+        assert calls == [1, 3]
+
+    def test_wait_blocks_until_done(self, app):
+        done = []
+        prerenderer.submit('slow', lambda: (time.sleep(0.05), done.append(True)))
+        assert prerenderer.wait('slow') is True
+        assert done == [True]
+        assert prerenderer.wait('slow') is False
+
+    def test_failures_are_counted_not_raised(self, app):
+        prerenderer.reset_stats()
+        prerenderer.submit('boom', lambda: 1 / 0)
+        prerenderer.join()
+        assert prerenderer.stats()['failed'] == 1
+
+    def test_disabled(self):
+        idle = Prerenderer()
+        assert idle.submit('k', print) is None
+        assert idle.wait('k') is False
+
+
+class TestCommitHook:
+
+    def test_chart_and_pdf_rendered_after_commit(self, app, setup, builds):
+        result = add_result(setup)
+        db.session.commit()
+        prerenderer.join()
+        assert builds == [result.id]
+        assert chart_cache.get(utils.chart_cache_key(3.2, 1.7)) is not None
+        assert report_cache.get(utils.report_cache_key(result.id)) is not None
+
+    def test_views_use_the_prerendered_artifacts(self, app, setup, builds):
+        result = add_result(setup)
+        db.session.commit()
+        prerenderer.join()
+        chart_cache.reset_stats()
+        client = login(app, setup['user'])
+        assert client.get(f'/assessment/results/{result.id}').status_code == 200
+        assert chart_cache.stats()['misses'] == 0
+        assert client.get(f'/assessment/download_report/{result.id}').data.startswith(b'%PDF')
+        assert builds == [result.id]
+
+    def test_nothing_scheduled_on_rollback(self, app, setup):
+        prerenderer.reset_stats()
+        add_result(setup)
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert prerenderer.stats()['submitted'] == 0
+
+    def test_disabled_in_testing_by_default(self):
+        app = create_app('testing')
+        assert app.config['PRERENDER_ENABLED'] is False
+        assert prerenderer.enabled is False
@@ -0,0 +1,183 @@
+"""
+Query-plan regression tests for the hot assessment, team and admin queries.
+
+Each test runs the real code path, captures the SQL it emits, and EXPLAINs
+that SQL with the same parameters on the configured test database: SQLite
+by default, or Postgres when TEST_DATABASE_URL points at one. A plan that
+reads a hot table without an index fails the test.
+"""
+
+import json
+import pytest
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.models import User, Team, TeamMember, Assessment, AssessmentResult
+
+HOT_TABLES = ('assessment_results', 'team_members', 'users')
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def seed():
+    assessment = Assessment(name='Social Styles', questions='[]')
+    db.session.add(assessment)
+    db.session.flush()
+    users = []
+    for i in range(20):
+        user = User(email=f'user{i}@example.com', name=f'User {i}',
+                    last_login=datetime(2024, 1, 1) + timedelta(days=i))
+        db.session.add(user)
+        users.append(user)
+    db.session.flush()
+    team = Team(name='Plans', owner_id=users[0].id)
+    db.session.add(team)
+    db.session.flush()
+    for user in users:
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id))
+        for day in range(3):
+            db.session.add(AssessmentResult(
+                user_id=user.id, assessment_id=assessment.id,
+                assertiveness_score=2.0, responsiveness_score=3.0, social_style='AMIABLE',
+                created_at=datetime(2024, 2, 1) + timedelta(days=day)))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+@contextmanager
+def captured_statements():
+    """Record (statement, parameters) for every SELECT run inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def sqlite_full_scans(connection, statement, parameters):
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        # "SCAN users" is a table scan; "SCAN users USING INDEX ..." walks an index
+        if len(words) >= 2 and words[0] == 'SCAN' and words[1] in HOT_TABLES and 'USING' not in words:
+            scans.append(detail)
+    return scans
+
+
+def postgres_full_scans(connection, statement, parameters):
+    # Tiny test tables always favour a Seq Scan, so disable it for the
+    # EXPLAIN: a Seq Scan that survives means no usable index exists.
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    (plan,), = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).fetchall()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans = []
+
+    def walk(node):
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in HOT_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return scans
+
+
+def full_scans(statements):
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        explain = sqlite_full_scans
+    elif dialect == 'postgresql':
+        explain = postgres_full_scans
+    else:
+        pytest.skip(f'No plan checker for {dialect}')
+    found = []
+    with db.engine.begin() as connection:
+        for statement, parameters in statements:
+            found.extend(explain(connection, statement, parameters))
+    return found
+
+
+def assert_indexed(statements):
+    assert statements, 'code path ran no SELECT statements'
+    scans = full_scans(statements)
+    assert not scans, f'Full table scans: {scans}'
+
+
+def test_latest_result_for_user(app):
+    user = db.session.get(User, 5)
+    with captured_statements() as statements:
+        user.get_latest_assessment_result()
+    assert_indexed(statements)
+
+
+def test_team_roster_with_latest_results(app):
+    team = Team.query.first()
+    with captured_statements() as statements:
+        team.get_roster()
+    assert_indexed(statements)
+
+
+def test_teams_of_user(app):
+    with captured_statements() as statements:
+        TeamMember.query.filter_by(user_id=5).all()
+    assert_indexed(statements)
+
+
+def test_style_distribution_for_assessment(app):
+    with captured_statements() as statements:
+        db.session.query(
+            AssessmentResult.social_style, func.count(AssessmentResult.id)
+        ).filter_by(assessment_id=1).group_by(AssessmentResult.social_style).all()
+        AssessmentResult.query.filter_by(assessment_id=1).count()
+    assert_indexed(statements)
+
+
+def test_global_style_distribution(app):
+    with captured_statements() as statements:
+        db.session.query(
+            AssessmentResult.social_style, func.count(AssessmentResult.id)
+        ).group_by(AssessmentResult.social_style).all()
+        AssessmentResult.query.filter_by(social_style='DRIVER').count()
+    assert_indexed(statements)
+
+
+def test_active_and_recent_users(app):
+    since = datetime(2024, 1, 10)
+    with captured_statements() as statements:
+        User.query.filter(User.last_login > since).count()
+        User.query.order_by(User.created_at.desc()).limit(5).all()
+        AssessmentResult.query.order_by(AssessmentResult.created_at.desc()).limit(5).all()
+    assert_indexed(statements)
+
+
+def test_checker_detects_full_scans(app):
+    """Guard against the checker silently passing everything."""
+    with captured_statements() as statements:
+        User.query.filter(User.name == 'User 3').all()
+    assert full_scans(statements)
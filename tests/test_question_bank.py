@@ -0,0 +1,151 @@
+"""
+Tests for the compiled question-bank cache used by take_assessment.
+"""
+
+import pytest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.assessment import question_bank
+from app.assessment.question_bank import get_question_bank, compile_questions, parse_responses
+from app.models import User, Assessment, AssessmentResult
+
+
+def make_questions(prefix='Q'):
+    questions = []
+    for i in range(1, 31):
+        category = 'assertiveness' if i <= 15 else 'responsiveness'
+        questions.append({'id': i, 'text': f'{prefix}{i}', 'category': category,
+                          'left_label': f'L{i}', 'right_label': f'R{i}'})
+    return questions
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        question_bank.invalidate()
+        yield app
+        question_bank.invalidate()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def assessment(app):
+    assessment = Assessment(name='Social Styles', description='Test',
+                            questions=json.dumps(make_questions()))
+    db.session.add(assessment)
+    db.session.commit()
+    return assessment
+
+
+@pytest.fixture
+def count_parses(monkeypatch):
+    calls = []
+    real_loads = json.loads
+
+    def loads(*args, **kwargs):
+        calls.append(args)
+        return real_loads(*args, **kwargs)
+
+    monkeypatch.setattr(question_bank.json, 'loads', loads)
+    return calls
+
+
+class TestCompile:
+
+    def test_splits_by_category_and_renames_labels(self):
+        bank = compile_questions(1, json.dumps(make_questions() + [{'id': 99, 'category': 'other'}]))
+        assert [q['id'] for q in bank.assertiveness] == list(range(1, 16))
+        assert [q['id'] for q in bank.responsiveness] == list(range(16, 31))
+        assert bank.assertiveness[0]['left_characteristic'] == 'L1'
+        assert bank.responsiveness[0].get('right_characteristic') == 'R16'
+        assert bank.fields[0] == ('assertiveness_1', '1')
+        assert bank.fields[-1] == ('responsiveness_30', '30')
+
+    def test_compiled_questions_are_read_only(self):
+        bank = compile_questions(1, json.dumps(make_questions()))
+        with pytest.raises(TypeError):
+            bank.assertiveness[0]['text'] = 'changed'
+
+    def test_parse_responses_defaults_missing_answers_to_zero(self):
+        bank = compile_questions(1, json.dumps(make_questions()))
+        responses = parse_responses(bank, {'assertiveness_1': '4', 'responsiveness_16': '2'})
+        assert len(responses) == 30
+        assert responses['1'] == 4 and responses['16'] == 2 and responses['2'] == 0
+
+
+class TestCache:
+
+    def test_compiled_once_per_assessment(self, app, assessment, count_parses):
+        first = get_question_bank(assessment)
+        assert get_question_bank(assessment) is first
+        assert len(count_parses) == 1
+
+    def test_row_update_invalidates(self, app, assessment):
+        first = get_question_bank(assessment)
+        assessment.questions = json.dumps(make_questions('New '))
+        db.session.commit()
+        bank = get_question_bank(assessment)
+        assert bank is not first
+        assert bank.assertiveness[0]['text'] == 'New 1'
+
+    def test_changed_source_is_recompiled_without_an_event(self, app, assessment):
+        # Another worker's edit: this process never saw the UPDATE
+        get_question_bank(assessment)
+        db.session.execute(db.update(Assessment).where(Assessment.id == assessment.id)
+                           .values(questions=json.dumps(make_questions('Other '))))
+        db.session.commit()
+        assert get_question_bank(assessment).assertiveness[0]['text'] == 'Other 1'
+
+    def test_admin_toggle_and_edit_invalidate(self, app, assessment):
+        admin = User(email='admin@example.com', name='Admin', is_admin=True)
+        db.session.add(admin)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.id)
+            sess['_fresh'] = True
+
+        first = get_question_bank(assessment)
+        client.post(f'/admin/assessments/{assessment.id}/toggle_active')
+        second = get_question_bank(assessment)
+        assert second is not first
+
+        client.post(f'/admin/assessments/{assessment.id}/edit',
+                    data={'name': 'Renamed', 'description': 'Changed'})
+        assert get_question_bank(assessment) is not second
+
+
+class TestTakeAssessment:
+
+    def test_get_and_post_share_one_compile(self, app, assessment, count_parses):
+        user = User(email='taker@example.com', name='Taker')
+        db.session.add(user)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+
+        resp = client.get(f'/assessment/take/{assessment.id}')
+        assert resp.status_code == 200
+        page = resp.get_data(as_text=True)
+        assert 'name="assertiveness_1"' in page and 'name="responsiveness_30"' in page
+
+        answers = {f'assertiveness_{i}': '4' for i in range(1, 16)}
+        answers.update({f'responsiveness_{i}': '1' for i in range(16, 31)})
+        resp = client.post(f'/assessment/take/{assessment.id}', data=answers)
+        assert resp.status_code == 302
+
+        result = AssessmentResult.query.filter_by(user_id=user.id).one()
+        assert result.get_responses()['1'] == 4
+        assert result.social_style == 'DRIVER'
+        assert sum(1 for args in count_parses if args and args[0] == assessment.questions) == 1
@@ -0,0 +1,138 @@
+"""
+Tests for the process-pool rendering service.
+"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, chart_cache, report_cache, render_pool
+from app.assessment import utils
+from app.models import User, Assessment, AssessmentResult
+from app.render_pool import RenderPool, RenderError, RenderTimeout, default_pool_size
+
+
+@pytest.fixture
+def app():
+    """Create application for testing, with a one-process render pool."""
+    app = create_app('testing')
+    app.config.update(RENDER_POOL_ENABLED=True, RENDER_POOL_SIZE=1, RENDER_QUEUE_SIZE=2)
+    render_pool.init_app(app)
+    with app.app_context():
+        db.create_all()
+        chart_cache.clear()
+        report_cache.clear()
+        yield app
+        render_pool.shutdown()
+        db.session.remove()
+        db.drop_all()
+
+
+class TestRenderPool:
+
+    def test_runs_in_another_process(self, app):
+        assert render_pool.run(os.getpid) != os.getpid()
+        assert render_pool.run(pow, 2, 10) == 1024
+        stats = render_pool.stats()
+        assert stats['completed'] == 2
+        assert stats['max_wait_ms'] >= stats['avg_wait_ms'] >= 0
+
+    def test_task_errors_propagate(self, app):
+        with pytest.raises(ValueError):
+            render_pool.run(int, 'not a number')
+
+    def test_timeout(self, app):
+        with pytest.raises(RenderTimeout):
+            render_pool.run(time.sleep, 1, timeout=0.1)
+        assert render_pool.stats()['timeouts'] == 1
+
+    def test_crashed_child_is_replaced(self, app):
+        with pytest.raises(RenderError):
+            render_pool.run(os._exit, 1)
+        assert render_pool.stats()['crashes'] == 1
+        assert render_pool.run(pow, 3, 2) == 9
+
+    def test_full_queue_is_rejected(self, app):
+        render_pool.run(pow, 1, 1)  # start the pool before timing anything
+        busy = [threading.Thread(target=render_pool.run, args=(time.sleep, 0.5)) for _ in range(2)]
+        for thread in busy:
+            thread.start()
+        time.sleep(0.1)
+        with pytest.raises(RenderError):
+            render_pool.run(pow, 2, 2)
+        for thread in busy:
+            thread.join()
+        assert render_pool.stats()['rejected'] == 1
+
+    def test_map_keeps_order(self, app):
+        assert list(render_pool.map(pow, [(2, i) for i in range(6)])) == [1, 2, 4, 8, 16, 32]
+        assert render_pool.stats()['completed'] == 6
+
+    def test_pool_recycled_without_native_support(self, app, monkeypatch):
+        # Python 3.10 has no max_tasks_per_child; the whole pool is replaced instead
+        monkeypatch.setattr(sys.modules[RenderPool.__module__], 'NATIVE_CHILD_RECYCLING', False)
+        render_pool.max_tasks_per_child = 2
+        pids = [render_pool.run(os.getpid) for _ in range(3)]
+        assert pids[0] == pids[1] != pids[2]
+        assert render_pool.stats()['completed'] == 3
+
+    def test_disabled_runs_inline(self):
+        pool = RenderPool()
+        assert pool.run(os.getpid) == os.getpid()
+
+    def test_default_size_shares_the_cpus_between_web_workers(self, monkeypatch):
+        monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+        assert [default_pool_size(n) for n in (17, 4, 1)] == [1, 2, 8]
+        app = create_app('testing')
+        app.config.update(RENDER_POOL_SIZE=None, WEB_WORKERS=17)
+        pool = RenderPool()
+        pool.init_app(app)
+        assert pool.size == 1
+
+
+class TestRenderers:
+
+    def test_matplotlib_chart_rendered_in_pool(self, app):
+        app.config['CHART_RENDERER'] = 'matplotlib'
+        data_uri = utils.generate_social_style_chart(2.5, 3.5)
+        assert data_uri.startswith('data:image/png;base64,')
+        assert render_pool.stats()['completed'] == 1
+
+    def test_pdf_built_in_pool(self, app):
+        user = User(email='user@example.com', name='User')
+        assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+        db.session.add_all([user, assessment])
+        db.session.flush()
+        result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                  assertiveness_score=1.5, responsiveness_score=2.5,
+                                  social_style='AMIABLE', created_at=datetime(2024, 6, 1, 9))
+        db.session.add(result)
+        db.session.commit()
+        assert utils.get_pdf_report(result, user).startswith(b'%PDF')
+        assert render_pool.stats()['completed'] == 1
+
+    def test_unavailable_render_is_a_503(self, app, monkeypatch):
+        def overloaded(fn, *args, **kwargs):
+            raise RenderError('Render queue is full')
+        monkeypatch.setattr(render_pool, 'run', overloaded)
+        user = User(email='user@example.com', name='User')
+        assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+        db.session.add_all([user, assessment])
+        db.session.flush()
+        result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                  assertiveness_score=1.5, responsiveness_score=2.5,
+                                  social_style='AMIABLE')
+        db.session.add(result)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+        resp = client.get(f'/assessment/download_report/{result.id}')
+        assert resp.status_code == 503
+        assert resp.headers['Retry-After'] == '5'
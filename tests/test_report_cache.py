@@ -0,0 +1,193 @@
+"""
+Tests for the cached PDF reports and the S3 cache tier.
+"""
+
+import pytest
+import io
+import os
+import sys
+from datetime import datetime, timedelta
+
+from flask import g
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, report_cache
+from app.assessment import utils
+from app.cache import S3Cache, TieredCache
+from app.models import User, Assessment, AssessmentResult
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        report_cache.clear()
+        report_cache.reset_stats()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def setup(app):
+    admin = User(email='admin@example.com', name='Admin', is_admin=True)
+    user = User(email='user@example.com', name='User')
+    assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+    db.session.add_all([admin, user, assessment])
+    db.session.flush()
+    result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                              assertiveness_score=3.1, responsiveness_score=1.8,
+                              social_style='DRIVER', created_at=datetime(2024, 5, 1, 9))
+    db.session.add(result)
+    db.session.commit()
+    return {'admin': admin, 'user': user, 'result': result}
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count PDF builds."""
+    calls = []
+    real = utils.generate_pdf_report
+
+    def counting(result, chart_img, user):
+        calls.append(result.id)
+        return real(result, chart_img, user)
+
+    monkeypatch.setattr(utils, 'generate_pdf_report', counting)
+    return calls
+
+
+def login(app, user):
+    # Requests share the fixture's app context; forget the user Flask-Login
+    # cached on g for an earlier client
+    g.pop('_login_user', None)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+class FakeS3:
+    """The handful of S3 client calls S3Cache makes, over a dict."""
+
+    def __init__(self):
+        self.objects = {}
+        self.clock = datetime(2024, 1, 1)
+
+    def put_object(self, Bucket, Key, Body):
+        self.clock += timedelta(seconds=1)
+        self.objects[Key] = (bytes(Body), self.clock)
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+        return {'Body': io.BytesIO(self.objects[Key][0])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete['Objects']:
+            self.objects.pop(item['Key'], None)
+
+    def get_paginator(self, name):
+        fake = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                yield {'Contents': [{'Key': key, 'Size': len(body), 'LastModified': when}
+                                    for key, (body, when) in fake.objects.items()
+                                    if key.startswith(Prefix)]}
+        return Paginator()
+
+
+class TestDownloadReport:
+
+    def test_built_once_then_served_from_cache(self, app, setup, builds):
+        client = login(app, setup['user'])
+        url = f'/assessment/download_report/{setup["result"].id}'
+        first = client.get(url)
+        second = client.get(url)
+        assert first.status_code == second.status_code == 200
+        assert first.data.startswith(b'%PDF')
+        assert second.data == first.data
+        assert builds == [setup['result'].id]
+        assert 'immutable' in first.headers['Cache-Control']
+        assert 'private' in first.headers['Cache-Control']
+        assert first.headers['ETag'] == second.headers['ETag']
+
+    def test_revalidation_skips_the_pdf(self, app, setup, builds):
+        client = login(app, setup['user'])
+        url = f'/assessment/download_report/{setup["result"].id}'
+        etag = client.get(url).headers['ETag']
+        report_cache.clear()
+        resp = client.get(url, headers={'If-None-Match': etag})
+        assert resp.status_code == 304
+        assert resp.data == b''
+        assert len(builds) == 1
+
+    def test_template_version_bump_rebuilds(self, app, setup, builds, monkeypatch):
+        client = login(app, setup['user'])
+        url = f'/assessment/download_report/{setup["result"].id}'
+        old_etag = client.get(url).headers['ETag']
+        monkeypatch.setattr(utils, 'REPORT_TEMPLATE_VERSION', utils.REPORT_TEMPLATE_VERSION + 1)
+        resp = client.get(url, headers={'If-None-Match': old_etag})
+        assert resp.status_code == 200
+        assert len(builds) == 2
+
+    def test_other_users_are_refused(self, app, setup, builds):
+        resp = login(app, setup['admin']).get(f'/assessment/download_report/{setup["result"].id}')
+        assert resp.status_code == 302
+        assert builds == []
+
+
+class TestInvalidation:
+
+    def test_delete_result(self, app, setup):
+        result_id = setup['result'].id
+        login(app, setup['user']).get(f'/assessment/download_report/{result_id}')
+        assert report_cache.get(utils.report_cache_key(result_id)) is not None
+        login(app, setup['user']).post(f'/assessment/delete_result/{result_id}')
+        assert report_cache.get(utils.report_cache_key(result_id)) is None
+
+    def test_admin_delete_user(self, app, setup):
+        result_id = setup['result'].id
+        login(app, setup['user']).get(f'/assessment/download_report/{result_id}')
+        resp = login(app, setup['admin']).post(f'/admin/users/{setup["user"].id}/delete')
+        assert resp.status_code == 302
+        assert report_cache.get(utils.report_cache_key(result_id)) is None
+
+
+class TestS3Cache:
+
+    def test_round_trip_and_delete(self):
+        store = S3Cache('bucket', prefix='reports/', client=FakeS3())
+        assert store.get('k') is None
+        store.set('k', b'pdf')
+        assert store.get('k') == b'pdf'
+        store.delete('k')
+        assert store.get('k') is None
+
+    def test_evicts_oldest_over_budget(self):
+        s3 = FakeS3()
+        store = S3Cache('bucket', prefix='reports/', max_bytes=10, sweep_every=1, client=s3)
+        for key in 'abcd':
+            store.set(key, b'1234')
+        assert store.get('a') is None and store.get('b') is None
+        assert store.get('c') == b'1234' and store.get('d') == b'1234'
+        assert store.size() == 8
+
+    def test_shared_tier_fills_the_tiers_above(self, tmp_path):
+        s3 = FakeS3()
+        host_a = TieredCache('TEST', store=S3Cache('bucket', client=s3))
+        host_b = TieredCache('TEST', directory=str(tmp_path), store=S3Cache('bucket', client=s3))
+        host_a.set('k', b'v')
+        assert host_b.get('k') == b'v'
+        assert host_b.stats()['store_hits'] == 1
+        assert host_b.disk.get('k') == b'v'
+        assert host_b.get('k') == b'v'
+        assert host_b.stats()['memory_hits'] == 1
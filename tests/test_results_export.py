@@ -0,0 +1,187 @@
+"""
+Tests for the streaming CSV/Parquet export of assessment results.
+"""
+
+import pytest
+import csv
+import io
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.admin import export, views
+from app.models import User, Assessment, AssessmentResult, Team, TeamMember
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def setup(app):
+    admin = User(email='admin@example.com', name='Admin', is_admin=True)
+    ann = User(email='ann@example.com', name='Ann')
+    bob = User(email='bob@example.com', name='Bob')
+    first = Assessment(name='Social Styles', description='Test', questions='[]')
+    second = Assessment(name='Other', description='Test', questions='[]')
+    db.session.add_all([admin, ann, bob, first, second])
+    db.session.flush()
+
+    red = Team(name='Red', owner_id=ann.id)
+    blue = Team(name='Blue', owner_id=ann.id)
+    db.session.add_all([red, blue])
+    db.session.flush()
+    db.session.add_all([TeamMember(team_id=red.id, user_id=ann.id),
+                        TeamMember(team_id=blue.id, user_id=ann.id)])
+
+    for day, user, assessment, style in [(1, ann, first, 'DRIVER'), (2, bob, first, 'AMIABLE'),
+                                         (3, ann, second, 'EXPRESSIVE'), (4, bob, first, None),
+                                         (5, ann, first, 'ANALYTICAL')]:
+        db.session.add(AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                        assertiveness_score=2.5, responsiveness_score=3.0,
+                                        social_style=style, created_at=datetime(2024, 3, day, 10)))
+    db.session.commit()
+    return {'admin': admin, 'ann': ann, 'bob': bob, 'first': first, 'second': second,
+            'red': red, 'blue': blue}
+
+
+@contextmanager
+def capture_selects():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def export_rows(chunk_size=1000, **filters):
+    body = b''.join(export.csv_chunks(
+        export.iter_result_chunks(export.results_query(**filters), chunk_size)))
+    return list(csv.DictReader(io.StringIO(body.decode('utf-8'))))
+
+
+def login(app, user):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+class TestExportRows:
+
+    def test_all_results_with_user_and_teams(self, app, setup):
+        rows = export_rows()
+        assert [row['user_email'] for row in rows] == ['ann@example.com', 'bob@example.com'] * 2 + ['ann@example.com']
+        first = rows[0]
+        assert list(first) == [name for name, _ in export.COLUMNS]
+        assert first['teams'] == 'Blue; Red'
+        assert first['assessment'] == 'Social Styles'
+        assert first['created_at'] == '2024-03-01T10:00:00'
+        assert first['social_style'] == 'DRIVER'
+        assert rows[1]['teams'] == ''
+        assert rows[3]['social_style'] == ''
+
+    def test_formulas_are_quoted(self, app, setup):
+        setup['ann'].name = '=HYPERLINK("http://evil.example","x")'
+        db.session.commit()
+        row = export_rows()[0]
+        assert row['user_name'] == '\'=HYPERLINK("http://evil.example","x")'
+        assert export.csv_cell('-1+2') == "'-1+2"
+        assert export.csv_cell(-1.5) == -1.5
+        assert export.csv_cell('Ann') == 'Ann'
+
+    def test_filters(self, app, setup):
+        assert len(export_rows(assessment_id=setup['second'].id)) == 1
+        assert {row['user_name'] for row in export_rows(team_id=setup['red'].id)} == {'Ann'}
+        dated = export_rows(since=date(2024, 3, 2), until=date(2024, 3, 4))
+        assert [row['created_at'][:10] for row in dated] == ['2024-03-02', '2024-03-03', '2024-03-04']
+
+    def test_one_team_query_per_chunk(self, app, setup):
+        with capture_selects() as statements:
+            rows = export_rows(chunk_size=2)
+        assert len(rows) == 5
+        assert len([s for s in statements if 'FROM team_members' in s]) == 3
+
+    def test_header_only_when_nothing_matches(self, app, setup):
+        body = b''.join(export.csv_chunks(iter([])))
+        assert body.decode('utf-8').strip() == ','.join(name for name, _ in export.COLUMNS)
+
+
+class TestExportEndpoint:
+
+    def test_streams_csv(self, app, setup, monkeypatch):
+        monkeypatch.setattr(views, 'EXPORT_CHUNK_SIZE', 2)
+        resp = login(app, setup['admin']).get(f'/admin/results/export?assessment={setup["first"].id}'
+                                              '&since=2024-03-02')
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        assert resp.mimetype == 'text/csv'
+        assert 'attachment; filename=assessment-results-' in resp.headers['Content-Disposition']
+        rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+        assert [row['created_at'][:10] for row in rows] == ['2024-03-02', '2024-03-04', '2024-03-05']
+
+    @pytest.mark.parametrize('query', ['format=xlsx', 'since=yesterday'])
+    def test_bad_arguments(self, app, setup, query):
+        assert login(app, setup['admin']).get(f'/admin/results/export?{query}').status_code == 400
+
+    def test_admins_only(self, app, setup):
+        assert login(app, setup['bob']).get('/admin/results/export').status_code == 302
+
+    def test_parquet_without_pyarrow(self, app, setup, monkeypatch):
+        def unavailable():
+            raise export.ExportUnavailable('Parquet export needs the pyarrow package')
+        monkeypatch.setattr(export, '_arrow', unavailable)
+        resp = login(app, setup['admin']).get('/admin/results/export?format=parquet')
+        assert resp.status_code == 501
+
+
+class TestParquet:
+
+    def test_row_group_per_chunk(self, app, setup):
+        pq = pytest.importorskip('pyarrow.parquet')
+        body = b''.join(export.parquet_chunks(
+            export.iter_result_chunks(export.results_query(), chunk_size=2)))
+        parquet = pq.ParquetFile(io.BytesIO(body))
+        assert parquet.metadata.num_rows == 5
+        assert parquet.metadata.num_row_groups == 3
+        table = parquet.read()
+        assert table.column_names == [name for name, _ in export.COLUMNS]
+        assert table.column('teams').to_pylist()[0] == 'Blue; Red'
+
+
+class TestCli:
+
+    def test_writes_csv_file(self, app, setup, tmp_path):
+        target = tmp_path / 'results.csv'
+        outcome = app.test_cli_runner().invoke(args=[
+            'export-results', '--output', str(target), '--team', str(setup['red'].id),
+            '--until', '2024-03-03'])
+        assert outcome.exit_code == 0, outcome.output
+        rows = list(csv.DictReader(io.StringIO(target.read_text())))
+        assert [row['created_at'][:10] for row in rows] == ['2024-03-01', '2024-03-03']
+
+    def test_csv_to_stdout(self, app, setup):
+        outcome = app.test_cli_runner().invoke(args=['export-results', '--assessment', str(setup['second'].id)])
+        assert outcome.exit_code == 0, outcome.output
+        assert 'EXPRESSIVE' in outcome.output
+        assert len(outcome.output.strip().splitlines()) == 2
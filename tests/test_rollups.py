@@ -0,0 +1,196 @@
+"""
+Tests for the daily rollup tables behind the admin analytics pages.
+"""
+
+import pytest
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db
+from app.models import User, Assessment, AssessmentResult
+from app.models import rollup
+from app.models.rollup import DailySignups, DailyResults, DailyActiveUsers, rebuild_rollups
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def setup(app):
+    assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+    admin = User(email='admin@example.com', name='Admin', is_admin=True,
+                 created_at=datetime(2024, 1, 1, 9))
+    user = User(email='user@example.com', name='User', created_at=datetime(2024, 1, 2, 9))
+    db.session.add_all([assessment, admin, user])
+    db.session.commit()
+    return {'assessment': assessment, 'admin': admin, 'user': user}
+
+
+@contextmanager
+def capture_selects():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_result(user, assessment, created_at, style='DRIVER'):
+    result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                              assertiveness_score=3.0, responsiveness_score=2.0,
+                              social_style=style, created_at=created_at)
+    db.session.add(result)
+    return result
+
+
+def results_rollup():
+    return {(row.day, row.assessment_id, row.social_style): row.total
+            for row in DailyResults.query if row.total}
+
+
+def signups_rollup():
+    return {row.day: row.total for row in DailySignups.query if row.total}
+
+
+def login(app, user):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+class TestIncrementalMaintenance:
+
+    def test_signups(self, app, setup):
+        assert signups_rollup() == {date(2024, 1, 1): 1, date(2024, 1, 2): 1}
+        db.session.delete(setup['user'])
+        db.session.commit()
+        assert signups_rollup() == {date(2024, 1, 1): 1}
+
+    def test_results_inserted_restyled_and_deleted(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        day = datetime(2024, 2, 3, 10)
+        first = add_result(user, assessment, day)
+        add_result(user, assessment, day)
+        add_result(user, assessment, day, style=None)
+        db.session.commit()
+        assert results_rollup() == {(day.date(), assessment.id, 'DRIVER'): 2,
+                                    (day.date(), assessment.id, ''): 1}
+
+        first.social_style = 'AMIABLE'
+        db.session.commit()
+        assert results_rollup() == {(day.date(), assessment.id, 'DRIVER'): 1,
+                                    (day.date(), assessment.id, 'AMIABLE'): 1,
+                                    (day.date(), assessment.id, ''): 1}
+
+        db.session.delete(first)
+        db.session.commit()
+        assert results_rollup() == {(day.date(), assessment.id, 'DRIVER'): 1,
+                                    (day.date(), assessment.id, ''): 1}
+
+    def test_one_active_user_count_per_login_day(self, app, setup):
+        user = setup['user']
+        for when in (datetime(2024, 3, 1, 8), datetime(2024, 3, 1, 17), datetime(2024, 3, 2, 9)):
+            user.last_login = when
+            db.session.commit()
+        assert {row.day: row.total for row in DailyActiveUsers.query} == {
+            date(2024, 3, 1): 1, date(2024, 3, 2): 1}
+
+    def test_admin_bulk_delete_is_discounted(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        add_result(user, assessment, datetime(2024, 2, 3, 10))
+        add_result(setup['admin'], assessment, datetime(2024, 2, 3, 11))
+        db.session.commit()
+
+        resp = login(app, setup['admin']).post(f'/admin/users/{user.id}/delete')
+        assert resp.status_code == 302
+        assert results_rollup() == {(date(2024, 2, 3), assessment.id, 'DRIVER'): 1}
+        assert signups_rollup() == {date(2024, 1, 1): 1}
+
+    def test_fallback_without_on_conflict(self, app, setup, monkeypatch):
+        monkeypatch.setattr(rollup, '_insert_for', lambda connection: None)
+        add_result(setup['user'], setup['assessment'], datetime(2024, 2, 3, 10))
+        db.session.commit()
+        add_result(setup['user'], setup['assessment'], datetime(2024, 2, 3, 12))
+        db.session.commit()
+        assert results_rollup() == {(date(2024, 2, 3), setup['assessment'].id, 'DRIVER'): 2}
+
+
+class TestRebuild:
+
+    def test_repairs_drift_from_raw_sql(self, app, setup):
+        user, assessment = setup['user'], setup['assessment']
+        add_result(user, assessment, datetime(2024, 2, 3, 10))
+        db.session.commit()
+        db.session.execute(db.insert(AssessmentResult), [
+            {'user_id': user.id, 'assessment_id': assessment.id, 'social_style': 'AMIABLE',
+             'created_at': datetime(2024, 2, 4, 10)},
+        ])
+        db.session.execute(db.update(DailySignups).values(total=99))
+        db.session.commit()
+
+        rebuild_rollups()
+        db.session.commit()
+        assert results_rollup() == {(date(2024, 2, 3), assessment.id, 'DRIVER'): 1,
+                                    (date(2024, 2, 4), assessment.id, 'AMIABLE'): 1}
+        assert signups_rollup() == {date(2024, 1, 1): 1, date(2024, 1, 2): 1}
+
+    def test_since_only_touches_recent_days(self, app, setup):
+        db.session.execute(db.update(DailySignups).values(total=99))
+        db.session.commit()
+        rebuild_rollups(since=date(2024, 1, 2))
+        db.session.commit()
+        assert signups_rollup() == {date(2024, 1, 1): 99, date(2024, 1, 2): 1}
+
+    def test_cli(self, app, setup):
+        add_result(setup['user'], setup['assessment'], datetime(2024, 2, 3, 10))
+        db.session.commit()
+        outcome = app.test_cli_runner().invoke(args=['rollup'])
+        assert outcome.exit_code == 0, outcome.output
+        assert 'Rebuilt 2 signup days and 1 result rows for all history.' in outcome.output
+
+
+class TestAdminPagesReadRollups:
+
+    @pytest.mark.parametrize('path', ['/admin/statistics', '/admin/assessments', '/admin/dashboard'])
+    def test_no_scans_of_results(self, app, setup, path):
+        for i in range(5):
+            add_result(setup['user'], setup['assessment'], datetime(2024, 2, i + 1, 10))
+        db.session.commit()
+        client = login(app, setup['admin'])
+        with capture_selects() as statements:
+            assert client.get(path).status_code == 200
+        aggregates = [s for s in statements if 'count(' in s.lower() or 'sum(' in s.lower()]
+        assert aggregates
+        assert not any('FROM assessment_results' in s for s in aggregates)
+
+    def test_assessment_detail_counts(self, app, setup):
+        assessment = setup['assessment']
+        add_result(setup['user'], assessment, datetime(2024, 2, 1, 10))
+        add_result(setup['user'], assessment, datetime(2024, 2, 2, 10), style='AMIABLE')
+        db.session.commit()
+        resp = login(app, setup['admin']).get(f'/admin/assessments/{assessment.id}')
+        assert resp.status_code == 200
+        html = resp.get_data(as_text=True)
+        assert "labels: ['AMIABLE', 'DRIVER']" in html
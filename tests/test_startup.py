@@ -0,0 +1,48 @@
+"""
+Tests that heavy optional dependencies stay out of app startup.
+
+create_app runs in every gunicorn worker and every ``flask`` CLI call, so
+qrcode, boto3, reportlab and matplotlib must only load on first use.
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.lazy import lazy_import
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DEFERRED = ['qrcode', 'boto3', 'botocore', 'reportlab', 'matplotlib.pyplot', 'numpy']
+
+
+def test_create_app_does_not_import_heavy_dependencies():
+    script = (
+        "import sys, json;"
+        "from app import create_app;"
+        "create_app('testing');"
+        f"print(json.dumps([m for m in {DEFERRED!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    json_module = lazy_import('json')
+    assert not json_module.is_loaded
+    assert json_module.dumps({'a': 1}) == '{"a": 1}'
+    assert json_module.is_loaded
+
+
+def test_lazy_module_surfaces_missing_dependency_on_use():
+    missing = lazy_import('no_such_module_for_tests')
+    try:
+        missing.anything
+    except ImportError:
+        pass
+    else:
+        raise AssertionError('Expected ImportError on first use')
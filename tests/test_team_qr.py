@@ -0,0 +1,150 @@
+"""
+Tests for stable team join tokens and the cached QR image route.
+"""
+
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, qr_cache
+from app.models import User, Team, TeamMember, Assessment, AssessmentResult
+from app.team import qr
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        qr_cache.clear()
+        qr_cache.reset_stats()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def team_setup(app):
+    owner = User(email='owner@example.com', name='Owner')
+    db.session.add(owner)
+    db.session.flush()
+    team = Team(name='QR Team', owner_id=owner.id)
+    db.session.add(team)
+    db.session.flush()
+    db.session.add(TeamMember(team_id=team.id, user_id=owner.id, role='owner'))
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(owner.id)
+        sess['_fresh'] = True
+    return {'team': team, 'owner': owner, 'client': client}
+
+
+def qr_url(team, **params):
+    query = '&'.join(f'{k}={v}' for k, v in params.items())
+    return f'/team/teams/{team.id}/qr.png' + (f'?{query}' if query else '')
+
+
+class TestJoinToken:
+
+    def test_token_is_stable(self, app, team_setup):
+        team = team_setup['team']
+        assert team.generate_join_token() == team.generate_join_token()
+
+    def test_token_format_is_unchanged(self, app, team_setup):
+        team = team_setup['team']
+        encoded_id, signature, name = team.generate_join_token().split('-', 2)
+        assert encoded_id == 'B'  # base62 of team id 1
+        assert signature
+        assert name == 'QR_Team'
+
+    def test_signature_depends_on_secret_key(self, app, team_setup):
+        team = team_setup['team']
+        before = team.join_signature()
+        app.config['SECRET_KEY'] = 'another-secret'
+        assert team.join_signature() != before
+
+    def test_stable_token_still_joins(self, app, team_setup):
+        token = team_setup['team'].generate_join_token()
+        resp = app.test_client().get(f'/team/quick-join/{token}')
+        assert resp.status_code == 200
+
+
+class TestQRRoute:
+
+    def test_returns_png_with_long_cache_for_versioned_url(self, app, team_setup):
+        team = team_setup['team']
+        version = qr.qr_version(team.generate_join_token())
+        resp = team_setup['client'].get(qr_url(team, v=version))
+        assert resp.status_code == 200
+        assert resp.mimetype == 'image/png'
+        assert resp.data.startswith(b'\x89PNG')
+        cache_control = resp.headers['Cache-Control']
+        assert 'max-age=31536000' in cache_control
+        assert 'immutable' in cache_control
+        assert 'private' in cache_control
+        assert resp.headers.get('ETag')
+
+    def test_stale_version_must_revalidate(self, app, team_setup):
+        resp = team_setup['client'].get(qr_url(team_setup['team'], v='stale'))
+        assert resp.status_code == 200
+        assert 'no-cache' in resp.headers['Cache-Control']
+
+    def test_if_none_match_returns_304(self, app, team_setup):
+        client, team = team_setup['client'], team_setup['team']
+        etag = client.get(qr_url(team)).headers['ETag']
+        resp = client.get(qr_url(team), headers={'If-None-Match': etag})
+        assert resp.status_code == 304
+        assert resp.data == b''
+
+    def test_encoder_runs_once_per_box_size(self, app, team_setup, monkeypatch):
+        calls = []
+        render = qr.render_qr_png
+
+        def counting_render(data, box_size=qr.DEFAULT_BOX_SIZE):
+            calls.append(box_size)
+            return render(data, box_size)
+
+        monkeypatch.setattr(qr, 'render_qr_png', counting_render)
+        client, team = team_setup['client'], team_setup['team']
+        for _ in range(3):
+            client.get(qr_url(team))
+        client.get(qr_url(team, box=4))
+        client.get(qr_url(team, box=4))
+        assert calls == [qr.DEFAULT_BOX_SIZE, 4]
+
+    def test_box_size_is_clamped(self, app, team_setup):
+        client, team = team_setup['client'], team_setup['team']
+        huge = client.get(qr_url(team, box=1000)).data
+        largest = client.get(qr_url(team, box=qr.MAX_BOX_SIZE)).data
+        assert huge == largest
+
+    def test_non_member_is_forbidden(self, app, team_setup):
+        outsider = User(email='outsider@example.com', name='Outsider')
+        db.session.add(outsider)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(outsider.id)
+            sess['_fresh'] = True
+        assert client.get(qr_url(team_setup['team'])).status_code == 403
+
+    def test_pages_link_the_cached_image(self, app, team_setup):
+        team = team_setup['team']
+        # The dashboard only shows the QR code next to a populated grid
+        assessment = Assessment(name='Social Styles', questions='[]')
+        db.session.add(assessment)
+        db.session.flush()
+        db.session.add(AssessmentResult(user_id=team_setup['owner'].id, assessment_id=assessment.id,
+                                        assertiveness_score=3.0, responsiveness_score=3.0,
+                                        social_style='EXPRESSIVE'))
+        db.session.commit()
+        version = qr.qr_version(team.generate_join_token())
+        for path in (f'/team/teams/{team.id}/dashboard', f'/team/teams/{team.id}/present'):
+            html = team_setup['client'].get(path).get_data(as_text=True)
+            assert f'/team/teams/{team.id}/qr.png?v={version}' in html
+            assert 'data:image/png;base64' not in html
@@ -0,0 +1,161 @@
+"""
+Tests for the team report pack (all members' PDFs plus a summary, as a ZIP).
+"""
+
+import pytest
+import io
+import os
+import sys
+import zipfile
+from datetime import datetime
+
+from flask import g
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db, report_cache, render_pool
+from app.assessment import utils
+from app.models import User, Team, TeamMember, Assessment, AssessmentResult
+from app.team import report_pack
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        report_cache.clear()
+        yield app
+        render_pool.shutdown()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def team_setup(app):
+    owner = User(email='owner@example.com', name='Olive Owner')
+    ann = User(email='ann@example.com', name='Ann')
+    bob = User(email='bob@example.com', name='Bob')
+    cat = User(email='cat@example.com', name='Cat')  # never takes the assessment
+    assessment = Assessment(name='Social Styles', description='Test', questions='[]')
+    db.session.add_all([owner, ann, bob, cat, assessment])
+    db.session.flush()
+    team = Team(name='Workshop Team', owner_id=owner.id)
+    db.session.add(team)
+    db.session.flush()
+    for user, role in [(owner, 'owner'), (ann, 'member'), (bob, 'member'), (cat, 'member')]:
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id, role=role,
+                                  joined_at=datetime(2024, 6, 1, 9, user.id)))
+    results = {}
+    for user, scores, style in [(owner, (3.2, 1.8), 'DRIVER'), (ann, (1.6, 3.4), 'AMIABLE'),
+                                (bob, (3.5, 3.1), 'EXPRESSIVE')]:
+        result = AssessmentResult(user_id=user.id, assessment_id=assessment.id,
+                                  assertiveness_score=scores[0], responsiveness_score=scores[1],
+                                  social_style=style, created_at=datetime(2024, 6, 2, 10))
+        db.session.add(result)
+        db.session.flush()
+        user.latest_result_id = result.id
+        results[user.email] = result
+    db.session.commit()
+    return {'team': team, 'owner': owner, 'ann': ann, 'results': results}
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count member PDF builds."""
+    calls = []
+    real = utils.generate_pdf_report
+
+    def counting(result, chart_img, user):
+        calls.append(result.id)
+        return real(result, chart_img, user)
+
+    monkeypatch.setattr(utils, 'generate_pdf_report', counting)
+    return calls
+
+
+@pytest.fixture
+def progress(monkeypatch):
+    events = []
+    monkeypatch.setattr(report_pack, 'broadcast_report_pack_progress',
+                        lambda team_id, done, total: events.append((team_id, done, total)))
+    return events
+
+
+def login(app, user):
+    g.pop('_login_user', None)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+    return client
+
+
+def pack_url(team):
+    return f'/team/teams/{team.id}/report-pack.zip'
+
+
+class TestReportPack:
+
+    def test_zip_of_summary_and_member_reports(self, app, team_setup, builds, progress):
+        team = team_setup['team']
+        resp = login(app, team_setup['owner']).get(pack_url(team))
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        assert resp.mimetype == 'application/zip'
+        assert resp.headers['X-Report-Count'] == '3'
+        assert 'Workshop_Team-reports.zip' in resp.headers['Content-Disposition']
+
+        archive = zipfile.ZipFile(io.BytesIO(resp.data))
+        assert archive.testzip() is None
+        assert archive.namelist() == ['00-team-summary.pdf', '01-Olive_Owner.pdf', '02-Ann.pdf', '03-Bob.pdf']
+        for name in archive.namelist():
+            assert archive.read(name).startswith(b'%PDF')
+        assert len(builds) == 3
+        assert progress[-1] == (team.id, 4, 4)
+
+    def test_streams_one_chunk_per_pdf(self, app, team_setup, progress):
+        resp = login(app, team_setup['owner']).get(pack_url(team_setup['team']), buffered=False)
+        chunks = [chunk for chunk in resp.response if chunk]
+        assert len(chunks) == 5  # summary, three members, central directory
+
+    def test_cached_reports_are_reused(self, app, team_setup, builds, progress):
+        ann_result = team_setup['results']['ann@example.com']
+        report_cache.set(utils.report_cache_key(ann_result.id), b'%PDF-cached')
+        resp = login(app, team_setup['owner']).get(pack_url(team_setup['team']))
+        archive = zipfile.ZipFile(io.BytesIO(resp.data))
+        assert archive.read('02-Ann.pdf') == b'%PDF-cached'
+        assert ann_result.id not in builds and len(builds) == 2
+        # Reports built for the pack are cached for single downloads too
+        bob_result = team_setup['results']['bob@example.com']
+        assert report_cache.get(utils.report_cache_key(bob_result.id)) == archive.read('03-Bob.pdf')
+
+    def test_owner_only(self, app, team_setup):
+        resp = login(app, team_setup['ann']).get(pack_url(team_setup['team']))
+        assert resp.status_code == 302
+
+    def test_summary_lists_pending_members(self, app):
+        pdf = report_pack.build_team_summary_pdf('Team', datetime(2024, 6, 1),
+                                                 [('Ann', 1.6, 3.4, 'AMIABLE')], ['Cat'])
+        assert pdf.startswith(b'%PDF')
+
+    def test_summary_escapes_names(self, app):
+        pdf = report_pack.build_team_summary_pdf('R&D <Ops>', datetime(2024, 6, 1),
+                                                 [('Ann', 1.6, 3.4, 'AMIABLE')], ['Cat <b', 'Dan & co'])
+        assert pdf.startswith(b'%PDF')
+
+    def test_dashboard_link_for_owner_only(self, app, team_setup):
+        team = team_setup['team']
+        assert pack_url(team) in login(app, team_setup['owner']).get(
+            f'/team/teams/{team.id}/dashboard').get_data(as_text=True)
+        assert pack_url(team) not in login(app, team_setup['ann']).get(
+            f'/team/teams/{team.id}/dashboard').get_data(as_text=True)
+
+    def test_built_in_parallel_through_the_pool(self, app, team_setup, progress):
+        app.config.update(RENDER_POOL_ENABLED=True, RENDER_POOL_SIZE=2)
+        render_pool.init_app(app)
+        resp = login(app, team_setup['owner']).get(pack_url(team_setup['team']))
+        archive = zipfile.ZipFile(io.BytesIO(resp.data))
+        assert len(archive.namelist()) == 4
+        assert render_pool.stats()['completed'] == 4
@@ -0,0 +1,147 @@
+"""
+Tests for the single-query team roster loader (Team.get_roster).
+
+The team pages used to issue 2N+1 queries (one User lookup and one
+latest-result lookup per member). These tests pin the roster to a fixed
+number of queries regardless of team size, and check it still picks each
+member's most recent result.
+"""
+
+import pytest
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Team, TeamMember, Assessment, AssessmentResult
+
+
+@pytest.fixture
+def app():
+    """Create application for testing."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed against the app engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def make_team(size, with_results=True, owner=None):
+    """Create a team with `size` members (the owner included)."""
+    assessment = Assessment(name='Social Styles', questions='[]')
+    db.session.add(assessment)
+    if owner is None:
+        owner = User(email=f'owner{size}@example.com', name='Owner')
+        db.session.add(owner)
+    db.session.flush()
+
+    team = Team(name=f'Team {size}', owner_id=owner.id)
+    db.session.add(team)
+    db.session.flush()
+    db.session.add(TeamMember(team_id=team.id, user_id=owner.id, role='owner'))
+
+    base = datetime(2024, 1, 1)
+    for i in range(size - 1):
+        user = User(email=f'member{size}_{i}@example.com', name=f'Member {i}')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id,
+                                  joined_at=base + timedelta(minutes=i)))
+        if with_results:
+            # An older result followed by a newer one; the roster must pick the newer.
+            db.session.add(AssessmentResult(
+                user_id=user.id, assessment_id=assessment.id,
+                assertiveness_score=1.5, responsiveness_score=1.5,
+                social_style='ANALYTICAL', created_at=base))
+            db.session.add(AssessmentResult(
+                user_id=user.id, assessment_id=assessment.id,
+                assertiveness_score=3.5, responsiveness_score=3.5,
+                social_style='EXPRESSIVE', created_at=base + timedelta(days=1)))
+    db.session.commit()
+    return team, owner
+
+
+class TestRosterContents:
+
+    def test_picks_latest_result_per_member(self, app):
+        team, _ = make_team(4)
+        roster = team.get_roster()
+        assert len(roster) == 4
+        for entry in roster:
+            if entry['role'] == 'owner':
+                assert entry['result'] is None
+            else:
+                assert entry['result'].social_style == 'EXPRESSIVE'
+
+    def test_completed_only_drops_members_without_results(self, app):
+        team, owner = make_team(4)
+        roster = team.get_roster(completed_only=True)
+        assert len(roster) == 3
+        assert owner.id not in [entry['user'].id for entry in roster]
+
+    def test_without_results(self, app):
+        team, _ = make_team(3)
+        roster = team.get_roster(include_results=False)
+        assert len(roster) == 3
+        assert all(entry['result'] is None for entry in roster)
+
+    def test_results_from_other_teams_members_are_ignored(self, app):
+        team_a, _ = make_team(3)
+        make_team(5)
+        assert len(team_a.get_roster(completed_only=True)) == 2
+
+
+class TestRosterQueryCount:
+
+    @pytest.mark.parametrize('size', [2, 10, 50])
+    def test_roster_is_a_single_query(self, app, size):
+        team, _ = make_team(size)
+        db.session.expire_all()
+        with count_queries() as statements:
+            roster = team.get_roster()
+            # Touching the loaded objects must not trigger lazy loads.
+            for entry in roster:
+                _ = entry['user'].name
+                if entry['result']:
+                    _ = entry['result'].assertiveness_score
+        # One roster query, plus the refresh of the expired team row.
+        assert len(statements) == 2
+
+    def test_members_data_query_count_is_independent_of_team_size(self, app):
+        counts = []
+        owner = User(email='owner@example.com', name='Owner')
+        db.session.add(owner)
+        client = app.test_client()
+        for size in (3, 30):
+            team, _ = make_team(size, owner=owner)
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(owner.id)
+                sess['_fresh'] = True
+            db.session.expire_all()
+            with count_queries() as statements:
+                resp = client.get(f'/team/teams/{team.id}/members-data')
+            assert resp.status_code == 200
+            assert len(resp.get_json()['members']) == size - 1
+            counts.append(len(statements))
+        assert counts[0] == counts[1]